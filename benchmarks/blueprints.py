@@ -0,0 +1,93 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Generators of large synthetic blueprints used by the benchmarks."""
+
+import time
+
+
+def generate_blueprint(node_templates=1000,
+                       node_types=100,
+                       version='cloudify_dsl_1_3'):
+    lines = ['tosca_definitions_version: {0}'.format(version),
+             '',
+             'plugins:',
+             '  bench_plugin:',
+             '    executor: central_deployment_agent',
+             '    source: dummy',
+             '',
+             'node_types:',
+             '  bench_root:',
+             '    properties:',
+             '      port:',
+             '        type: integer',
+             '        default: 8080',
+             '    interfaces:',
+             '      cloudify.interfaces.lifecycle:',
+             '        create: bench_plugin.tasks.create',
+             '        start:',
+             '          implementation: bench_plugin.tasks.start',
+             '          inputs:',
+             '            timeout:',
+             '              default: 30']
+    for i in range(node_types):
+        lines.extend([
+            '  bench_type_{0}:'.format(i),
+            '    derived_from: bench_root',
+            '    properties:',
+            '      name_{0}:'.format(i),
+            '        type: string',
+            '        default: value_{0}'.format(i),
+            '      tags:',
+            '        default: [a, b, c]'])
+    lines.extend(['',
+                  'relationships:',
+                  '  cloudify.relationships.depends_on: {}',
+                  '',
+                  'node_templates:'])
+    for i in range(node_templates):
+        lines.extend([
+            '  node_{0}:'.format(i),
+            '    type: bench_type_{0}'.format(i % node_types),
+            '    properties:',
+            '      port: {0}'.format(i),
+            '      name_{0}: {{ get_input: prefix }}'.format(i % node_types)])
+        if i > 0:
+            lines.extend([
+                '    relationships:',
+                '      - type: cloudify.relationships.depends_on',
+                '        target: node_{0}'.format(i - 1)])
+    lines.extend(['',
+                  'inputs:',
+                  '  prefix:',
+                  '    default: bench',
+                  '',
+                  'outputs:',
+                  '  first_port:',
+                  '    value: { get_property: [node_0, port] }',
+                  ''])
+    return '\n'.join(lines)
+
+
+def timed(func, repeat=3):
+    """Returns the best wall clock time of `repeat` calls to `func`."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
@@ -0,0 +1,100 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Compares parsing with the framework element tree and with networkx.
+
+The previous networkx based element tree and dependency graph are
+emulated by LegacyContext below, the benchmark parses the same blueprint
+with both contexts.
+
+Usage: python -m benchmarks.element_tree_benchmark [node_templates ...]
+"""
+
+import sys
+
+import networkx as nx
+
+from dsl_parser import parser
+from dsl_parser.framework import parser as framework_parser
+from benchmarks.blueprints import generate_blueprint, timed
+
+
+class LegacyContext(framework_parser.Context):
+
+    def __init__(self, *args, **kwargs):
+        self._element_tree = nx.DiGraph()
+        super(LegacyContext, self).__init__(*args, **kwargs)
+
+    def child_elements_iter(self, element):
+        return self._element_tree.successors_iter(element)
+
+    def ancestors_iter(self, element):
+        current_element = element
+        while True:
+            predecessors = self._element_tree.predecessors(current_element)
+            if not predecessors:
+                return
+            current_element = predecessors[0]
+            yield current_element
+
+    def descendants(self, element):
+        return nx.descendants(self._element_tree, element)
+
+    def _add_element(self, element, parent=None):
+        self.element_type_to_elements.setdefault(
+            type(element), []).append(element)
+        self._element_tree.add_node(element)
+        if parent:
+            self._element_tree.add_edge(parent, element)
+        else:
+            self._root_element = element
+
+    def _calculate_element_graph(self):
+        # collect the requirement dependencies with the framework code and
+        # copy them to a networkx graph, as the previous implementation did
+        super(LegacyContext, self)._calculate_element_graph()
+        dependencies = self.element_graph
+        self.element_graph = nx.DiGraph(self._element_tree)
+        for dependency in dependencies.nodes():
+            for element in dependencies.successors(dependency):
+                self.element_graph.add_edge(element, dependency)
+        self.element_graph.reverse(copy=False)
+
+    def elements_graph_topological_sort(self):
+        return nx.topological_sort(self.element_graph)
+
+
+def parse_with(context_cls, raw):
+    original = framework_parser.Context
+    framework_parser.Context = context_cls
+    try:
+        return parser.parse(raw)
+    finally:
+        framework_parser.Context = original
+
+
+def main(sizes):
+    print '{0:>8} {1:>12} {2:>12} {3:>8}'.format(
+        'nodes', 'networkx (s)', 'tree (s)', 'speedup')
+    for size in sizes:
+        raw = generate_blueprint(node_templates=size, node_types=size / 10)
+        legacy_time = timed(lambda: parse_with(LegacyContext, raw))
+        tree_time = timed(lambda: parse_with(framework_parser.Context, raw))
+        print '{0:>8} {1:>12.3f} {2:>12.3f} {3:>7.1f}x'.format(
+            size, legacy_time, tree_time, legacy_time / tree_time)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [500, 1000, 2000])
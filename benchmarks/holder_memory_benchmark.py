@@ -0,0 +1,121 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Measures the memory used by the holder tree of a loaded blueprint.
+
+The compact holder is compared with the previous layout (a regular object
+with a __dict__ holding the value, four marks and the filename), which is
+emulated by LegacyHolder below.
+
+Memory is measured with tracemalloc where available (python >= 3.4 or a
+patched python 2 with pytracemalloc). Otherwise the sizes of all objects
+reachable from the holder tree are summed with sys.getsizeof.
+
+Usage: python -m benchmarks.holder_memory_benchmark [node_templates]
+"""
+
+import gc
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from dsl_parser import holder, yaml_loader
+from benchmarks.blueprints import generate_blueprint
+
+
+class LegacyHolder(object):
+
+    def __init__(self, value, start_line, start_column, end_line,
+                 end_column, filename):
+        self.value = value
+        self.start_line = start_line
+        self.start_column = start_column
+        self.end_line = end_line
+        self.end_column = end_column
+        self.filename = filename
+
+
+class LegacyLoader(yaml_loader.DefaultLoader):
+
+    def _holder(self, obj, node):
+        return LegacyHolder(obj,
+                            node.start_mark.line,
+                            node.start_mark.column,
+                            node.end_mark.line,
+                            node.end_mark.column,
+                            self.filename)
+
+
+def reachable_size(root):
+    seen = set()
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or obj is None:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (holder.Holder, LegacyHolder)):
+            stack.append(obj.value)
+            if isinstance(obj, LegacyHolder):
+                stack.append(obj.__dict__)
+                stack.extend(obj.__dict__.values())
+            else:
+                stack.append(obj._marks)
+                stack.append(obj.filename)
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, set)):
+            stack.extend(obj)
+    return total
+
+
+def measure(raw, loader_cls):
+
+    def load():
+        return yaml_loader.load(raw, 'bench.yaml', loader_cls=loader_cls)
+
+    if not tracemalloc:
+        return reachable_size(load())
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(node_templates):
+    raw = generate_blueprint(node_templates=node_templates,
+                             node_types=node_templates / 10)
+    legacy_size = measure(raw, LegacyLoader)
+    compact_size = measure(raw, yaml_loader.DefaultLoader)
+    print 'node templates: {0}, blueprint size: {1} KB ({2})'.format(
+        node_templates, len(raw) / 1024,
+        'tracemalloc' if tracemalloc else 'sys.getsizeof')
+    print 'legacy holders:  {0:>10.1f} MB'.format(legacy_size / 1024.0 ** 2)
+    print 'compact holders: {0:>10.1f} MB'.format(compact_size / 1024.0 ** 2)
+    print 'reduction:       {0:>10.1f}%'.format(
+        100.0 * (legacy_size - compact_size) / legacy_size)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
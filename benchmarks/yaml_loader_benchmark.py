@@ -0,0 +1,47 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Compares the pure python and the libyaml backed holder loaders.
+
+Usage: python -m benchmarks.yaml_loader_benchmark [node_templates ...]
+"""
+
+import sys
+
+from dsl_parser import yaml_loader
+from benchmarks.blueprints import generate_blueprint, timed
+
+
+def main(sizes):
+    if not yaml_loader.HAS_LIBYAML:
+        print 'libyaml is not available, nothing to compare'
+        return
+    print '{0:>8} {1:>10} {2:>10} {3:>10} {4:>8}'.format(
+        'nodes', 'size (KB)', 'python (s)', 'libyaml (s)', 'speedup')
+    for size in sizes:
+        raw = generate_blueprint(node_templates=size, node_types=size / 10)
+        python_time = timed(
+            lambda: yaml_loader.load(raw, 'bench',
+                                     loader_cls=yaml_loader.MarkedLoader))
+        c_time = timed(
+            lambda: yaml_loader.load(raw, 'bench',
+                                     loader_cls=yaml_loader.CMarkedLoader))
+        print '{0:>8} {1:>10} {2:>10.3f} {3:>10.3f} {4:>7.1f}x'.format(
+            size, len(raw) / 1024, python_time, c_time,
+            python_time / c_time)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 5000, 20000])
@@ -0,0 +1,163 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Blueprint bundles: a blueprint along with all of its resolved imports.
+
+A bundle is a json file holding the content of the main blueprint and of
+each of its (transitive) imports, along with the url every import was
+resolved to and a sha256 hash of its content::
+
+    {
+        "dsl_bundle_version": 1,
+        "blueprint": {
+            "location": <the blueprint path or url the bundle was made of>,
+            "url": <the url it was resolved to>,
+            "content": ..., "sha256": ...,
+            "imports": [[<import as written>, <resolved url>], ...]
+        },
+        "imports": [
+            {"url": ..., "content": ..., "sha256": ...,
+             "imports": [[<import as written>, <resolved url>], ...]},
+            ...
+        ]
+    }
+
+Imports are listed in the order they are merged in. parser.parse_from_path
+accepts a bundle in place of a blueprint, parsing it does not locate or
+fetch any import. Operation mappings are still checked against the
+resource bases (the blueprint's directory and resources_base_url) to tell
+scripts from plugin operations, which may access the filesystem or the
+network like any other parse.
+"""
+
+import hashlib
+import json
+import os
+
+from dsl_parser import (exceptions,
+                        utils)
+from dsl_parser.elements import imports
+from dsl_parser.import_resolver.default_import_resolver import \
+    DefaultImportResolver
+
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_VERSION_KEY = 'dsl_bundle_version'
+
+
+def create_bundle(dsl_location, resources_base_url=None, resolver=None):
+    """Resolves the imports of a blueprint and returns its bundle (a dict).
+
+    :param dsl_location: the blueprint path or url.
+    """
+    if not resolver:
+        resolver = DefaultImportResolver()
+    if os.path.exists(dsl_location):
+        with open(dsl_location, 'r') as f:
+            dsl_string = f.read()
+    else:
+        dsl_string = resolver.fetch_import(dsl_location)
+    parsed_dsl_holder = utils.load_yaml(raw_yaml=dsl_string,
+                                        error_message='Failed to parse DSL',
+                                        filename=dsl_location)
+    blueprint_url, blueprint_imports, imported = imports.collect_imports(
+        parsed_dsl_holder,
+        blueprint_location=dsl_location,
+        resources_base_url=resources_base_url,
+        resolver=resolver)
+    for entry in imported:
+        entry['sha256'] = _content_hash(entry['content'])
+    return {
+        BUNDLE_VERSION_KEY: BUNDLE_FORMAT_VERSION,
+        'blueprint': {
+            'location': dsl_location,
+            'url': blueprint_url,
+            'content': dsl_string,
+            'sha256': _content_hash(dsl_string),
+            'imports': blueprint_imports
+        },
+        'imports': imported
+    }
+
+
+def write_bundle(bundle_path,
+                 dsl_location,
+                 resources_base_url=None,
+                 resolver=None):
+    """Writes the bundle of a blueprint to bundle_path."""
+    bundle = create_bundle(dsl_location,
+                           resources_base_url=resources_base_url,
+                           resolver=resolver)
+    with open(bundle_path, 'w') as f:
+        json.dump(bundle, f)
+
+
+def is_bundle(dsl_string):
+    return dsl_string.lstrip().startswith('{') and \
+        BUNDLE_VERSION_KEY in dsl_string and \
+        _load_json(dsl_string) is not None
+
+
+def load_bundle(dsl_string):
+    """Loads and verifies a bundle.
+
+    :return: a (blueprint content, blueprint location, blueprint url,
+             bundled imports) tuple, bundled imports is in the form
+             expected by imports.resolve_imports.
+    """
+    bundle = _load_json(dsl_string)
+    if bundle is None:
+        _invalid_bundle('not a blueprint bundle')
+    if bundle[BUNDLE_VERSION_KEY] != BUNDLE_FORMAT_VERSION:
+        _invalid_bundle('unsupported bundle version {0}'
+                        .format(bundle[BUNDLE_VERSION_KEY]))
+    try:
+        blueprint_entry = bundle['blueprint']
+        entries = [blueprint_entry] + bundle['imports']
+        for entry in entries:
+            if _content_hash(entry['content']) != entry['sha256']:
+                _invalid_bundle("content of '{0}' does not match its hash"
+                                .format(entry['url']))
+        bundled_imports = dict(
+            (entry['url'], {'content': entry['content'],
+                            'imports': entry['imports']})
+            for entry in entries)
+        return (blueprint_entry['content'],
+                blueprint_entry['location'],
+                blueprint_entry['url'],
+                bundled_imports)
+    except (KeyError, TypeError) as e:
+        _invalid_bundle('missing or invalid entry: {0}'.format(e))
+
+
+def _load_json(dsl_string):
+    try:
+        bundle = json.loads(dsl_string)
+    except ValueError:
+        return None
+    if not isinstance(bundle, dict) or BUNDLE_VERSION_KEY not in bundle:
+        return None
+    return bundle
+
+
+def _content_hash(content):
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def _invalid_bundle(reason):
+    raise exceptions.DSLParsingFormatException(
+        exceptions.ERROR_INVALID_BUNDLE,
+        'Invalid blueprint bundle: {0}'.format(reason))
@@ -14,7 +14,9 @@
 #    * limitations under the License.
 
 from dsl_parser import (constants,
-                        models)
+                        exceptions,
+                        models,
+                        version as dsl_version)
 from dsl_parser.elements import (imports,
                                  misc,
                                  plugins,
@@ -25,43 +27,9 @@ from dsl_parser.elements import (imports,
                                  policies,
                                  data_types,
                                  version as _version)
-from dsl_parser.framework.elements import Element
-from dsl_parser.framework.requirements import Value
-
-
-class BlueprintVersionExtractor(Element):
-
-    schema = {
-        'tosca_definitions_version': _version.ToscaDefinitionsVersion,
-        # here so it gets version validated
-        'dsl_definitions': misc.DSLDefinitions,
-    }
-    requires = {
-        _version.ToscaDefinitionsVersion: ['version',
-                                           Value('plan_version')]
-    }
-
-    def parse(self, version, plan_version):
-        return {
-            'version': version,
-            'plan_version': plan_version
-        }
-
-
-class BlueprintImporter(Element):
-
-    schema = {
-        'imports': imports.ImportsLoader,
-    }
-    requires = {
-        imports.ImportsLoader: ['resource_base']
-    }
-
-    def parse(self, resource_base):
-        return {
-            'merged_blueprint': self.child(imports.ImportsLoader).value,
-            'resource_base': resource_base
-        }
+from dsl_parser.framework.elements import (Element,
+                                           HolderLocation)
+from dsl_parser.framework.parser import validate_schema
 
 
 class Blueprint(Element):
@@ -115,3 +83,67 @@ class Blueprint(Element):
             constants.VERSION: self.child(
                 _version.ToscaDefinitionsVersion).value
         })
+
+
+def extract_version(blueprint_holder, validate_version):
+    """Validates the version related fields of the main blueprint.
+
+    Works directly on the main blueprint holder so the version is known
+    (and imports can be resolved) before the blueprint is parsed.
+
+    :return: the blueprint version (models.Version).
+    """
+    root_location = HolderLocation('root', blueprint_holder)
+    if blueprint_holder.value is None:
+        version_key_holder = version_holder = None
+    else:
+        if not isinstance(blueprint_holder.value, dict):
+            validate_schema(Blueprint, blueprint_holder.value, root_location,
+                            strict=False)
+        version_key_holder, version_holder = blueprint_holder.get_item(
+            dsl_version.VERSION)
+    version_location = HolderLocation(dsl_version.VERSION, version_holder,
+                                      version_key_holder)
+    raw_version = version_holder.value if version_holder else None
+    if raw_version is None:
+        ex = exceptions.DSLParsingLogicException(
+            27, '{0} field must appear in the main blueprint file'.format(
+                dsl_version.VERSION))
+        ex.element = version_location
+        raise ex
+    validate_schema(_version.ToscaDefinitionsVersion, raw_version,
+                    version_location)
+    try:
+        dsl_version.validate_dsl_version(raw_version)
+    except exceptions.DSLParsingException as e:
+        e.element = e.element or version_location
+        raise
+    version = dsl_version.parse_dsl_version(raw_version)
+
+    definitions_key_holder, definitions_holder = blueprint_holder.get_item(
+        constants.DSL_DEFINITIONS)
+    if definitions_holder is not None and \
+            definitions_holder.value is not None:
+        definitions_location = HolderLocation(constants.DSL_DEFINITIONS,
+                                              definitions_holder,
+                                              definitions_key_holder)
+        validate_schema(misc.DSLDefinitions, definitions_holder.restore(),
+                        definitions_location)
+        if validate_version and version < (1, 2):
+            ex = exceptions.DSLParsingLogicException(
+                exceptions.ERROR_CODE_DSL_DEFINITIONS_VERSION_MISMATCH,
+                '{0} not supported in version {1}, it was added in {2}'
+                .format(constants.DSL_DEFINITIONS,
+                        dsl_version.version_description(version),
+                        dsl_version.version_description((1, 2))))
+            ex.element = definitions_location
+            raise ex
+
+    # only the top level keys are needed to validate the blueprint is a
+    # dict with string keys (the rest of the schema is not strict here)
+    validate_schema(Blueprint,
+                    dict((key_holder.value, None)
+                         for key_holder in blueprint_holder.value),
+                    root_location,
+                    strict=False)
+    return models.Version(dsl_version.process_dsl_version(raw_version))
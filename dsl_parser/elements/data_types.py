@@ -26,6 +26,7 @@ from dsl_parser.framework.elements import (
 from dsl_parser.framework.requirements import (
     Value,
     Requirement,
+    KeyPredicate,
     sibling_predicate)
 
 
@@ -157,8 +158,9 @@ class DataType(types.Type):
             Requirement('component_types',
                         multiple_results=True,
                         required=False,
-                        predicate=lambda source, target:
-                            target.name in source.direct_component_types),
+                        predicate=KeyPredicate(
+                            source_keys=lambda source:
+                                source.direct_component_types)),
             Value('super_type',
                   predicate=types.derived_from_predicate,
                   required=False)
@@ -228,8 +230,7 @@ class DataTypes(types.Types):
 
 # source: element describing data_type name
 # target: data_type
-def _has_type(source, target):
-    return source.initial_value == target.name
+_has_type = KeyPredicate(source_keys=lambda source: [source.initial_value])
 
 
 SchemaPropertyType.requires[DataType] = [
@@ -13,18 +13,29 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
+import collections
+import hashlib
 import os
+import threading
+import time
 import urllib
+import weakref
 
 import networkx as nx
 
 from dsl_parser import (exceptions,
                         constants,
+                        holder,
+                        import_metrics,
                         version as _version,
                         utils)
 from dsl_parser.framework.elements import (Element,
+                                           HolderLocation,
                                            Leaf,
                                            List)
+from dsl_parser.framework.parser import validate_schema
+from dsl_parser.import_resolver.default_import_resolver import \
+    DefaultImportResolver
 
 
 MERGE_NO_OVERRIDE = set([
@@ -44,6 +55,20 @@ MERGEABLE_FROM_DSL_VERSION_1_3 = [
     constants.NODE_TEMPLATES
 ]
 
+# maximum number of imports fetched concurrently while resolving the
+# imports of a blueprint
+MAX_CONCURRENT_IMPORT_FETCHES = 10
+
+# maximum number of parsed imports kept in the process wide cache
+MAX_PARSED_IMPORTS_CACHE_SIZE = 100
+
+# seconds refreshed preloaded imports are served for after they were last
+# fetched (at least two refresh intervals), e.g. while refreshing fails
+DEFAULT_PRELOADED_IMPORTS_TTL = 600
+
+# ttl of preloaded imports when none is given (see ImportsPreloader)
+_DEFAULT_TTL = object()
+
 IGNORE = set([
     constants.DSL_DEFINITIONS,
     constants.IMPORTS,
@@ -61,59 +86,116 @@ class Imports(Element):
     schema = List(type=Import)
 
 
-class ImportLoader(Element):
-
-    schema = Leaf(type=str)
-
+def resolve_imports(blueprint_holder,
+                    blueprint_location,
+                    resources_base_url,
+                    version,
+                    resolver,
+                    validate_version,
+                    bundled_imports=None):
+    """Resolves the imports of the main blueprint and merges them.
 
-class ImportsLoader(Element):
+    Works directly on the main blueprint holder, the imports section is
+    validated without building an element tree for the blueprint.
 
-    schema = List(type=ImportLoader)
-    provides = ['resource_base']
-    requires = {
-        'inputs': ['main_blueprint_holder',
-                   'resources_base_url',
-                   'blueprint_location',
-                   'version',
-                   'resolver',
-                   'validate_version']
-    }
+    When parsing a bundle, bundled_imports maps the url of the blueprint
+    and of each of its imports to a dict with its 'content' and located
+    'imports' (see collect_imports), imports are then taken from it as
+    is, nothing is located or fetched.
 
+    :return: a (merged blueprint holder, resource base) tuple.
+    """
+    _validate_imports(blueprint_holder)
     resource_base = None
-
-    def validate(self, **kwargs):
-        imports = [i.value for i in self.children()]
-        imports_set = set()
-        for _import in imports:
-            if _import in imports_set:
-                raise exceptions.DSLParsingFormatException(
-                    2, 'Duplicate imports')
-            imports_set.add(_import)
-
-    def parse(self,
-              main_blueprint_holder,
-              resources_base_url,
-              blueprint_location,
-              version,
-              resolver,
-              validate_version):
-        if blueprint_location:
+    if blueprint_location:
+        if bundled_imports is None:
             blueprint_location = _dsl_location_to_url(
                 dsl_location=blueprint_location,
                 resources_base_url=resources_base_url)
-            slash_index = blueprint_location.rfind('/')
-            self.resource_base = blueprint_location[:slash_index]
-        return _combine_imports(parsed_dsl_holder=main_blueprint_holder,
-                                dsl_location=blueprint_location,
-                                resources_base_url=resources_base_url,
-                                version=version,
-                                resolver=resolver,
-                                validate_version=validate_version)
-
-    def calculate_provided(self, **kwargs):
-        return {
-            'resource_base': self.resource_base
-        }
+        slash_index = blueprint_location.rfind('/')
+        resource_base = blueprint_location[:slash_index]
+    metrics = import_metrics.parse_metrics()
+    if bundled_imports is None:
+        loader = _ImportsLoader(resolver,
+                                resources_base_url,
+                                MAX_CONCURRENT_IMPORT_FETCHES,
+                                metrics=metrics)
+    else:
+        loader = _BundledImportsLoader(bundled_imports, metrics=metrics)
+    try:
+        merged_blueprint_holder = _combine_imports(
+            parsed_dsl_holder=blueprint_holder,
+            dsl_location=blueprint_location,
+            version=version,
+            loader=loader,
+            validate_version=validate_version,
+            metrics=metrics)
+    finally:
+        import_metrics.parse_done(metrics)
+    return merged_blueprint_holder, resource_base
+
+
+def collect_imports(blueprint_holder,
+                    blueprint_location,
+                    resources_base_url,
+                    resolver):
+    """Resolves the imports of the main blueprint, without merging them.
+
+    :return: a (blueprint url, blueprint imports, imported) tuple. The
+             located imports of a file are a list of [import, url] pairs,
+             imported lists a dict with the 'url', 'content' and located
+             'imports' of each of the (transitive) imports, in the order
+             they are merged in.
+    """
+    _validate_imports(blueprint_holder)
+    if blueprint_location:
+        blueprint_location = _dsl_location_to_url(
+            dsl_location=blueprint_location,
+            resources_base_url=resources_base_url)
+    loader = _ImportsLoader(resolver,
+                            resources_base_url,
+                            MAX_CONCURRENT_IMPORT_FETCHES,
+                            keep_contents=True)
+    ordered_imports = _build_ordered_imports(blueprint_holder,
+                                             blueprint_location,
+                                             loader)
+
+    def located_imports(current_import):
+        return [[another_import, import_url] for another_import, import_url
+                in loader.located_imports(current_import)]
+    imported = [{'url': i['import'],
+                 'content': loader.contents[i['import']],
+                 'imports': located_imports(i['import'])}
+                for i in ordered_imports
+                if i['parsed'] is not blueprint_holder]
+    return (blueprint_location,
+            located_imports(blueprint_location),
+            imported)
+
+
+def _validate_imports(blueprint_holder):
+    imports_key_holder, imports_holder = blueprint_holder.get_item(
+        constants.IMPORTS)
+    if imports_holder is None or imports_holder.value is None:
+        return
+    location = HolderLocation(constants.IMPORTS, imports_holder,
+                              imports_key_holder)
+    if isinstance(imports_holder.value, list):
+        for index, import_holder in enumerate(imports_holder.value):
+            if import_holder.value is None:
+                continue
+            validate_schema(
+                Import, import_holder.value,
+                HolderLocation('{0}.{1}'.format(constants.IMPORTS, index),
+                               import_holder))
+    validate_schema(Imports, imports_holder.restore(), location)
+    imports_set = set()
+    for _import in imports_holder.restore():
+        if _import in imports_set:
+            ex = exceptions.DSLParsingFormatException(2, 'Duplicate imports')
+            ex.element = location
+            raise ex
+        imports_set.add(_import)
 
 
 def _dsl_location_to_url(dsl_location, resources_base_url):
@@ -133,7 +215,8 @@ def _dsl_location_to_url(dsl_location, resources_base_url):
 
 def _get_resource_location(resource_name,
                            resources_base_url,
-                           current_resource_context=None):
+                           current_resource_context=None,
+                           url_exists=None):
     url_parts = resource_name.split(':')
     if url_parts[0] in ['http', 'https', 'file', 'ftp']:
         return resource_name
@@ -145,7 +228,8 @@ def _get_resource_location(resource_name,
     if current_resource_context:
         candidate_url = current_resource_context[
             :current_resource_context.rfind('/') + 1] + resource_name
-        if utils.url_exists(candidate_url):
+        url_exists = url_exists or utils.url_exists
+        if url_exists(candidate_url):
             return candidate_url
 
     if resources_base_url:
@@ -155,32 +239,34 @@ def _get_resource_location(resource_name,
 
 
 def _combine_imports(parsed_dsl_holder, dsl_location,
-                     resources_base_url, version, resolver,
-                     validate_version):
+                     version, loader, validate_version, metrics=None):
     ordered_imports = _build_ordered_imports(parsed_dsl_holder,
                                              dsl_location,
-                                             resources_base_url,
-                                             resolver)
+                                             loader)
     holder_result = parsed_dsl_holder.copy()
     version_key_holder, version_value_holder = parsed_dsl_holder.get_item(
         _version.VERSION)
-    holder_result.value = {}
+    holder_result.value = holder.HolderDict()
     for imported in ordered_imports:
         import_url = imported['import']
         parsed_imported_dsl_holder = imported['parsed']
         if validate_version:
             _validate_version(version.raw, import_url,
                               parsed_imported_dsl_holder)
-        _merge_parsed_into_combined(
-            holder_result, parsed_imported_dsl_holder, version)
+        record = None
+        if metrics is not None and \
+                parsed_imported_dsl_holder is not parsed_dsl_holder:
+            record = metrics.record_for(import_url)
+        with import_metrics.measure(record, 'merge_time'):
+            _merge_parsed_into_combined(
+                holder_result, parsed_imported_dsl_holder, version)
     holder_result.value[version_key_holder] = version_value_holder
     return holder_result
 
 
 def _build_ordered_imports(parsed_dsl_holder,
                            dsl_location,
-                           resources_base_url,
-                           resolver):
+                           loader):
 
     def location(value):
         return value or 'root'
@@ -190,15 +276,16 @@ def _build_ordered_imports(parsed_dsl_holder,
 
     def _build_ordered_imports_recursive(_current_parsed_dsl_holder,
                                          _current_import):
-        imports_key_holder, imports_value_holder = _current_parsed_dsl_holder.\
-            get_item(constants.IMPORTS)
-        if not imports_value_holder:
-            return
-
-        for another_import in imports_value_holder.restore():
-            import_url = _get_resource_location(another_import,
-                                                resources_base_url,
-                                                _current_import)
+        imports = loader.locate_imports(_current_parsed_dsl_holder,
+                                        _current_import)
+        # start loading all the imports of this level (and the imports
+        # they import), they are still added to the graph and traversed
+        # one by one, in order
+        loader.prefetch((another_import, import_url)
+                        for another_import, import_url in imports
+                        if import_url is not None and
+                        import_url not in imports_graph)
+        for another_import, import_url in imports:
             if import_url is None:
                 ex = exceptions.DSLParsingLogicException(
                     13, "Import failed: no suitable location found for "
@@ -209,20 +296,419 @@ def _build_ordered_imports(parsed_dsl_holder,
                 imports_graph.add_graph_dependency(import_url,
                                                    location(_current_import))
             else:
-                raw_imported_dsl = resolver.fetch_import(import_url)
-                imported_dsl_holder = utils.load_yaml(
-                    raw_yaml=raw_imported_dsl,
-                    error_message="Failed to parse import '{0}' (via '{1}')"
-                                  .format(another_import, import_url),
-                    filename=another_import)
+                imported_dsl_holder = loader.load(another_import, import_url)
                 imports_graph.add(import_url, imported_dsl_holder,
                                   location(_current_import))
                 _build_ordered_imports_recursive(imported_dsl_holder,
                                                  import_url)
-    _build_ordered_imports_recursive(parsed_dsl_holder, dsl_location)
+    try:
+        _build_ordered_imports_recursive(parsed_dsl_holder, dsl_location)
+    finally:
+        loader.close()
     return imports_graph.topological_sort()
 
 
+class _ImportsLoader(object):
+    """Fetches and loads imports, concurrently when prefetched.
+
+    Imports are fetched with the resolver's fetch_import_async. Prefetched
+    imports are queued and their fetches are started ahead of the import
+    traversal. Along with the fetch the traversal waits for, at most
+    max_workers fetches are in flight: a queued fetch is started once the
+    traversal picks up one that was started earlier. Imports are loaded
+    by the traversal, in order, and the imports they import are then
+    prefetched in turn.
+
+    Each url is fetched at most once per parse: locating a relative import
+    fetches the candidate url and the content is kept for loading it.
+    """
+
+    def __init__(self, resolver, resources_base_url, max_workers,
+                 keep_contents=False, metrics=None):
+        self._resolver = resolver
+        self._metrics = metrics
+        self._resources_base_url = resources_base_url
+        self._max_workers = max_workers
+        # url -> fetched content, when kept (e.g. to write a bundle)
+        self.contents = {} if keep_contents else None
+        self._closed = False
+        # prefetched urls whose fetch is not started yet
+        self._queued = collections.deque()
+        # prefetched urls whose fetch is started but not yet waited for
+        self._started = set()
+        # import url -> its located imports, locating may require probing
+        # urls so it is only done once per import
+        self._located_imports = {}
+        # url -> async result of its content
+        self._fetches = {}
+
+    def locate_imports(self, parsed_dsl_holder, current_import):
+        """Returns the (import, import url) pairs of an imported file,
+        the url is None if no suitable location was found for it."""
+        located_imports = self._located_imports.get(current_import)
+        if located_imports is not None:
+            return located_imports
+        imports_key_holder, imports_value_holder = parsed_dsl_holder.\
+            get_item(constants.IMPORTS)
+        if not imports_value_holder:
+            located_imports = []
+        else:
+            located_imports = [
+                (another_import,
+                 _get_resource_location(another_import,
+                                        self._resources_base_url,
+                                        current_import,
+                                        url_exists=self._url_exists))
+                for another_import in imports_value_holder.restore()]
+        self._located_imports[current_import] = located_imports
+        return located_imports
+
+    def located_imports(self, current_import):
+        return self._located_imports.get(current_import, [])
+
+    def prefetch(self, imports):
+        if self._closed or self._max_workers < 2:
+            return
+        for another_import, import_url in imports:
+            if import_url not in self._fetches and \
+                    import_url not in self._queued:
+                self._queued.append(import_url)
+        self._start_queued()
+
+    def load(self, another_import, import_url):
+        raw_imported_dsl = self._fetch(import_url)
+        return self._load_yaml(another_import, import_url, raw_imported_dsl)
+
+    def close(self):
+        # fetches that are still running (e.g. when traversal failed) are
+        # not waited for
+        self._closed = True
+        self._queued.clear()
+        self._started.clear()
+        self._fetches = {}
+
+    def _start_queued(self):
+        # one of the workers is the fetch the traversal waits for
+        while self._queued and len(self._started) < self._max_workers - 1:
+            import_url = self._queued.popleft()
+            if import_url not in self._fetches:
+                self._start_fetch(import_url)
+                self._started.add(import_url)
+
+    def _fetch(self, import_url):
+        fetch = self._start_fetch(import_url)
+        self._started.discard(import_url)
+        self._start_queued()
+        content = fetch.get()
+        if self.contents is not None:
+            self.contents[import_url] = content
+        return content
+
+    def _start_fetch(self, import_url):
+        """Starts fetching import_url through the resolver's
+        fetch_import_async, unless it was already started. Returns the
+        async result of its content."""
+        fetch = self._fetches.get(import_url)
+        if fetch is not None:
+            return fetch
+        content = preloaded_imports.get(self._resolver, import_url)
+        if content is not None:
+            fetch = _Fetched(content)
+        else:
+            record = self._record(import_url)
+            with import_metrics.recording(record):
+                fetch = self._resolver.fetch_import_async(
+                    import_url,
+                    callback=import_metrics.stopwatch(record, 'fetch_time'))
+        if not self._closed:
+            self._fetches[import_url] = fetch
+        return fetch
+
+    def _url_exists(self, url):
+        try:
+            self._fetch(url)
+            return True
+        except Exception:
+            # any failure to fetch a candidate (not only the resolver's
+            # parsing errors) means it is not there
+            return False
+
+    def _load_yaml(self, another_import, import_url, raw_imported_dsl):
+        with import_metrics.measure(
+                self._record(import_url, another_import), 'load_time'):
+            return parsed_imports_cache.load(another_import, import_url,
+                                             raw_imported_dsl)
+
+    def _record(self, import_url, another_import=None):
+        if self._metrics is None:
+            return None
+        return self._metrics.record_for(import_url, another_import)
+
+
+class _BundledImportsLoader(object):
+    """Loads imports from the entries of a bundle, no I/O is done."""
+
+    def __init__(self, bundled_imports, metrics=None):
+        self._bundled_imports = bundled_imports
+        self._metrics = metrics
+
+    def locate_imports(self, parsed_dsl_holder, current_import):
+        return [tuple(located_import) for located_import in
+                self._bundled_imports[current_import]['imports']]
+
+    def prefetch(self, imports):
+        pass
+
+    def load(self, another_import, import_url):
+        record = None
+        if self._metrics is not None:
+            record = self._metrics.record_for(import_url, another_import)
+        with import_metrics.measure(record, 'load_time'):
+            return parsed_imports_cache.load(
+                another_import, import_url,
+                self._bundled_imports[import_url]['content'])
+
+    def close(self):
+        pass
+
+
+class _Fetched(object):
+    """Content that is already available, in place of an AsyncResult."""
+
+    def __init__(self, content):
+        self._content = content
+
+    def get(self):
+        return self._content
+
+
+class ParsedImportsCache(object):
+    """An LRU cache of loaded imports, shared by the parses of a process.
+
+    Entries are keyed by the import url, the import as written (the holder
+    marks refer to it) and a hash of the import content, so a changed
+    import is loaded again. Merging imports modifies the top level dict
+    of the imported holder and the dicts of its sections, hence load()
+    returns a view with its own copies of these dicts, the cached holder
+    itself is never handed out.
+    """
+
+    def __init__(self, max_size=MAX_PARSED_IMPORTS_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, another_import, import_url, raw_imported_dsl):
+        key = (import_url, another_import, _content_hash(raw_imported_dsl))
+        with self._lock:
+            parsed = self._entries.pop(key, None)
+            if parsed is not None:
+                self._entries[key] = parsed
+                self.hits += 1
+            else:
+                self.misses += 1
+        import_metrics.record(parse_cache_hit=parsed is not None)
+        if parsed is None:
+            parsed = utils.load_yaml(
+                raw_yaml=raw_imported_dsl,
+                error_message="Failed to parse import '{0}' (via '{1}')"
+                              .format(another_import, import_url),
+                filename=another_import)
+            with self._lock:
+                self._entries[key] = parsed
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return _isolated_view(parsed)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_size': self.max_size
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+parsed_imports_cache = ParsedImportsCache()
+
+
+def _content_hash(raw_imported_dsl):
+    if isinstance(raw_imported_dsl, unicode):
+        raw_imported_dsl = raw_imported_dsl.encode('utf-8')
+    return hashlib.sha1(raw_imported_dsl).hexdigest()
+
+
+def _isolated_view(parsed_holder):
+    view = parsed_holder.copy()
+    if not isinstance(parsed_holder.value, dict):
+        return view
+    view.value = holder.HolderDict()
+    for key_holder, value_holder in parsed_holder.value.iteritems():
+        section = value_holder.copy()
+        if isinstance(value_holder.value, dict):
+            section.value = holder.HolderDict(value_holder.value)
+        view.value[key_holder] = section
+    return view
+
+
+class ImportsPreloader(object):
+    """Preloads imports, e.g. the ones most blueprints import, at startup.
+
+    Each url is fetched with the resolver's fetch_import_async and loaded
+    into the parsed imports cache (keyed by the url, as imported by url).
+    Parses then use the preloaded content instead of fetching the url if
+    they resolve imports the same way: with the same resolver or, for
+    DefaultImportResolver (the one parses create when none is given),
+    with a default resolver with the same rules. Parses with other
+    resolvers are not affected.
+
+    With a refresh interval (seconds), the urls are fetched again in a
+    background thread every interval, a url that fails to be fetched keeps
+    its previous content (until it expires) and the error is kept in
+    ``errors``. Preloaded content expires ``ttl`` seconds after it was
+    fetched (None for never), expired urls are fetched by the parses as
+    usual. By default, preloaded content that is not refreshed never
+    expires, refreshed content expires after DEFAULT_PRELOADED_IMPORTS_TTL
+    seconds or two refresh intervals, whichever is longer.
+    """
+
+    def __init__(self,
+                 import_urls,
+                 resolver=None,
+                 refresh_interval=None,
+                 ttl=_DEFAULT_TTL):
+        self.import_urls = list(import_urls)
+        self.resolver = resolver or DefaultImportResolver()
+        self.refresh_interval = refresh_interval
+        if ttl is _DEFAULT_TTL:
+            ttl = max(DEFAULT_PRELOADED_IMPORTS_TTL,
+                      2 * refresh_interval) if refresh_interval else None
+        self.ttl = ttl
+        self.errors = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Preloads the imports (waiting for them) and starts refreshing
+        them if needed."""
+        self.load()
+        if self.refresh_interval and self._thread is None:
+            self._thread = threading.Thread(target=self._refresh)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops refreshing, preloaded imports stay preloaded."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def load(self):
+        results = [(import_url,
+                    self.resolver.fetch_import_async(import_url))
+                   for import_url in self.import_urls]
+        for import_url, result in results:
+            try:
+                content = result.get()
+                parsed_imports_cache.load(import_url, import_url, content)
+            except Exception as e:
+                self.errors[import_url] = e
+                continue
+            self.errors.pop(import_url, None)
+            preloaded_imports.put(self.resolver, import_url, content,
+                                  ttl=self.ttl)
+
+    def _refresh(self):
+        while not self._stopped.wait(self.refresh_interval):
+            self.load()
+
+
+class PreloadedImports(object):
+    """The contents of preloaded imports, by resolver and url.
+
+    Entries are only served to parses that resolve imports the same way as
+    the resolver they were fetched with (see _resolver_key), until they
+    expire. Resolvers other than default ones are weakly referenced.
+    """
+
+    def __init__(self):
+        self._by_resolver = weakref.WeakKeyDictionary()
+        self._by_rules = {}
+        self._lock = threading.Lock()
+
+    def get(self, resolver, import_url):
+        key = _resolver_key(resolver)
+        with self._lock:
+            contents = self._by_resolver.get(resolver) if key is None \
+                else self._by_rules.get(key)
+            entry = (contents or {}).get(import_url)
+        if entry is None:
+            return None
+        content, expires_at = entry
+        if expires_at is not None and time.time() >= expires_at:
+            return None
+        return content
+
+    def put(self, resolver, import_url, content, ttl=None):
+        expires_at = None if ttl is None else time.time() + ttl
+        key = _resolver_key(resolver)
+        with self._lock:
+            if key is None:
+                contents = self._by_resolver.setdefault(resolver, {})
+            else:
+                contents = self._by_rules.setdefault(key, {})
+            contents[import_url] = (content, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._by_resolver.clear()
+            self._by_rules.clear()
+
+
+def _resolver_key(resolver):
+    """Returns the rules of a default resolver (as a hashable key), None
+    for other resolvers. Default resolvers with the same rules resolve
+    imports the same way, so the resolver a parse creates when none is
+    given is served the imports preloaded with another default resolver.
+    """
+    if type(resolver) is not DefaultImportResolver:
+        return None
+    return tuple(tuple(sorted(rule.items())) for rule in resolver.rules)
+
+
+preloaded_imports = PreloadedImports()
+
+
+def preload_imports(import_urls,
+                    resolver=None,
+                    refresh_interval=None,
+                    ttl=_DEFAULT_TTL):
+    """Preloads import_urls, see ImportsPreloader.
+
+    Only parses that resolve imports like resolver use the preloaded
+    imports: parses given the same resolver or, when resolver is None or
+    a DefaultImportResolver, parses given no resolver or a default one
+    with the same rules.
+
+    :return: the started preloader, stop() stops refreshing.
+    """
+    return ImportsPreloader(import_urls,
+                            resolver=resolver,
+                            refresh_interval=refresh_interval,
+                            ttl=ttl).start()
+
+
 def _validate_version(dsl_version,
                       import_url,
                       parsed_imported_dsl_holder):
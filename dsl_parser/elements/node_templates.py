@@ -13,8 +13,6 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
-import copy
-
 from dsl_parser import (exceptions,
                         utils,
                         constants)
@@ -26,7 +24,11 @@ from dsl_parser.elements import (node_types as _node_types,
                                  data_types as _data_types,
                                  scalable,
                                  version as _version)
-from dsl_parser.framework.requirements import Value, Requirement
+from dsl_parser.framework import profiling
+from dsl_parser.framework.requirements import (Value,
+                                               Requirement,
+                                               KeyPredicate,
+                                               sibling_predicate)
 from dsl_parser.framework.elements import (DictElement,
                                            Element,
                                            Leaf,
@@ -55,14 +57,14 @@ class NodeTemplateProperties(Element):
 
     schema = Leaf(type=dict)
     requires = {
-        NodeTemplateType: [],
+        NodeTemplateType: [Value('node_type_name',
+                                 predicate=sibling_predicate)],
         _node_types.NodeTypes: [Value('node_types')],
         _data_types.DataTypes: [Value('data_types')]
     }
 
-    def parse(self, node_types, data_types):
+    def parse(self, node_type_name, node_types, data_types):
         properties = self.initial_value or {}
-        node_type_name = self.sibling(NodeTemplateType).value
         node_type = node_types[node_type_name]
         return utils.merge_schema_and_instance_properties(
             instance_properties=properties,
@@ -123,14 +125,13 @@ class NodeTemplateRelationshipProperties(Element):
 
     schema = Leaf(type=dict)
     requires = {
-        NodeTemplateRelationshipType: [],
+        NodeTemplateRelationshipType: [Value('relationship_type_name',
+                                             predicate=sibling_predicate)],
         _relationships.Relationships: [Value('relationships')],
         _data_types.DataTypes: [Value('data_types')]
     }
 
-    def parse(self, relationships, data_types):
-        relationship_type_name = self.sibling(
-            NodeTemplateRelationshipType).value
+    def parse(self, relationship_type_name, relationships, data_types):
         properties = self.initial_value or {}
         return utils.merge_schema_and_instance_properties(
             instance_properties=properties,
@@ -182,8 +183,13 @@ class NodeTemplateCapabilitiesScalable(DictElement):
             }
 
 
-def _instances_predicate(source, target):
-    return source.ancestor(NodeTemplate) is target.ancestor(NodeTemplate)
+def _node_template(element):
+    return element.ancestor(NodeTemplate)
+
+
+_instances_predicate = KeyPredicate(
+    source_keys=lambda source: [_node_template(source)],
+    target_key=_node_template)
 
 
 class NodeTemplateCapabilities(DictElement):
@@ -227,12 +233,17 @@ class NodeTemplateCapabilities(DictElement):
             }
 
 
-def _node_template_relationship_type_predicate(source, target):
-    try:
-        return (source.child(NodeTemplateRelationshipType).initial_value ==
-                target.name)
-    except exceptions.DSLParsingElementMatchException:
-        return False
+def _child_initial_value(element_type):
+    def source_keys(source):
+        try:
+            return [source.child(element_type).initial_value]
+        except exceptions.DSLParsingElementMatchException:
+            return []
+    return source_keys
+
+
+_node_template_relationship_type_predicate = KeyPredicate(
+    source_keys=_child_initial_value(NodeTemplateRelationshipType))
 
 
 class NodeTemplateRelationship(Element):
@@ -313,20 +324,17 @@ class NodeTemplateRelationships(Element):
         }
 
 
-def _node_template_related_nodes_predicate(source, target):
-    if source.name == target.name:
-        return False
+def _relationship_targets(source):
     targets = source.descendants(NodeTemplateRelationshipTarget)
-    relationship_targets = [e.initial_value for e in targets]
-    return target.name in relationship_targets
+    return [e.initial_value for e in targets
+            if e.initial_value != source.name]
+
 
+_node_template_related_nodes_predicate = KeyPredicate(
+    source_keys=_relationship_targets)
 
-def _node_template_node_type_predicate(source, target):
-    try:
-        return (source.child(NodeTemplateType).initial_value ==
-                target.name)
-    except exceptions.DSLParsingElementMatchException:
-        return False
+_node_template_node_type_predicate = KeyPredicate(
+    source_keys=_child_initial_value(NodeTemplateType))
 
 
 class NodeTemplate(Element):
@@ -401,6 +409,11 @@ def _post_process_node_relationships(processed_node,
                                      node_name_to_node,
                                      plugins,
                                      resource_base):
+    # relationships are shared with the NodeTemplateRelationships element
+    # value, copy them as their operations are added in place
+    processed_node[constants.RELATIONSHIPS] = [
+        dict(relationship)
+        for relationship in processed_node[constants.RELATIONSHIPS]]
     for relationship in processed_node[constants.RELATIONSHIPS]:
         target_node = node_name_to_node[relationship['target_id']]
         _process_node_relationships_operations(
@@ -485,7 +498,7 @@ class NodeTemplates(Element):
     ]
 
     def parse(self, host_types, plugins):
-        processed_nodes = dict((node.name, node.value)
+        processed_nodes = dict((node.name, dict(node.value))
                                for node in self.children())
         _process_nodes_plugins(
             processed_nodes=processed_nodes,
@@ -566,7 +579,7 @@ def _get_plugins_from_operations(operations_lists,
             operation_executor = operation['executor']
             plugin_key = (plugin_name, operation_executor)
             if plugin_key not in plugins:
-                plugin = copy.deepcopy(plugin)
+                plugin = profiling.deepcopy(plugin)
                 plugin['executor'] = operation_executor
                 plugins[plugin_key] = plugin
     return plugins.values()
@@ -13,13 +13,12 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
-import copy
-
 from dsl_parser import (constants,
                         exceptions,
                         utils)
 from dsl_parser.elements import (data_types,
                                  version as _version)
+from dsl_parser.framework import profiling
 from dsl_parser.framework.elements import (DictElement,
                                            Element,
                                            Leaf,
@@ -241,7 +240,7 @@ def process_operation(
                 retry_interval=operation_retry_interval)
     elif resource_bases and _resource_exists(resource_bases,
                                              operation_mapping):
-        operation_payload = copy.deepcopy(operation_payload or {})
+        operation_payload = profiling.deepcopy(operation_payload or {})
         if constants.SCRIPT_PATH_PROPERTY in operation_payload:
             message = "Cannot define '{0}' property in '{1}' for {2} '{3}'" \
                 .format(constants.SCRIPT_PATH_PROPERTY,
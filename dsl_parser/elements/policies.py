@@ -24,7 +24,7 @@ from dsl_parser.elements import (node_templates as _node_templates,
                                  data_types,
                                  scalable,
                                  version as _version)
-from dsl_parser.framework.requirements import Value
+from dsl_parser.framework.requirements import Value, sibling_predicate
 from dsl_parser.framework.elements import (DictElement,
                                            Element,
                                            Leaf,
@@ -93,13 +93,14 @@ class GroupPolicyProperties(Element):
 
     schema = Leaf(type=dict)
     requires = {
-        GroupPolicyType: [],
+        GroupPolicyType: [Value('policy_type_name',
+                                predicate=sibling_predicate)],
         PolicyTypes: [Value('policy_types')],
         data_types.DataTypes: [Value('data_types')]
     }
 
-    def parse(self, policy_types, data_types):
-        policy_type = policy_types[self.sibling(GroupPolicyType).value]
+    def parse(self, policy_type_name, policy_types, data_types):
+        policy_type = policy_types[policy_type_name]
         policy_type_properties = policy_type.get('properties', {})
         return utils.merge_schema_and_instance_properties(
             self.initial_value or {},
@@ -140,14 +141,14 @@ class GroupPolicyTriggerParameters(Element):
 
     schema = Leaf(type=dict)
     requires = {
-        GroupPolicyTriggerType: [],
+        GroupPolicyTriggerType: [Value('trigger_type_name',
+                                       predicate=sibling_predicate)],
         PolicyTriggers: [Value('policy_triggers')],
         data_types.DataTypes: [Value('data_types')]
     }
 
-    def parse(self, policy_triggers, data_types):
-        trigger_type = policy_triggers[
-            self.sibling(GroupPolicyTriggerType).value]
+    def parse(self, trigger_type_name, policy_triggers, data_types):
+        trigger_type = policy_triggers[trigger_type_name]
         policy_trigger_parameters = trigger_type.get('parameters', {})
         return utils.merge_schema_and_instance_properties(
             self.initial_value or {},
@@ -345,7 +346,8 @@ class Policies(DictElement):
             for target in policy['targets']:
                 group = groups[target]
                 scaling_groups[target] = {
-                    'members': group['members'],
+                    # copied, contained members are removed from it later
+                    'members': list(group['members']),
                     'properties': properties
                 }
         return scaling_groups
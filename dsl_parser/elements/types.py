@@ -17,6 +17,7 @@ from dsl_parser import exceptions
 from dsl_parser.framework.elements import (DictElement,
                                            Element,
                                            Leaf)
+from dsl_parser.framework.requirements import KeyPredicate
 
 
 class Types(DictElement):
@@ -35,8 +36,10 @@ class Type(Element):
 
     @staticmethod
     def fix_properties(value):
-        for key, value in value['properties'].iteritems():
-            value.pop('initial_default', None)
+        value['properties'] = dict(
+            (key, dict((k, v) for k, v in prop.iteritems()
+                       if k != 'initial_default'))
+            for key, prop in value['properties'].iteritems())
 
 
 class DerivedFrom(Element):
@@ -73,9 +76,12 @@ class DataTypeDerivedFrom(DerivedFrom):
     descriptor = 'data type'
 
 
-def derived_from_predicate(source, target):
+def _derived_from(source):
     try:
         derived_from = source.child(DerivedFrom).initial_value
-        return derived_from and derived_from == target.name
     except exceptions.DSLParsingElementMatchException:
-        return False
+        return []
+    return [derived_from] if derived_from else []
+
+
+derived_from_predicate = KeyPredicate(source_keys=_derived_from)
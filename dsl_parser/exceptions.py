@@ -111,3 +111,4 @@ ERROR_INVALID_LITERAL_INSTANCES = 208
 ERROR_INSTANCES_DEPLOY_AND_CAPABILITIES = 209
 ERROR_INVALID_DICT_VALUE = 210
 ERROR_GROUP_AND_NODE_TEMPLATE_SAME_NAME = 211
+ERROR_INVALID_BUNDLE = 300
@@ -13,10 +13,10 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
-import copy
 from StringIO import StringIO
 
 from dsl_parser import exceptions
+from dsl_parser import frozen
 from dsl_parser import holder
 from dsl_parser import version as _version
 
@@ -46,6 +46,49 @@ class List(ElementType):
     pass
 
 
+def _describe_location(location):
+    message = StringIO()
+    if location.filename:
+        message.write('\n  in: {0}'.format(location.filename))
+    if location.name_start_line >= 0:
+        message.write('\n  in line: {0}, column: {1}'
+                      .format(location.name_start_line + 1,
+                              location.name_start_column))
+    elif location.start_line >= 0:
+        message.write('\n  in line {0}, column {1}'
+                      .format(location.start_line + 1,
+                              location.start_column))
+    message.write('\n  path: {0}'.format(location.path))
+    message.write('\n  value: {0}'.format(location.initial_value))
+    return message.getvalue()
+
+
+class HolderLocation(object):
+    """Describes the location of a value holder in error messages.
+
+    Used as the element of errors raised while processing parts of a
+    document that are not parsed into elements.
+    """
+
+    def __init__(self, path, value_holder, name_holder=None):
+        value_holder = holder.Holder.of(value_holder)
+        name_holder = holder.Holder.of(name_holder)
+        self.path = path
+        self.value_holder = value_holder
+        self.filename = value_holder.filename
+        self.start_line = value_holder.start_line
+        self.start_column = value_holder.start_column
+        self.name_start_line = name_holder.start_line
+        self.name_start_column = name_holder.start_column
+
+    @property
+    def initial_value(self):
+        return self.value_holder.restore()
+
+    def __str__(self):
+        return _describe_location(self)
+
+
 class Element(object):
 
     schema = None
@@ -57,7 +100,7 @@ class Element(object):
         self.context = context
         initial_value = holder.Holder.of(initial_value)
         self.initial_value_holder = initial_value
-        self._initial_value = initial_value.restore()
+        self._initial_value = context.restore(initial_value)
         self.start_line = initial_value.start_line
         self.start_column = initial_value.start_column
         self.end_line = initial_value.end_line
@@ -73,20 +116,7 @@ class Element(object):
         self._provided = None
 
     def __str__(self):
-        message = StringIO()
-        if self.filename:
-            message.write('\n  in: {0}'.format(self.filename))
-        if self.name_start_line >= 0:
-            message.write('\n  in line: {0}, column: {1}'
-                          .format(self.name_start_line + 1,
-                                  self.name_start_column))
-        elif self.start_line >= 0:
-            message.write('\n  in line {0}, column {1}'
-                          .format(self.start_line + 1, self.start_column))
-        message.write('\n  path: {0}'.format(self.path))
-        message.write('\n  value: {0}'.format(self._initial_value))
-
-        return message.getvalue()
+        return _describe_location(self)
 
     def validate(self, **kwargs):
         pass
@@ -99,9 +129,13 @@ class Element(object):
         """Alias name for list based elements"""
         return self.name
 
+    # initial_value, value and provided are frozen (see dsl_parser.frozen)
+    # and shared with other elements, they are returned without copying.
+    # Code that needs to modify them should work on a copy.deepcopy().
+
     @property
     def initial_value(self):
-        return copy.deepcopy(self._initial_value)
+        return self._initial_value
 
     @property
     def value(self):
@@ -109,22 +143,22 @@ class Element(object):
             raise exceptions.DSLParsingSchemaAPIException(
                 exceptions.ERROR_CODE_ILLEGAL_VALUE_ACCESS,
                 'Cannot access element value before parsing')
-        return copy.deepcopy(self._parsed_value)
+        return self._parsed_value
 
     @value.setter
     def value(self, val):
-        self._parsed_value = val
+        self._parsed_value = frozen.freeze(val)
 
     def calculate_provided(self, **kwargs):
         return {}
 
     @property
     def provided(self):
-        return copy.deepcopy(self._provided)
+        return self._provided
 
     @provided.setter
     def provided(self, value):
-        self._provided = value
+        self._provided = frozen.freeze(value)
 
     @property
     def path(self):
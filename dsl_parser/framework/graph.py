@@ -0,0 +1,101 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+
+class CycleDetected(Exception):
+
+    def __init__(self, cycle):
+        super(CycleDetected, self).__init__(
+            'Graph contains a cycle: {0}'.format(cycle))
+        self.cycle = cycle
+
+
+class DependencyGraph(object):
+    """A minimal directed graph used to order element processing.
+
+    An edge (u, v) means u has to be processed before v. Nodes and edges
+    are kept in insertion order so the topological sort is deterministic.
+    """
+
+    def __init__(self):
+        self._successors = {}
+        self._nodes = []
+        self._edges = set()
+
+    def add_node(self, node):
+        if node not in self._successors:
+            self._successors[node] = []
+            self._nodes.append(node)
+
+    def add_edge(self, u, v):
+        if (u, v) in self._edges:
+            return
+        self.add_node(u)
+        self.add_node(v)
+        self._edges.add((u, v))
+        self._successors[u].append(v)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def nodes(self):
+        return list(self._nodes)
+
+    def successors(self, node):
+        return self._successors[node]
+
+    def topological_sort(self):
+        """Returns the nodes such that u comes before v for each edge (u, v).
+
+        This is the depth first search based sort of networkx 1.x (the
+        order nodes are reached in is the same), using an explicit path so
+        that a cycle can be reported when found.
+
+        :raises CycleDetected: if the graph contains a cycle.
+        """
+        successors = self._successors
+        order = []
+        explored = set()
+        for node in self._nodes:
+            if node in explored:
+                continue
+            path = [node]
+            on_path = set(path)
+            # successors are visited last first, like networkx does when
+            # pushing all of them on its fringe
+            pending = [list(successors[node])]
+            while path:
+                candidates = pending[-1]
+                next_node = None
+                while candidates:
+                    candidate = candidates.pop()
+                    if candidate in on_path:
+                        raise CycleDetected(
+                            path[path.index(candidate):])
+                    if candidate not in explored:
+                        next_node = candidate
+                        break
+                if next_node is None:
+                    done = path.pop()
+                    on_path.discard(done)
+                    pending.pop()
+                    explored.add(done)
+                    order.append(done)
+                else:
+                    path.append(next_node)
+                    on_path.add(next_node)
+                    pending.append(list(successors[next_node]))
+        order.reverse()
+        return order
@@ -13,15 +13,24 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
-import networkx as nx
+import weakref
 
-from dsl_parser import exceptions
-from dsl_parser.framework import elements
-from dsl_parser.framework.requirements import Requirement
+from dsl_parser import (exceptions,
+                        frozen)
+from dsl_parser.framework import (elements,
+                                  graph,
+                                  profiling)
+from dsl_parser.framework.requirements import (Requirement,
+                                               KeyPredicate)
 
 
 class SchemaAPIValidator(object):
 
+    def __init__(self):
+        # element classes whose schema was already validated, mapped to
+        # the validated schema (so reassigning a schema is noticed)
+        self._validated = weakref.WeakKeyDictionary()
+
     def validate(self, element_cls):
         self._traverse_element_cls(element_cls)
 
@@ -31,7 +40,12 @@ class SchemaAPIValidator(object):
                 raise exceptions.DSLParsingSchemaAPIException(1)
         except TypeError:
             raise exceptions.DSLParsingSchemaAPIException(1)
-        self._traverse_schema(element_cls.schema)
+        schema = element_cls.schema
+        if (element_cls in self._validated and
+                self._validated[element_cls] is schema):
+            return
+        self._traverse_schema(schema)
+        self._validated[element_cls] = schema
 
     def _traverse_schema(self, schema, list_nesting=0):
         if isinstance(schema, dict):
@@ -75,36 +89,51 @@ class Context(object):
         self.inputs = inputs or {}
         self.element_type_to_elements = {}
         self._root_element = None
-        self._element_tree = nx.DiGraph()
-        self._element_graph = nx.DiGraph()
+        # the element tree is kept as parent pointers and ordered child
+        # lists, the dependency graph orders elements processing
+        self._parents = {}
+        self._children = {}
+        self.element_graph = graph.DependencyGraph()
+        self._key_indices = {}
+        # elements are created top down and each element restores its
+        # initial value holder, the memo makes sure every holder is only
+        # restored once and that parents and children share the (frozen)
+        # restored values.
+        self._restore_memo = {}
         self._traverse_element_cls(element_cls=element_cls,
                                    name=element_name,
                                    value=value,
                                    parent_element=None)
+        self._restore_memo = None
         self._calculate_element_graph()
 
     @property
     def parsed_value(self):
-        return self._root_element.value if self._root_element else None
+        if not self._root_element:
+            return None
+        return frozen.thaw(self._root_element.value)
+
+    def restore(self, value_holder):
+        return value_holder.restore(memo=self._restore_memo)
 
     def child_elements_iter(self, element):
-        return self._element_tree.successors_iter(element)
+        return iter(self._children[element])
 
     def ancestors_iter(self, element):
-        current_element = element
-        while True:
-            predecessors = self._element_tree.predecessors(current_element)
-            if not predecessors:
-                return
-            if len(predecessors) > 1:
-                raise exceptions.DSLParsingFormatException(
-                    1, 'More than 1 parent found for {0}'
-                       .format(element))
-            current_element = predecessors[0]
+        parents = self._parents
+        current_element = parents[element]
+        while current_element is not None:
             yield current_element
+            current_element = parents[current_element]
 
     def descendants(self, element):
-        return nx.descendants(self._element_tree, element)
+        result = []
+        pending = list(reversed(self._children[element]))
+        while pending:
+            current_element = pending.pop()
+            result.append(current_element)
+            pending.extend(reversed(self._children[current_element]))
+        return result
 
     def _add_element(self, element, parent=None):
         element_type = type(element)
@@ -112,9 +141,13 @@ class Context(object):
             self.element_type_to_elements[element_type] = []
         self.element_type_to_elements[element_type].append(element)
 
-        self._element_tree.add_node(element)
+        self._parents[element] = parent
+        self._children[element] = []
+        self.element_graph.add_node(element)
         if parent:
-            self._element_tree.add_edge(parent, element)
+            self._children[parent].append(element)
+            # children are processed before their parent
+            self.element_graph.add_edge(element, parent)
         else:
             self._root_element = element
 
@@ -153,11 +186,10 @@ class Context(object):
 
         parsed_names = set()
         for name, element_cls in schema.items():
-            if name not in parent_element.initial_value_holder:
-                value = None
-            else:
-                name, value = \
-                    parent_element.initial_value_holder.get_item(name)
+            name_holder, value = \
+                parent_element.initial_value_holder.get_item(name)
+            if name_holder is not None:
+                name = name_holder
                 parsed_names.add(name.value)
             self._traverse_element_cls(element_cls=element_cls,
                                        name=name,
@@ -203,7 +235,6 @@ class Context(object):
                                   parent_element=parent_element)
 
     def _calculate_element_graph(self):
-        self.element_graph = nx.DiGraph(self._element_tree)
         for element_type, _elements in self.element_type_to_elements.items():
             requires = element_type.requires
             for requirement, requirement_values in requires.items():
@@ -214,29 +245,63 @@ class Context(object):
                     continue
                 if requirement == 'self':
                     requirement = element_type
-                dependencies = self.element_type_to_elements.get(
-                    requirement, [])
-                for dependency in dependencies:
-                    for element in _elements:
-                        predicates = [r.predicate for r in requirement_values
-                                      if r.predicate is not None]
-                        add_dependency = not predicates or all([
-                            predicate(element, dependency)
-                            for predicate in predicates])
-                        if add_dependency:
-                            self.element_graph.add_edge(element, dependency)
-        # we reverse the graph because only netorkx 1.9.1 has the reverse
-        # flag in the topological sort function, it is only used by it
-        # so this should be good
-        self.element_graph.reverse(copy=False)
+                predicates = [r.predicate for r in requirement_values
+                              if r.predicate is not None]
+                for element in _elements:
+                    for dependency in self.find_elements(
+                            source=element,
+                            element_type=requirement,
+                            predicates=predicates):
+                        self.element_graph.add_edge(dependency, element)
+
+    def find_elements(self, source, element_type, predicates=()):
+        """Returns the elements of element_type matching all predicates
+        for source, in the order they were added to the context.
+
+        If any of the predicates is a KeyPredicate, candidates are looked
+        up in an index of element_type elements by key instead of
+        evaluating the predicates against every element of element_type.
+        """
+        candidates = self.element_type_to_elements.get(element_type, [])
+        key_predicates = [p for p in predicates
+                          if isinstance(p, KeyPredicate)]
+        if key_predicates:
+            key_predicate = key_predicates[0]
+            predicates = [p for p in predicates if p is not key_predicate]
+            index = self._key_index(element_type, key_predicate.target_key)
+            matches = {}
+            for key in key_predicate.source_keys(source):
+                try:
+                    matches.update(index.get(key, ()))
+                except TypeError:
+                    # unhashable keys never match
+                    continue
+            candidates = [matches[position] for position in sorted(matches)]
+        return [candidate for candidate in candidates
+                if all(predicate(source, candidate)
+                       for predicate in predicates)]
+
+    def _key_index(self, element_type, target_key):
+        index_key = (element_type, target_key)
+        index = self._key_indices.get(index_key)
+        if index is None:
+            index = {}
+            for position, element in enumerate(
+                    self.element_type_to_elements.get(element_type, [])):
+                try:
+                    index.setdefault(target_key(element), []).append(
+                        (position, element))
+                except TypeError:
+                    # unhashable keys never match
+                    continue
+            self._key_indices[index_key] = index
+        return index
 
     def elements_graph_topological_sort(self):
         try:
-            return nx.topological_sort(self.element_graph)
-        except nx.NetworkXUnfeasible:
-            # Cycle detected
-            cycle = nx.recursive_simple_cycles(self.element_graph)[0]
-            names = [str(e.name) for e in cycle]
+            return self.element_graph.topological_sort()
+        except graph.CycleDetected as e:
+            names = [str(element.name) for element in e.cycle]
             names.append(str(names[0]))
             ex = exceptions.DSLParsingLogicException(
                 exceptions.ERROR_CODE_CYCLE,
@@ -248,6 +313,10 @@ class Context(object):
 
 class Parser(object):
 
+    def __init__(self):
+        # element class -> (schema, compiled schema validator)
+        self._schema_validators = weakref.WeakKeyDictionary()
+
     def parse(self,
               value,
               element_cls,
@@ -259,78 +328,39 @@ class Parser(object):
             element_cls=element_cls,
             element_name=element_name,
             inputs=inputs)
+        parse_profile = profiling.current_profile()
         for element in context.elements_graph_topological_sort():
             try:
-                self._validate_element_schema(element, strict=strict)
-                self._process_element(element)
+                if parse_profile is None:
+                    self._validate_element_schema(element, strict=strict)
+                    self._process_element(element)
+                else:
+                    self._profile_element(element, strict, parse_profile)
             except exceptions.DSLParsingException as e:
                 if not e.element:
                     e.element = element
                 raise
         return context.parsed_value
 
-    @staticmethod
-    def _validate_element_schema(element, strict):
+    def _validate_element_schema(self, element, strict):
         value = element.initial_value
         if element.required and value is None:
             raise exceptions.DSLParsingFormatException(
                 1, "'{0}' key is required but it is currently missing"
                    .format(element.name))
-
-        def validate_schema(schema):
-            if isinstance(schema, (dict, elements.Dict)):
-                if not isinstance(value, dict):
-                    raise exceptions.DSLParsingFormatException(
-                        1, _expected_type_message(value, dict))
-                for key in value.keys():
-                    if not isinstance(key, basestring):
-                        raise exceptions.DSLParsingFormatException(
-                            1, "Dict keys must be strings but"
-                               " found '{0}' of type '{1}'"
-                               .format(key, _py_type_to_user_type(type(key))))
-
-            if strict and isinstance(schema, dict):
-                for key in value.keys():
-                    if key not in schema:
-                        ex = exceptions.DSLParsingFormatException(
-                            1, "'{0}' is not in schema. "
-                               "Valid schema values: {1}"
-                               .format(key, schema.keys()))
-                        for child_element in element.children():
-                            if child_element.name == key:
-                                ex.element = child_element
-                                break
-                        raise ex
-
-            if (isinstance(schema, elements.List) and
-                    not isinstance(value, list)):
-                raise exceptions.DSLParsingFormatException(
-                    1, _expected_type_message(value, list))
-
-            if (isinstance(schema, elements.Leaf) and
-                    not isinstance(value, schema.type)):
-                raise exceptions.DSLParsingFormatException(
-                    1, _expected_type_message(value, schema.type))
         if value is not None:
-            if isinstance(element.schema, list):
-                validated = False
-                last_error = None
-                for schema_item in element.schema:
-                    try:
-                        validate_schema(schema_item)
-                    except exceptions.DSLParsingFormatException as e:
-                        last_error = e
-                    else:
-                        validated = True
-                        break
-                if not validated:
-                    if not last_error:
-                        raise ValueError('Illegal state should have been '
-                                         'identified by schema API validation')
-                    else:
-                        raise last_error
-            else:
-                validate_schema(element.schema)
+            self.validate_schema(type(element), value, element, strict)
+
+    def validate_schema(self, element_cls, value, element, strict):
+        self._schema_validator(element_cls)(element, value, strict)
+
+    def _schema_validator(self, element_cls):
+        schema = element_cls.schema
+        cached = self._schema_validators.get(element_cls)
+        if cached is None or cached[0] is not schema:
+            cached = (schema, _compile_schema_validator(schema))
+            self._schema_validators[element_cls] = cached
+        return cached[1]
 
     def _process_element(self, element):
         required_args = self._extract_element_requirements(element)
@@ -338,6 +368,19 @@ class Parser(object):
         element.value = element.parse(**required_args)
         element.provided = element.calculate_provided(**required_args)
 
+    def _profile_element(self, element, strict, parse_profile):
+        element_cls = type(element)
+        with parse_profile.measure(element_cls, profiling.SCHEMA_VALIDATION):
+            self._validate_element_schema(element, strict=strict)
+        with parse_profile.measure(element_cls, profiling.REQUIREMENTS):
+            required_args = self._extract_element_requirements(element)
+        with parse_profile.measure(element_cls, profiling.VALIDATE):
+            element.validate(**required_args)
+        with parse_profile.measure(element_cls, profiling.PARSE):
+            element.value = element.parse(**required_args)
+        with parse_profile.measure(element_cls, profiling.CALCULATE_PROVIDED):
+            element.provided = element.calculate_provided(**required_args)
+
     @staticmethod
     def _extract_element_requirements(element):
         context = element.context
@@ -359,14 +402,14 @@ class Parser(object):
             else:
                 if required_type == 'self':
                     required_type = type(element)
-                required_type_elements = context.element_type_to_elements.get(
-                    required_type, [])
                 for requirement in requirements:
                     result = []
-                    for required_element in required_type_elements:
-                        if requirement.predicate and not requirement.predicate(
-                                element, required_element):
-                            continue
+                    predicates = [requirement.predicate] \
+                        if requirement.predicate else []
+                    for required_element in context.find_elements(
+                            source=element,
+                            element_type=required_type,
+                            predicates=predicates):
                         if requirement.parsed:
                             result.append(required_element.value)
                         else:
@@ -424,6 +467,104 @@ def parse(value,
                          strict=strict)
 
 
+def validate_schema(element_cls, value, location=None, strict=True):
+    """Validates a value against the schema of element_cls.
+
+    Used to validate parts of a document without building an element tree
+    for them. location (e.g. an elements.HolderLocation) is set as the
+    element of raised errors.
+    """
+    validate_schema_api(element_cls)
+    try:
+        _parser.validate_schema(element_cls, value, location, strict)
+    except exceptions.DSLParsingException as e:
+        if not e.element:
+            e.element = location
+        raise
+
+
+def _compile_schema_validator(schema):
+    """Compiles an element schema to a function validating element values.
+
+    The returned function is called as validator(element, value, strict)
+    with the (not None) element initial value and raises
+    DSLParsingFormatException if the value does not match the schema.
+    """
+    if isinstance(schema, list):
+        return _compile_alternatives_validator(
+            [_compile_schema_validator(item) for item in schema])
+    if isinstance(schema, dict):
+        return _compile_dict_validator(schema)
+    if isinstance(schema, elements.Dict):
+        return _validate_dict_value
+    if isinstance(schema, elements.List):
+        return _compile_type_validator(list)
+    if isinstance(schema, elements.Leaf):
+        return _compile_type_validator(schema.type)
+    return _validate_any_value
+
+
+def _validate_any_value(element, value, strict):
+    pass
+
+
+def _validate_dict_value(element, value, strict):
+    if not isinstance(value, dict):
+        raise exceptions.DSLParsingFormatException(
+            1, _expected_type_message(value, dict))
+    for key in value.keys():
+        if not isinstance(key, basestring):
+            raise exceptions.DSLParsingFormatException(
+                1, "Dict keys must be strings but"
+                   " found '{0}' of type '{1}'"
+                   .format(key, _py_type_to_user_type(type(key))))
+
+
+def _compile_dict_validator(schema):
+    def validate(element, value, strict):
+        _validate_dict_value(element, value, strict)
+        if not strict:
+            return
+        for key in value.keys():
+            if key not in schema:
+                ex = exceptions.DSLParsingFormatException(
+                    1, "'{0}' is not in schema. "
+                       "Valid schema values: {1}"
+                       .format(key, schema.keys()))
+                for child_element in element.children():
+                    if child_element.name == key:
+                        ex.element = child_element
+                        break
+                raise ex
+    return validate
+
+
+def _compile_type_validator(expected_type):
+    def validate(element, value, strict):
+        if not isinstance(value, expected_type):
+            raise exceptions.DSLParsingFormatException(
+                1, _expected_type_message(value, expected_type))
+    return validate
+
+
+def _compile_alternatives_validator(validators):
+    if not validators:
+        raise ValueError('Illegal state should have been '
+                         'identified by schema API validation')
+
+    def validate(element, value, strict):
+        last_error = None
+        for validator in validators:
+            try:
+                validator(element, value, strict)
+            except exceptions.DSLParsingFormatException as e:
+                last_error = e
+            else:
+                return
+        raise last_error
+    return validate
+
+
 def _expected_type_message(value, expected_type):
     return ("Expected '{0}' type but found '{1}' type"
             .format(_py_type_to_user_type(expected_type),
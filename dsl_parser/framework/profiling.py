@@ -0,0 +1,125 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Opt-in profiling of element processing.
+
+Usage::
+
+    with profiling.profile() as parse_profile:
+        parser.parse_from_path(blueprint_path)
+    report = parse_profile.report()
+
+While a profile is active (in the current thread), the framework parser
+records the time spent and the number of calls per element class and per
+processing phase, along with the number of deep copies made in each phase
+through profiling.deepcopy (which elements use in place of copy.deepcopy).
+Nothing is recorded when no profile is active.
+"""
+
+import contextlib
+import copy
+import threading
+import timeit
+
+SCHEMA_VALIDATION = 'schema_validation'
+REQUIREMENTS = 'requirements'
+VALIDATE = 'validate'
+PARSE = 'parse'
+CALCULATE_PROVIDED = 'calculate_provided'
+
+PHASES = (SCHEMA_VALIDATION,
+          REQUIREMENTS,
+          VALIDATE,
+          PARSE,
+          CALCULATE_PROVIDED)
+
+_timer = timeit.default_timer
+_local = threading.local()
+
+
+class ParseProfile(object):
+
+    def __init__(self):
+        # (element class, phase) -> [calls, total time, deepcopy calls]
+        self._stats = {}
+        self.deepcopy_count = 0
+
+    @contextlib.contextmanager
+    def measure(self, element_cls, phase):
+        deepcopy_count = self.deepcopy_count
+        start = _timer()
+        try:
+            yield
+        finally:
+            duration = _timer() - start
+            stats = self._stats.get((element_cls, phase))
+            if stats is None:
+                stats = self._stats[(element_cls, phase)] = [0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] += self.deepcopy_count - deepcopy_count
+
+    def report(self):
+        """Returns the recorded statistics.
+
+        The report is made of plain values (so it can be serialized as
+        is), its 'elements' list holds one entry per element class and
+        phase, sorted by total time.
+        """
+        entries = []
+        for (element_cls, phase), (calls, total_time, deepcopy_count) in \
+                self._stats.iteritems():
+            entries.append({
+                'element_type': '{0}.{1}'.format(element_cls.__module__,
+                                                 element_cls.__name__),
+                'phase': phase,
+                'calls': calls,
+                'total_time': total_time,
+                'deepcopy_count': deepcopy_count
+            })
+        entries.sort(key=lambda entry: entry['total_time'], reverse=True)
+        return {
+            'total_time': sum(entry['total_time'] for entry in entries),
+            'deepcopy_count': sum(entry['deepcopy_count']
+                                  for entry in entries),
+            'elements': entries
+        }
+
+
+def current_profile():
+    """Returns the innermost active profile of this thread, if any."""
+    profiles = getattr(_local, 'profiles', None)
+    return profiles[-1] if profiles else None
+
+
+@contextlib.contextmanager
+def profile():
+    """Records element processing statistics of parses in this block."""
+    parse_profile = ParseProfile()
+    if not hasattr(_local, 'profiles'):
+        _local.profiles = []
+    _local.profiles.append(parse_profile)
+    try:
+        yield parse_profile
+    finally:
+        _local.profiles.remove(parse_profile)
+
+
+def deepcopy(value):
+    """copy.deepcopy, counted in the active profile of this thread."""
+    parse_profile = current_profile()
+    if parse_profile is not None:
+        parse_profile.deepcopy_count += 1
+    return copy.deepcopy(value)
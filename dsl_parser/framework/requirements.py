@@ -43,5 +43,45 @@ class Value(Requirement):
                                     predicate=predicate)
 
 
-def sibling_predicate(source, target):
-    return source.parent() == target.parent()
+def _name(element):
+    return element.name
+
+
+class KeyPredicate(object):
+    """A predicate that matches elements by key.
+
+    The target matches the source if ``target_key(target)`` is one of the
+    keys returned by ``source_keys(source)``. A plain predicate has to be
+    called for every (source, candidate target) pair, requirements using a
+    key predicate are instead resolved through an index of the candidate
+    targets by key that is built once per element type (see
+    Context.find_elements).
+
+    Keys are computed before elements are parsed, so both functions may
+    only use the element tree and the elements initial values.
+
+    :param source_keys: function returning an iterable of the keys the
+                        source element requires.
+    :param target_key: function returning the key of a candidate target
+                       element, by default its name.
+    """
+
+    def __init__(self, source_keys, target_key=_name):
+        self.source_keys = source_keys
+        self.target_key = target_key
+
+    def __call__(self, source, target):
+        try:
+            return self.target_key(target) in self.source_keys(source)
+        except TypeError:
+            # unhashable keys never match
+            return False
+
+
+def _parent(element):
+    return element.parent()
+
+
+sibling_predicate = KeyPredicate(
+    source_keys=lambda source: [source.parent()],
+    target_key=_parent)
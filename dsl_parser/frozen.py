@@ -0,0 +1,104 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Read only dict and list types for values shared during parsing.
+
+Frozen values can be handed out without copying them. Consumers that need
+to modify such a value should work on ``copy.deepcopy(value)`` (or
+``thaw(value)``), both return regular mutable dicts and lists.
+"""
+
+import copy
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError("'{0}' object is immutable, copy it before modifying it"
+                    .format(type(self).__name__))
+
+
+class FrozenDict(dict):
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return dict((copy.deepcopy(key, memo), copy.deepcopy(value, memo))
+                    for key, value in self.iteritems())
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __setslice__ = __delslice__ = _immutable
+    __iadd__ = __imul__ = _immutable
+    append = extend = insert = pop = remove = reverse = sort = _immutable
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(item, memo) for item in self]
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def freeze(value):
+    """Returns a frozen version of value.
+
+    Plain dicts and lists are replaced by frozen copies, already frozen
+    containers are returned as is (so freezing a new value that is mostly
+    made of frozen values is cheap). dict subclasses (e.g. models.Plan)
+    keep their type and have their items frozen in place.
+    """
+    value_type = type(value)
+    if value_type is FrozenDict or value_type is FrozenList:
+        return value
+    if value_type is dict:
+        return FrozenDict((key, freeze(item))
+                          for key, item in value.iteritems())
+    if value_type is list:
+        return FrozenList(freeze(item) for item in value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            dict.__setitem__(value, key, freeze(item))
+    return value
+
+
+def thaw(value):
+    """Returns a mutable version of a (possibly) frozen value.
+
+    All dicts and lists are copied, other objects are returned as is.
+    """
+    if isinstance(value, dict):
+        if type(value) in (dict, FrozenDict):
+            result = {}
+        else:
+            result = copy.copy(value)
+        for key, item in value.iteritems():
+            dict.__setitem__(result, key, thaw(item))
+        return result
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
@@ -55,14 +55,29 @@ class RuntimeEvaluationStorage(object):
     def __init__(self,
                  get_node_instances_method,
                  get_node_instance_method,
-                 get_node_method):
+                 get_node_method,
+                 get_node_instances_bulk_method=None,
+                 get_node_instances_by_nodes_method=None):
         self._get_node_instances_method = get_node_instances_method
         self._get_node_instance_method = get_node_instance_method
         self._get_node_method = get_node_method
+        self._get_node_instances_bulk_method = get_node_instances_bulk_method
+        self._get_node_instances_by_nodes_method = \
+            get_node_instances_by_nodes_method
 
         self._node_to_node_instances = {}
         self._node_instances = {}
         self._nodes = {}
+        # node instances whose containment chain was prefetched
+        self._prefetched_chains = set()
+
+    @property
+    def can_fetch_in_bulk(self):
+        return self._get_node_instances_bulk_method is not None
+
+    @property
+    def can_fetch_nodes_in_bulk(self):
+        return self._get_node_instances_by_nodes_method is not None
 
     def get_node_instances(self, node_id):
         if node_id not in self._node_to_node_instances:
@@ -78,6 +93,58 @@ class RuntimeEvaluationStorage(object):
             self._node_instances[node_instance_id] = node_instance
         return self._node_instances[node_instance_id]
 
+    def get_node_instances_bulk(self, node_instance_ids):
+        """Returns the node instances with the given ids.
+
+        Node instances that were not fetched yet are fetched with a single
+        call to the bulk method (if there is one), ones it did not return
+        are fetched one by one.
+        """
+        self.prefetch_node_instances(node_instance_ids)
+        return [self.get_node_instance(node_instance_id)
+                for node_instance_id in node_instance_ids]
+
+    def prefetch_node_instances(self, node_instance_ids):
+        """Fetches node instances that are about to be needed, in a single
+        call. Does nothing if there is no bulk method."""
+        if not self.can_fetch_in_bulk:
+            return
+        missing = set(node_instance_id
+                      for node_instance_id in node_instance_ids
+                      if node_instance_id not in self._node_instances)
+        if not missing:
+            return
+        for node_instance in self._get_node_instances_bulk_method(
+                list(missing)):
+            self._node_instances[node_instance.id] = node_instance
+
+    def prefetch_node_instances_of_nodes(self, node_ids):
+        """Fetches the node instances of nodes that are about to be
+        needed, in a single call. Does nothing if there is no method for
+        getting the node instances of several nodes."""
+        if not self.can_fetch_nodes_in_bulk:
+            return
+        missing = set(node_id for node_id in node_ids
+                      if node_id not in self._node_to_node_instances)
+        if not missing:
+            return
+        node_to_node_instances = dict((node_id, []) for node_id in missing)
+        for node_instance in self._get_node_instances_by_nodes_method(
+                list(missing)):
+            node_to_node_instances.setdefault(node_instance.node_id, [])\
+                .append(node_instance)
+            self._node_instances[node_instance.id] = node_instance
+        self._node_to_node_instances.update(node_to_node_instances)
+
+    def mark_chains_prefetched(self, node_instance_ids):
+        """Marks the containment chains of node instances as prefetched,
+        returns the ids of the ones that were not marked already."""
+        unmarked = [node_instance_id
+                    for node_instance_id in node_instance_ids
+                    if node_instance_id not in self._prefetched_chains]
+        self._prefetched_chains.update(unmarked)
+        return unmarked
+
     def get_node(self, node_id):
         if node_id not in self._nodes:
             node = self._get_node_method(node_id)
@@ -97,6 +164,15 @@ class Function(object):
         self.raw = raw
         self.parse_args(args)
 
+    @property
+    def path(self):
+        # rendered on demand, it is only needed for error messages
+        return scan.render_path(self._path)
+
+    @path.setter
+    def path(self, path):
+        self._path = path
+
     @abc.abstractmethod
     def parse_args(self, args):
         pass
@@ -179,17 +255,13 @@ class GetProperty(Function):
                 node = self.context['node_template']
             else:
                 target_node = self.context['relationship']['target_id']
-                node = [
-                    x for x in plan.node_templates
-                    if x['name'] == target_node][0]
+                node = plan.get_node_template_by_name(target_node)
         else:
-            found = [
-                x for x in plan.node_templates if self.node_name == x['id']]
-            if len(found) == 0:
+            node = plan.get_node_template(self.node_name)
+            if node is None:
                 raise KeyError(
                     "{0} function node reference '{1}' does not exist.".format(
                         self.name, self.node_name))
-            node = found[0]
         self._get_property_value(node)
         return node
 
@@ -245,9 +317,7 @@ class GetAttribute(Function):
                                            self.name,
                                            self.path))
         if self.node_name not in [SELF, SOURCE, TARGET]:
-            found = [
-                x for x in plan.node_templates if self.node_name == x['id']]
-            if not found:
+            if plan.get_node_template(self.node_name) is None:
                 raise KeyError(
                     "{0} function node reference '{1}' does not exist.".format(
                         self.name, self.node_name))
@@ -345,18 +415,36 @@ class GetAttribute(Function):
             storage,
             node_instances):
 
-        def _parent_instance(_instance):
+        def _parent_instance_ids(_instance):
             _node = storage.get_node(_instance.node_id)
             for relationship in _node.relationships or []:
                 if (constants.CONTAINED_IN_REL_TYPE in
                         relationship['type_hierarchy']):
                     target_name = relationship['target_id']
-                    target_id = [
-                        r['target_id'] for r in _instance.relationships
-                        if r['target_name'] == target_name][0]
-                    return storage.get_node_instance(target_id)
+                    return [r['target_id']
+                            for r in _instance.relationships or []
+                            if r['target_name'] == target_name]
             return None
 
+        def _parent_instance(_instance):
+            target_ids = _parent_instance_ids(_instance)
+            if target_ids is None:
+                return None
+            return storage.get_node_instance(target_ids[0])
+
+        def _prefetch_containment_chains(instance_ids):
+            # Fetches the instances and all of their (contained in)
+            # ancestors, one level at a time so that each level is a
+            # single bulk fetch. Chains prefetched by earlier evaluations
+            # are not walked again.
+            instance_ids = storage.mark_chains_prefetched(instance_ids)
+            while instance_ids:
+                instances = storage.get_node_instances_bulk(instance_ids)
+                instance_ids = storage.mark_chains_prefetched(
+                    [ids[0] for ids in
+                     (_parent_instance_ids(i) for i in instances)
+                     if ids])
+
         def _containing_groups(_instance):
             result = [g['name'] for g in _instance.scaling_groups or []]
             parent_instance = _parent_instance(_instance)
@@ -407,6 +495,12 @@ class GetAttribute(Function):
         self_instance_id = self.context.get('self')
         source_instance_id = self.context.get('source')
         target_instance_id = self.context.get('target')
+        if storage.can_fetch_in_bulk:
+            context_instance_ids = [self_instance_id] if self_instance_id \
+                else [source_instance_id, target_instance_id]
+            _prefetch_containment_chains(
+                [i for i in context_instance_ids if i] +
+                [i.id for i in node_instances])
         if self_instance_id:
             return _resolve_node_instance(self_instance_id)
         elif source_instance_id:
@@ -549,7 +643,9 @@ def parse(raw_function, scope=None, context=None, path=None):
 def evaluate_functions(payload, context,
                        get_node_instances_method,
                        get_node_instance_method,
-                       get_node_method):
+                       get_node_method,
+                       get_node_instances_bulk_method=None,
+                       get_node_instances_by_nodes_method=None):
     """Evaluate functions in payload.
 
     :param payload: The payload to evaluate.
@@ -557,13 +653,30 @@ def evaluate_functions(payload, context,
     :param get_node_instances_method: A method for getting node instances.
     :param get_node_instance_method: A method for getting a node instance.
     :param get_node_method: A method for getting a node.
+    :param get_node_instances_bulk_method: An optional method for getting
+                                           node instances by a list of ids.
+                                           When given, the node instances
+                                           the payload's functions need are
+                                           fetched in a few bulk calls.
+    :param get_node_instances_by_nodes_method: An optional method for
+                                               getting the node instances
+                                               of a list of node ids. When
+                                               given, the node instances of
+                                               the nodes get_attribute
+                                               refers to by name are
+                                               fetched in a single call.
     :return: payload.
     """
-    handler = runtime_evaluation_handler(get_node_instances_method,
-                                         get_node_instance_method,
-                                         get_node_method)
+    storage = RuntimeEvaluationStorage(
+        get_node_instances_method=get_node_instances_method,
+        get_node_instance_method=get_node_instance_method,
+        get_node_method=get_node_method,
+        get_node_instances_bulk_method=get_node_instances_bulk_method,
+        get_node_instances_by_nodes_method=get_node_instances_by_nodes_method)
+    if storage.can_fetch_in_bulk or storage.can_fetch_nodes_in_bulk:
+        _prefetch_node_instances(payload, context, storage)
     scan.scan_properties(payload,
-                         handler,
+                         _handler('evaluate_runtime', storage=storage),
                          scope=None,
                          context=context,
                          path='payload',
@@ -571,16 +684,48 @@ def evaluate_functions(payload, context,
     return payload
 
 
+def _prefetch_node_instances(payload, context, storage):
+    # The node instances of the context (get_attribute of SELF, SOURCE and
+    # TARGET, also used to resolve ambiguous node references) are fetched
+    # together in a single call, and so are the node instances of the
+    # nodes get_attribute refers to by name
+    sites = []
+    scan.find_properties(payload, is_function, sites)
+    uses_get_attribute = False
+    node_names = set()
+    for container, key, _, _, _ in sites:
+        if GetAttribute.name not in container[key]:
+            continue
+        uses_get_attribute = True
+        args = container[key][GetAttribute.name]
+        if isinstance(args, list) and args and \
+                isinstance(args[0], basestring) and \
+                args[0] not in [SELF, SOURCE, TARGET]:
+            node_names.add(args[0])
+    if uses_get_attribute and context:
+        storage.prefetch_node_instances(
+            [context[key] for key in ('self', 'source', 'target')
+             if context.get(key)])
+    storage.prefetch_node_instances_of_nodes(node_names)
+
+
 def evaluate_outputs(outputs_def,
                      get_node_instances_method,
                      get_node_instance_method,
-                     get_node_method):
+                     get_node_method,
+                     get_node_instances_bulk_method=None,
+                     get_node_instances_by_nodes_method=None):
     """Evaluates an outputs definition containing intrinsic functions.
 
     :param outputs_def: Outputs definition.
     :param get_node_instances_method: A method for getting node instances.
     :param get_node_instance_method: A method for getting a node instance.
     :param get_node_method: A method for getting a node.
+    :param get_node_instances_bulk_method: An optional method for getting
+                                           node instances by a list of ids.
+    :param get_node_instances_by_nodes_method: An optional method for
+                                               getting the node instances
+                                               of a list of node ids.
     :return: Outputs dict.
     """
     outputs = dict((k, v['value']) for k, v in outputs_def.iteritems())
@@ -589,7 +734,9 @@ def evaluate_outputs(outputs_def,
         context={},
         get_node_instances_method=get_node_instances_method,
         get_node_instance_method=get_node_instance_method,
-        get_node_method=get_node_method)
+        get_node_method=get_node_method,
+        get_node_instances_bulk_method=get_node_instances_bulk_method,
+        get_node_instances_by_nodes_method=get_node_instances_by_nodes_method)
 
 
 def _handler(evaluator, **evaluator_kwargs):
@@ -624,68 +771,167 @@ def plan_evaluation_handler(plan):
 
 def runtime_evaluation_handler(get_node_instances_method,
                                get_node_instance_method,
-                               get_node_method):
-    return _handler('evaluate_runtime',
-                    storage=RuntimeEvaluationStorage(
-                        get_node_instances_method=get_node_instances_method,
-                        get_node_instance_method=get_node_instance_method,
-                        get_node_method=get_node_method))
+                               get_node_method,
+                               get_node_instances_bulk_method=None,
+                               get_node_instances_by_nodes_method=None):
+    """Returns a scan handler evaluating functions at runtime, see
+    evaluate_functions for the methods. With a bulk method, the node
+    instances each function (and the functions nested in it) needs are
+    prefetched before evaluating it."""
+    storage = RuntimeEvaluationStorage(
+        get_node_instances_method=get_node_instances_method,
+        get_node_instance_method=get_node_instance_method,
+        get_node_method=get_node_method,
+        get_node_instances_bulk_method=get_node_instances_bulk_method,
+        get_node_instances_by_nodes_method=get_node_instances_by_nodes_method)
+    handler = _handler('evaluate_runtime', storage=storage)
+    if not (storage.can_fetch_in_bulk or storage.can_fetch_nodes_in_bulk):
+        return handler
+
+    def prefetching_handler(v, scope, context, path):
+        if is_function(v):
+            _prefetch_node_instances([v], context, storage)
+        return handler(v, scope, context, path)
+    return prefetching_handler
+
+
+def _validate_no_circular_get_property(plan, get_property_functions):
+    """Raises if get_property functions reference each other in a cycle.
+
+    The properties referenced by get_property functions form a graph in
+    which each referenced property (node name and property path) points to
+    the properties referenced by the functions in its value. Each
+    property's value is evaluated once and the graph is searched for a
+    cycle once, properties already known not to lead to a cycle are not
+    visited again from other functions.
+    """
+    # property id -> [(property id, function)] referenced from its value
+    references = {}
+
+    def property_id(func):
+        return '{0}.{1}'.format(
+            func.get_node_template(plan)['name'],
+            constants.FUNCTION_NAME_PATH_SEPARATOR.join(
+                str(prop) for prop in func.property_path))
+
+    def referenced(func_id, func):
+        result = references.get(func_id)
+        if result is None:
+            functions = []
+            _collect_get_property_functions(func.evaluate(plan), functions)
+            result = references[func_id] = [
+                (property_id(f), f) for f in functions]
+        return result
+
+    def find_cycle(func, done):
+        # iterative depth first search, returns the properties visited
+        # (in order) up to the first one referenced again, if any
+        root = property_id(func)
+        if root in done:
+            return None
+        visited = [root]
+        explored = set(visited)
+        path = [root]
+        on_path = set(path)
+        pending = [iter(referenced(root, func))]
+        while pending:
+            for child_id, child in pending[-1]:
+                if child_id in on_path:
+                    visited.append(child_id)
+                    return visited
+                if child_id in explored or child_id in done:
+                    continue
+                visited.append(child_id)
+                explored.add(child_id)
+                path.append(child_id)
+                on_path.add(child_id)
+                pending.append(iter(referenced(child_id, child)))
+                break
+            else:
+                pending.pop()
+                on_path.discard(path.pop())
+        done.update(explored)
+        return None
+
+    done = set()
+    for func in get_property_functions:
+        if find_cycle(func, done) is not None:
+            # describe the cycle as reached from this function alone
+            visited_functions = find_cycle(func, set())
+            error_output = [
+                x.replace(constants.FUNCTION_NAME_PATH_SEPARATOR, ',')
+                for x in visited_functions
+            ]
+            raise RuntimeError(
+                'Circular get_property function call detected: '
+                '{0}'.format(' -> '.join(error_output)))
+
+
+def _collect_get_property_functions(value, functions):
+    if isinstance(value, GetProperty):
+        functions.append(value)
+    elif isinstance(value, dict):
+        for item in value.itervalues():
+            _collect_get_property_functions(item, functions)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_get_property_functions(item, functions)
+
+
+def is_function(value):
+    return isinstance(value, dict) and len(value) == 1 and \
+        value.keys()[0] in TEMPLATE_FUNCTIONS
+
+
+def function_sites(plan):
+    """Returns the (container, key, path, scope, context) sites of the
+    intrinsic functions of the plan, in service template scan order.
+
+    The sites are found once and kept in plan.function_sites, set it to
+    None after adding, removing or moving functions in the plan.
+    prepare_deployment_plan does not use the sites of the plan it is
+    given (which may have been edited), it finds them in its copy.
+    """
+    sites = getattr(plan, 'function_sites', None)
+    if sites is None:
+        sites = scan.find_service_template_properties(plan, is_function)
+        if hasattr(plan, 'function_sites'):
+            plan.function_sites = sites
+    return sites
+
+
+def scan_function_sites(plan, handler):
+    """Like scan.scan_service_template(plan, handler, replace=True) but
+    only applies the handler to the plan's intrinsic functions."""
+    for container, key, path, scope, context in function_sites(plan):
+        value = container[key]
+        result = handler(value, scope, context, path)
+        if result != value:
+            container[key] = result
 
 
 def validate_functions(plan):
+    get_property_sites = []
     get_property_functions = []
 
-    def handler(v, scope, context, path):
-        _func = parse(v, scope=scope, context=context, path=path)
+    # Replace all get_property functions with their instance representation
+    for container, key, path, scope, context in function_sites(plan):
+        _func = parse(container[key], scope=scope, context=context, path=path)
         if isinstance(_func, Function):
             _func.validate(plan)
         if isinstance(_func, GetProperty):
+            get_property_sites.append((container, key))
             get_property_functions.append(_func)
-            return _func
-        return v
-
-    # Replace all get_property functions with their instance representation
-    scan.scan_service_template(plan, handler, replace=True)
+            container[key] = _func
 
     if not get_property_functions:
         return
 
-    # Validate there are no circular get_property calls
-    for func in get_property_functions:
-        property_path = [str(prop) for prop in func.property_path]
-        visited_functions = ['{0}.{1}'.format(
-            func.get_node_template(plan)['name'],
-            constants.FUNCTION_NAME_PATH_SEPARATOR.join(property_path))]
-
-        def validate_no_circular_get_property(*args):
-            r = args[0]
-            if isinstance(r, GetProperty):
-                func_id = '{0}.{1}'.format(
-                    r.get_node_template(plan)['name'],
-                    constants.FUNCTION_NAME_PATH_SEPARATOR.join(
-                        r.property_path))
-                if func_id in visited_functions:
-                    visited_functions.append(func_id)
-                    error_output = [
-                        x.replace(constants.FUNCTION_NAME_PATH_SEPARATOR, ',')
-                        for x in visited_functions
-                    ]
-                    raise RuntimeError(
-                        'Circular get_property function call detected: '
-                        '{0}'.format(' -> '.join(error_output)))
-                visited_functions.append(func_id)
-                r = r.evaluate(plan)
-                validate_no_circular_get_property(r)
-            else:
-                scan.scan_properties(r, validate_no_circular_get_property)
-
-        result = func.evaluate(plan)
-        validate_no_circular_get_property(result)
-
-    def replace_with_raw_function(*args):
-        if isinstance(args[0], GetProperty):
-            return args[0].raw
-        return args[0]
-
-    # Change previously replaced get_property instances with raw values
-    scan.scan_service_template(plan, replace_with_raw_function, replace=True)
+    try:
+        # Validate there are no circular get_property calls
+        _validate_no_circular_get_property(plan, get_property_functions)
+    finally:
+        # Change previously replaced get_property instances with raw values
+        for (container, key), func in zip(get_property_sites,
+                                          get_property_functions):
+            container[key] = func.raw
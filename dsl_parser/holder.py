@@ -13,8 +13,86 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
+from dsl_parser import frozen
+
+# Source marks are packed into a single int per holder. Each of the four
+# line/column fields is stored (offset by one so that 0 means None) in
+# _MARK_BITS bits.
+_MARK_BITS = 32
+_MARK_MASK = (1 << _MARK_BITS) - 1
+
+
+def _pack_marks(start_line, start_column, end_line, end_column):
+    marks = 0
+    for field in (start_line, start_column, end_line, end_column):
+        marks <<= _MARK_BITS
+        if field is not None:
+            marks |= field + 1
+    return marks
+
+
+def _unpack_mark(marks, field_index):
+    shift = (3 - field_index) * _MARK_BITS
+    field = (marks >> shift) & _MARK_MASK
+    return field - 1 if field else None
+
+
+class HolderDict(dict):
+    """A dict of key holders to value holders indexed by the raw keys.
+
+    Lookups by raw key (see Holder.get_item) are O(1) instead of a scan
+    over all key holders. Only one key holder per raw key is kept,
+    setting a key holder whose raw value is already present replaces the
+    previous entry.
+    """
+
+    __slots__ = ('_index',)
+
+    def __init__(self, items=None):
+        super(HolderDict, self).__init__()
+        self._index = {}
+        if items:
+            self.update(items)
+
+    def key_holder(self, key):
+        try:
+            return self._index.get(key)
+        except TypeError:
+            # unhashable raw keys are never indexed
+            return None
+
+    def __setitem__(self, key_holder, value_holder):
+        existing = self.key_holder(key_holder.value)
+        if existing is not None and existing is not key_holder:
+            super(HolderDict, self).__delitem__(existing)
+        super(HolderDict, self).__setitem__(key_holder, value_holder)
+        try:
+            self._index[key_holder.value] = key_holder
+        except TypeError:
+            pass
+
+    def __delitem__(self, key_holder):
+        super(HolderDict, self).__delitem__(key_holder)
+        if self.key_holder(key_holder.value) is key_holder:
+            del self._index[key_holder.value]
+
+    def update(self, items):
+        if isinstance(items, dict):
+            items = items.iteritems()
+        for key_holder, value_holder in items:
+            self[key_holder] = value_holder
+
 
 class Holder(object):
+    """A loaded YAML value along with its source marks.
+
+    Holders are created for every node of a loaded blueprint so they are
+    kept compact: the line/column marks are packed into a single int (see
+    _pack_marks) and exposed through read only properties. The filename is
+    referenced as is, the holders of a document share its filename string.
+    """
+
+    __slots__ = ('value', '_marks', 'filename')
 
     def __init__(self,
                  value,
@@ -23,13 +101,29 @@ class Holder(object):
                  end_line=None,
                  end_column=None,
                  filename=None):
+        if isinstance(value, dict) and not isinstance(value, HolderDict):
+            value = HolderDict(value)
         self.value = value
-        self.start_line = start_line
-        self.start_column = start_column
-        self.end_line = end_line
-        self.end_column = end_column
+        self._marks = _pack_marks(start_line, start_column,
+                                  end_line, end_column)
         self.filename = filename
 
+    @property
+    def start_line(self):
+        return _unpack_mark(self._marks, 0)
+
+    @property
+    def start_column(self):
+        return _unpack_mark(self._marks, 1)
+
+    @property
+    def end_line(self):
+        return _unpack_mark(self._marks, 2)
+
+    @property
+    def end_column(self):
+        return _unpack_mark(self._marks, 3)
+
     def __str__(self):
         return '{0}<{1}.{2}-{3}.{4} [{5}]>'.format(
             self.value,
@@ -51,30 +145,53 @@ class Holder(object):
             raise ValueError('Value is expected to be of type dict while it'
                              'is in fact of type {0}'
                              .format(type(self.value).__name__))
-        for key_holder, value_holder in self.value.iteritems():
-            if key_holder.value == key:
-                return key_holder, value_holder
-        return None, None
-
-    def restore(self):
-        if isinstance(self.value, dict):
-            return dict((key_holder.restore(), value_holder.restore())
-                        for key_holder, value_holder in self.value.iteritems())
-        elif isinstance(self.value, list):
-            return [value_holder.restore() for value_holder in self.value]
-        elif isinstance(self.value, set):
-            return set((value_holder.restore() for value_holder in self.value))
+        if not isinstance(self.value, HolderDict):
+            # value was replaced with a plain dict after construction
+            self.value = HolderDict(self.value)
+        key_holder = self.value.key_holder(key)
+        if key_holder is None:
+            return None, None
+        return key_holder, self.value[key_holder]
+
+    def restore(self, memo=None):
+        """Returns the plain python value held by this holder.
+
+        :param memo: Optional dict used to cache restored containers by
+                     holder. Restoring a tree and later any of its subtrees
+                     with the same memo restores each holder only once.
+                     As the results share their nested values, dicts and
+                     lists restored with a memo are frozen (see
+                     dsl_parser.frozen).
+        """
+        value = self.value
+        if not isinstance(value, (dict, list, set)):
+            return value
+        if memo is not None and self in memo:
+            return memo[self]
+        if isinstance(value, dict):
+            dict_cls = dict if memo is None else frozen.FrozenDict
+            result = dict_cls((key_holder.restore(memo),
+                               value_holder.restore(memo))
+                              for key_holder, value_holder
+                              in value.iteritems())
+        elif isinstance(value, list):
+            list_cls = list if memo is None else frozen.FrozenList
+            result = list_cls(value_holder.restore(memo)
+                              for value_holder in value)
         else:
-            return self.value
+            result = set(value_holder.restore(memo) for value_holder in value)
+        if memo is not None:
+            memo[self] = result
+        return result
 
     @staticmethod
     def of(obj, filename=None):
         if isinstance(obj, Holder):
             return obj
         if isinstance(obj, dict):
-            result = dict((Holder.of(key, filename=filename),
-                           Holder.of(value, filename=filename))
-                          for key, value in obj.iteritems())
+            result = HolderDict((Holder.of(key, filename=filename),
+                                 Holder.of(value, filename=filename))
+                                for key, value in obj.iteritems())
         elif isinstance(obj, list):
             result = [Holder.of(item, filename=filename) for item in obj]
         elif isinstance(obj, set):
@@ -84,9 +201,8 @@ class Holder(object):
         return Holder(result, filename=filename)
 
     def copy(self):
-        return Holder(value=self.value,
-                      start_line=self.start_line,
-                      start_column=self.start_column,
-                      end_line=self.end_line,
-                      end_column=self.end_column,
-                      filename=self.filename)
+        result = Holder.__new__(Holder)
+        result.value = self.value
+        result._marks = self._marks
+        result.filename = self.filename
+        return result
@@ -0,0 +1,241 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""Opt-in metrics of the imports fetched while parsing.
+
+Usage::
+
+    with import_metrics.collect() as metrics:
+        parser.parse_from_path(blueprint_path)
+    report = metrics.report()
+
+or, to get the metrics of every parse of the process::
+
+    import_metrics.add_sink(sink)
+
+where sink is called with the report of each parse. A report holds one
+entry per import::
+
+    {'import': <the import as written>,
+     'url': <the url it was located at>,
+     'resolved_url': <the url it was read from, after resolver rules>,
+     'attempts': <read attempts, including retries and failed rules>,
+     'bytes': <size of the content>,
+     'fetch_time': ..., 'load_time': ..., 'merge_time': ...,
+     'parse_cache_hit': <whether the loaded yaml was cached>,
+     'disk_cache': <None, 'not_modified' or 'stale'>}
+
+Nothing is recorded while no metrics are collected and no sink is added.
+"""
+
+import contextlib
+import logging
+import threading
+import timeit
+
+logger = logging.getLogger(__name__)
+
+_timer = timeit.default_timer
+_local = threading.local()
+_sinks = []
+_sinks_lock = threading.Lock()
+
+
+class ImportMetrics(object):
+
+    def __init__(self):
+        self._records = []
+        self._records_by_url = {}
+        self._lock = threading.Lock()
+
+    def record_for(self, url, another_import=None):
+        """Returns the record of the import at url, creating it if needed."""
+        with self._lock:
+            record = self._records_by_url.get(url)
+            if record is None:
+                record = self._records_by_url[url] = {
+                    'import': another_import,
+                    'url': url,
+                    'resolved_url': None,
+                    'attempts': 0,
+                    'bytes': None,
+                    'fetch_time': 0.0,
+                    'load_time': 0.0,
+                    'merge_time': 0.0,
+                    'parse_cache_hit': None,
+                    'disk_cache': None
+                }
+                self._records.append(record)
+            elif record['import'] is None:
+                record['import'] = another_import
+            return record
+
+    def extend(self, other):
+        with self._lock:
+            self._records.extend(other.records())
+
+    def records(self):
+        with self._lock:
+            return [dict(record) for record in self._records]
+
+    def report(self):
+        """Returns the recorded imports along with total times, the report
+        is made of plain values (so it can be serialized as is)."""
+        imports = self.records()
+        return {
+            'imports': imports,
+            'fetch_time': sum(i['fetch_time'] for i in imports),
+            'load_time': sum(i['load_time'] for i in imports),
+            'merge_time': sum(i['merge_time'] for i in imports)
+        }
+
+
+@contextlib.contextmanager
+def collect():
+    """Collects the import metrics of parses done in this block (in the
+    current thread, or started from it with parse_from_url_async)."""
+    metrics = ImportMetrics()
+    if not hasattr(_local, 'collectors'):
+        _local.collectors = []
+    _local.collectors.append(metrics)
+    try:
+        yield metrics
+    finally:
+        _local.collectors.remove(metrics)
+
+
+def add_sink(sink):
+    """Adds a callable called with the import metrics report of every
+    parse (from the thread doing the parse). Errors it raises are logged
+    and ignored."""
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    with _sinks_lock:
+        _sinks.remove(sink)
+
+
+def parse_metrics():
+    """Returns the metrics to record a parse in, None if not needed."""
+    if getattr(_local, 'collectors', None) or _sinks:
+        return ImportMetrics()
+    return None
+
+
+def parse_done(metrics):
+    """Hands the metrics of a parse to the collectors and sinks. Errors
+    they raise are logged, they do not affect the parse."""
+    if metrics is None:
+        return
+    for collector in getattr(_local, 'collectors', ()):
+        try:
+            collector.extend(metrics)
+        except Exception:
+            logger.exception('Collecting import metrics failed')
+    with _sinks_lock:
+        sinks = list(_sinks)
+    if sinks:
+        report = metrics.report()
+        for sink in sinks:
+            try:
+                sink(report)
+            except Exception:
+                logger.exception('Import metrics sink {0} failed'
+                                 .format(sink))
+
+
+@contextlib.contextmanager
+def measure(record, field):
+    """Adds the time spent in this block to the field of record, which
+    is the current record of this thread during the block."""
+    if record is None:
+        yield
+        return
+    start = _timer()
+    try:
+        with recording(record):
+            yield
+    finally:
+        record[field] += _timer() - start
+
+
+def stopwatch(record, field):
+    """Returns a function that adds the time since stopwatch was called to
+    the field of record when called (with any arguments), None if there is
+    no record."""
+    if record is None:
+        return None
+    start = _timer()
+
+    def stop(*args):
+        record[field] += _timer() - start
+    return stop
+
+
+@contextlib.contextmanager
+def recording(record):
+    """Makes record the current record of this thread during the block."""
+    previous = getattr(_local, 'record', None)
+    _local.record = record
+    try:
+        yield
+    finally:
+        _local.record = previous
+
+
+def bind(func):
+    """Returns func, made to run with the current record and collectors
+    of the calling thread (e.g. when run by a thread pool)."""
+    current = getattr(_local, 'record', None)
+    collectors = list(getattr(_local, 'collectors', ()))
+    if current is None and not collectors:
+        return func
+
+    def bound(*args, **kwargs):
+        previous = getattr(_local, 'collectors', None)
+        _local.collectors = collectors
+        try:
+            with recording(current):
+                return func(*args, **kwargs)
+        finally:
+            if previous is None:
+                del _local.collectors
+            else:
+                _local.collectors = previous
+    return bound
+
+
+def record(**fields):
+    """Sets fields of the current record, if any."""
+    current = getattr(_local, 'record', None)
+    if current is not None:
+        current.update(fields)
+
+
+def record_attempt():
+    current = getattr(_local, 'record', None)
+    if current is not None:
+        current['attempts'] += 1
+
+
+def record_read(url, content):
+    current = getattr(_local, 'record', None)
+    if current is not None:
+        if isinstance(content, unicode):
+            content = content.encode('utf-8')
+        current['resolved_url'] = url
+        current['bytes'] = len(content)
@@ -15,16 +15,29 @@
 
 import abc
 import contextlib
+import logging
+import threading
 import urllib2
+from multiprocessing.pool import ThreadPool
 
 import requests
-from retrying import retry
+import requests.adapters
+from retrying import retry, RetryError
 
-from dsl_parser import exceptions
+from dsl_parser import (exceptions,
+                        import_metrics)
 
 DEFAULT_RETRY_DELAY = 1
 MAX_NUMBER_RETRIES = 5
 DEFAULT_REQUEST_TIMEOUT = 10
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+# number of threads running asynchronous resolves and fetches
+ASYNC_POOL_SIZE = 10
+
+_READ_ERROR = 'Import failed: Unable to open import url'
+
+logger = logging.getLogger(__name__)
 
 
 class AbstractImportResolver(object):
@@ -47,19 +60,164 @@ class AbstractImportResolver(object):
             return self.resolve(import_url)
         return read_import(import_url)
 
+    def resolve_async(self, import_url, callback=None):
+        """Starts resolving import_url, returns an AsyncResult of it.
+
+        By default resolve is called by a thread pool shared by all
+        resolvers. callback, if given, is called with the data once
+        resolved, errors it raises are logged and do not affect the result.
+        """
+        return run_async(self.resolve, import_url, callback=callback)
+
+    def fetch_import_async(self, import_url, callback=None):
+        """The asynchronous version of fetch_import, see resolve_async.
+
+        This is what parses fetch their imports with (waiting on the
+        result when they need it), so a resolver with an asynchronous
+        client should override this method.
+        """
+        return run_async(self.fetch_import, import_url, callback=callback)
+
+
+def run_async(func, import_url, callback=None, pool=None):
+    """Calls func(import_url) on the shared thread pool (or on pool), then
+    callback with its result (in the same thread). Returns an AsyncResult
+    of it.
+
+    The pool's own callback mechanism is not used for callback, an error
+    raised by a callback there stops the pool from handing out results.
+    """
+    # metrics are recorded for the import (or parse) of the caller
+    func = import_metrics.bind(func)
+
+    def run():
+        result = func(import_url)
+        if callback is not None:
+            try:
+                callback(result)
+            except Exception:
+                logger.exception('Callback of {0} failed'.format(import_url))
+        return result
+    return (pool or async_pool()).apply_async(run)
+
+
+_async_pool = None
+_async_pool_lock = threading.Lock()
+
+
+def async_pool():
+    """Returns the thread pool running asynchronous resolves."""
+    global _async_pool
+    if _async_pool is None:
+        with _async_pool_lock:
+            if _async_pool is None:
+                _async_pool = ThreadPool(ASYNC_POOL_SIZE)
+    return _async_pool
+
+
+def read_import(import_url, reader=None):
+    """Reads an import, http(s) imports are read with the reader's pooled
+    session (the shared default reader if none is given)."""
+    if reader is None:
+        reader = default_import_reader()
+    return reader.read(import_url)
 
-def read_import(import_url):
-    error_str = 'Import failed: Unable to open import url'
-    if import_url.startswith('file:'):
-        try:
-            with contextlib.closing(urllib2.urlopen(import_url)) as f:
-                return f.read()
-        except Exception, ex:
-            ex = exceptions.DSLParsingLogicException(
-                13, '{0} {1}; {2}'.format(error_str, import_url, ex))
-            raise ex
-    else:
-        number_of_attempts = MAX_NUMBER_RETRIES + 1
+
+_default_reader = None
+_default_reader_lock = threading.Lock()
+
+
+def default_import_reader():
+    """Returns the import reader shared by resolvers that do not configure
+    their own, so keep-alive connections are reused across parses."""
+    global _default_reader
+    if _default_reader is None:
+        with _default_reader_lock:
+            if _default_reader is None:
+                _default_reader = ImportReader()
+    return _default_reader
+
+
+class ImportReader(object):
+    """Reads imports, http(s) imports are read with a requests session.
+
+    The session keeps connections alive and pools them per host. Settings
+    that are not given use the module defaults.
+
+    :param session: the requests session to use, by default a new session
+                    with pool_connections and pool_maxsize is created.
+    :param timeout: request timeout in seconds.
+    :param max_retries: number of retries on connection errors, timeouts
+                        and internal server errors.
+    :param retry_delay: delay before the first retry in milliseconds.
+    :param retry_backoff: factor the delay is multiplied by on each
+                          further retry (1 means a fixed delay).
+    :param max_retry_delay: maximum delay between retries in milliseconds.
+    :param pool_connections: number of hosts to keep connection pools for.
+    :param pool_maxsize: maximum number of connections kept per host.
+    """
+
+    def __init__(self,
+                 session=None,
+                 timeout=None,
+                 max_retries=None,
+                 retry_delay=None,
+                 retry_backoff=1,
+                 max_retry_delay=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE):
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.retry_backoff = retry_backoff
+        self.max_retry_delay = max_retry_delay
+
+    def read(self, import_url):
+        if import_url.startswith('file:'):
+            content = _read_file_import(import_url)
+        else:
+            content = self._read_http_import(import_url)
+        import_metrics.record_read(import_url, content)
+        return content
+
+    def _retry_wait(self, attempt_number, delay_since_first_attempt):
+        retry_delay = self.retry_delay
+        if retry_delay is None:
+            retry_delay = DEFAULT_RETRY_DELAY
+        wait = retry_delay * self.retry_backoff ** (attempt_number - 1)
+        if self.max_retry_delay is not None:
+            wait = min(wait, self.max_retry_delay)
+        return wait
+
+    def _read_http_import(self, import_url):
+        return self._get(import_url).text
+
+    def _get(self, import_url, headers=None):
+        """Gets an http(s) import, retrying on connection errors, timeouts
+        and internal server errors.
+
+        Returns the response if successful (or not modified, when sending
+        conditional headers). Otherwise raises DSLParsingLogicException,
+        with a status_code attribute if the server responded.
+        """
+        max_retries = self.max_retries
+        if max_retries is None:
+            max_retries = MAX_NUMBER_RETRIES
+        timeout = self.timeout
+        if timeout is None:
+            timeout = DEFAULT_REQUEST_TIMEOUT
+        number_of_attempts = max_retries + 1
+        request_kwargs = {'timeout': timeout}
+        if headers:
+            request_kwargs['headers'] = headers
 
         # Defines on which errors we should retry the import.
         def _is_recoverable_error(e):
@@ -70,15 +228,16 @@ def read_import(import_url):
             return hasattr(result, 'status_code') and result.status_code >= 500
 
         @retry(stop_max_attempt_number=number_of_attempts,
-               wait_fixed=DEFAULT_RETRY_DELAY,
+               wait_func=self._retry_wait,
                retry_on_exception=_is_recoverable_error,
                retry_on_result=_is_internal_error)
         def get_import():
-            response = requests.get(import_url,
-                                    timeout=DEFAULT_REQUEST_TIMEOUT)
-            # The response is a valid one, and the content should be returned
-            if 200 <= response.status_code < 300:
-                return response.text
+            import_metrics.record_attempt()
+            response = self.session.get(import_url, **request_kwargs)
+            # The response is a valid one, and should be returned
+            if 200 <= response.status_code < 300 or \
+                    (headers and response.status_code == 304):
+                return response
             # If the response status code is above 500, an internal server
             # error has occurred. The return value would be caught by
             # _is_internal_error (as specified in the decorator), and retried.
@@ -88,22 +247,40 @@ def read_import(import_url):
             else:
                 invalid_url_err = exceptions.DSLParsingLogicException(
                     13, '{0} {1}; status code: {2}'.format(
-                        error_str, import_url, response.status_code))
+                        _READ_ERROR, import_url, response.status_code))
+                invalid_url_err.status_code = response.status_code
                 raise invalid_url_err
 
         try:
-            import_result = get_import()
+            try:
+                response = get_import()
+            except RetryError as e:
+                # retries on internal server errors were exhausted
+                response = e.last_attempt.value
             # If the error is an internal error only. A custom exception should
             # be raised.
-            if _is_internal_error(import_result):
+            if _is_internal_error(response):
                 msg = 'Import failed {0} times, due to internal server error' \
-                      '; {1}'.format(number_of_attempts, import_result.text)
-                raise exceptions.DSLParsingLogicException(13, msg)
-            return import_result
+                      '; {1}'.format(number_of_attempts, response.text)
+                ex = exceptions.DSLParsingLogicException(13, msg)
+                ex.status_code = response.status_code
+                raise ex
+            return response
         # If any ConnectionError, Timeout or URLRequired should rise
         # after the retrying mechanism, a custom exception will be raised.
         except (requests.ConnectionError, requests.Timeout,
                 requests.URLRequired) as err:
 
             raise exceptions.DSLParsingLogicException(
-                13, '{0} {1}; {2}'.format(error_str, import_url, err))
+                13, '{0} {1}; {2}'.format(_READ_ERROR, import_url, err))
+
+
+def _read_file_import(import_url):
+    import_metrics.record_attempt()
+    try:
+        with contextlib.closing(urllib2.urlopen(import_url)) as f:
+            return f.read()
+    except Exception, ex:
+        ex = exceptions.DSLParsingLogicException(
+            13, '{0} {1}; {2}'.format(_READ_ERROR, import_url, ex))
+        raise ex
@@ -0,0 +1,195 @@
+#########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  * See the License for the specific language governing permissions and
+#  * limitations under the License.
+
+import hashlib
+import json
+import os
+import tempfile
+
+from dsl_parser import import_metrics
+from dsl_parser.exceptions import DSLParsingLogicException
+from dsl_parser.import_resolver.abstract_import_resolver import (
+    ImportReader,
+    default_import_reader)
+from dsl_parser.import_resolver.default_import_resolver import (
+    DefaultImportResolver,
+    DefaultResolverValidationException)
+
+DEFAULT_MAX_CACHE_SIZE = 100 * 1024 * 1024
+
+_ENTRY_SUFFIX = '.json'
+
+
+class ImportsDiskCache(object):
+    """Stores fetched imports on disk, by url.
+
+    Each entry is a json file holding the url, its content and the
+    validators (ETag, Last-Modified) it was served with. Entries are
+    written atomically so the cache can be shared by several processes.
+    The total size of the entries is bounded by max_size bytes, least
+    recently used entries (by file modification time, which is updated
+    on every use) are evicted first.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def get(self, url):
+        path = self._path(url)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if entry.get('url') != url:
+            return None
+        return entry
+
+    def put(self, url, content, etag=None, last_modified=None):
+        entry = {
+            'url': url,
+            'content': content,
+            'etag': etag,
+            'last_modified': last_modified
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.rename(temp_path, self._path(url))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._evict()
+
+    def touch(self, url):
+        try:
+            os.utime(self._path(url), None)
+        except OSError:
+            pass
+
+    def _path(self, url):
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + _ENTRY_SUFFIX)
+
+    def _evict(self):
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(_ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+            total_size += stat.st_size
+        entries.sort()
+        for _, path, size in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+
+class CachingImportReader(ImportReader):
+    """An import reader that caches http(s) imports on disk.
+
+    Cached imports are revalidated with the server (If-None-Match and
+    If-Modified-Since) on every read. If the server cannot be reached or
+    fails, the cached copy is served instead.
+    """
+
+    def __init__(self, cache, **kwargs):
+        super(CachingImportReader, self).__init__(**kwargs)
+        self.cache = cache
+
+    def _read_http_import(self, import_url):
+        entry = self.cache.get(import_url)
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            response = self._get(import_url, headers=headers)
+        except DSLParsingLogicException as e:
+            status_code = getattr(e, 'status_code', None)
+            if entry is None or \
+                    (status_code is not None and 400 <= status_code < 500):
+                raise
+            # the server is down (or failing), serve the stale copy
+            self.cache.touch(import_url)
+            import_metrics.record(disk_cache='stale')
+            return entry['content']
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(import_url)
+            import_metrics.record(disk_cache='not_modified')
+            return entry['content']
+        content = response.text
+        self.cache.put(import_url,
+                       content,
+                       etag=response.headers.get('ETag'),
+                       last_modified=response.headers.get('Last-Modified'))
+        return content
+
+
+class CachingImportResolver(DefaultImportResolver):
+    """A default import resolver that caches http(s) imports on disk.
+
+    Imports are stored in ``cache_dir`` by url (so with rules, by the url
+    they were actually read from) and revalidated with the server on every
+    read, stale copies are served when the server is down. The cache size
+    is bounded by ``max_cache_size`` bytes with LRU eviction.
+
+    The other parameters are the DefaultImportResolver ones. It can be
+    configured as the import resolver implementation
+    ``dsl_parser.import_resolver.caching_import_resolver:
+    CachingImportResolver`` with ``cache_dir`` in its parameters.
+    """
+
+    def __init__(self,
+                 cache_dir=None,
+                 max_cache_size=DEFAULT_MAX_CACHE_SIZE,
+                 **kwargs):
+        super(CachingImportResolver, self).__init__(**kwargs)
+        if not cache_dir or not isinstance(cache_dir, basestring):
+            raise DefaultResolverValidationException(
+                'Invalid parameters supplied for the caching resolver: '
+                'The `cache_dir` parameter must be a directory path but it '
+                'is {0}.'.format(cache_dir))
+        self._validate_reader_parameters({'max_cache_size': max_cache_size})
+        # share the default session unless configured otherwise
+        reader_kwargs = {'session': default_import_reader().session}
+        if self.reader is not None:
+            reader = self.reader
+            reader_kwargs = dict(session=reader.session,
+                                 timeout=reader.timeout,
+                                 max_retries=reader.max_retries,
+                                 retry_delay=reader.retry_delay,
+                                 retry_backoff=reader.retry_backoff,
+                                 max_retry_delay=reader.max_retry_delay)
+        self.reader = CachingImportReader(
+            cache=ImportsDiskCache(cache_dir, max_size=max_cache_size),
+            **reader_kwargs)
@@ -12,13 +12,21 @@
 #  * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  * See the License for the specific language governing permissions and
 #  * limitations under the License.
+import threading
+import time
+
 from dsl_parser.exceptions import DSLParsingLogicException
 
 from dsl_parser.import_resolver.abstract_import_resolver \
-    import AbstractImportResolver, read_import
+    import AbstractImportResolver, ImportReader, read_import
 
 DEFAULT_RULES = []
 DEFAULT_RESLOVER_RULES_KEY = 'rules'
+# seconds a rule's mirror is not tried again after failing to connect to
+# it, 0 (the default) disables skipping failed mirrors
+DEFAULT_FAILED_MIRRORS_TTL = 0
+# maximum number of failed mirrors remembered
+MAX_FAILED_MIRRORS = 1000
 
 
 class DefaultResolverValidationException(Exception):
@@ -70,40 +78,99 @@ class DefaultImportResolver(AbstractImportResolver):
 
         In case that all the resolve attempts will fail,
         a DSLParsingLogicException will be raise.
+
+    Rules are indexed by prefix when the resolver is created, so matching
+    rules are found without going over all of them.
+
+    When ``failed_mirrors_ttl`` is set, a rule's replacement prefix (its
+    mirror) that could not be connected to (a connection error or a
+    timeout, as opposed to e.g. a 404 response) is remembered for that many
+    seconds by all resolvers of the process, and no url rewritten to that
+    mirror is tried in the meantime. So a dead mirror costs one failed
+    request per ttl instead of one per import. It is disabled by default.
+
+    Urls are read with a pooled requests session (see ImportReader), by
+    default the one shared by all resolvers. Passing any of the other
+    parameters gives the resolver its own session configured with them:
+    ``timeout`` (seconds), ``max_retries``, ``retry_delay`` (milliseconds),
+    ``retry_backoff`` (factor applied to the delay on each retry),
+    ``max_retry_delay`` (milliseconds), ``pool_connections`` (number of
+    hosts to pool connections for), ``pool_maxsize`` (connections kept
+    per host) and ``session`` (a requests session to use as is).
     """
 
-    def __init__(self, rules=None):
+    def __init__(self,
+                 rules=None,
+                 timeout=None,
+                 max_retries=None,
+                 retry_delay=None,
+                 retry_backoff=None,
+                 max_retry_delay=None,
+                 pool_connections=None,
+                 pool_maxsize=None,
+                 session=None,
+                 failed_mirrors_ttl=DEFAULT_FAILED_MIRRORS_TTL):
         # set the rules
         self.rules = rules
         if self.rules is None:
             self.rules = DEFAULT_RULES
         self._validate_rules()
+        self._rules_trie = _PrefixTrie()
+        for rule in self.rules:
+            prefix, replacement = rule.items()[0]
+            self._rules_trie.add(prefix, replacement)
+        self._validate_reader_parameters(
+            {'failed_mirrors_ttl': failed_mirrors_ttl})
+        self.failed_mirrors_ttl = failed_mirrors_ttl
+        reader_parameters = dict(
+            (name, value) for name, value in (
+                ('timeout', timeout),
+                ('max_retries', max_retries),
+                ('retry_delay', retry_delay),
+                ('retry_backoff', retry_backoff),
+                ('max_retry_delay', max_retry_delay),
+                ('pool_connections', pool_connections),
+                ('pool_maxsize', pool_maxsize))
+            if value is not None)
+        self._validate_reader_parameters(reader_parameters)
+        if session is not None:
+            reader_parameters['session'] = session
+        # None means the shared default reader is used
+        self.reader = ImportReader(**reader_parameters) \
+            if reader_parameters else None
 
     def resolve(self, import_url):
         failed_urls = {}
-        # trying to find a matching rule that can resolve this url
-        for rule in self.rules:
-            key = rule.keys()[0]
-            value = rule.values()[0]
-            prefix = key
-            prefix_len = len(key)
-            if prefix == import_url[:prefix_len]:
-                # found a matching rule
-                url_to_resolve = value + import_url[prefix_len:]
-                # trying to resolve the resolved_url
-                if url_to_resolve not in failed_urls.keys():
-                    # there is no point to try to resolve the same url twice
-                    try:
-                        return read_import(url_to_resolve)
-                    except DSLParsingLogicException, ex:
-                        # failed to resolve current rule,
-                        # continue to the next one
-                        failed_urls[url_to_resolve] = str(ex)
+        # trying the matching rules (in order) to resolve this url
+        for prefix, value in self._rules_trie.matches(import_url):
+            url_to_resolve = value + import_url[len(prefix):]
+            # there is no point to try to resolve the same url twice
+            if url_to_resolve in failed_urls:
+                continue
+            if self.failed_mirrors_ttl:
+                error = failed_mirrors_cache.get(value,
+                                                 self.failed_mirrors_ttl)
+                if error is not None:
+                    # could not connect to the mirror recently (possibly
+                    # while reading another import)
+                    failed_urls[url_to_resolve] = \
+                        'skipped, mirror {0} failed recently: {1}'.format(
+                            value, error)
+                    continue
+            try:
+                return read_import(url_to_resolve, self.reader)
+            except DSLParsingLogicException, ex:
+                # failed to resolve current rule,
+                # continue to the next one
+                failed_urls[url_to_resolve] = str(ex)
+                if self.failed_mirrors_ttl and \
+                        _is_connection_error(url_to_resolve, ex):
+                    failed_mirrors_cache.add(value, str(ex))
 
         # failed to resolve the url using the rules
         # trying to open the original url
         try:
-            return read_import(import_url)
+            return read_import(import_url, self.reader)
         except DSLParsingLogicException, ex:
             if not self.rules:
                 raise
@@ -143,3 +210,87 @@ class DefaultImportResolver(AbstractImportResolver):
                     'Each rule must be a dictionary with one (key,value) pair '
                     'but the rule [{0}] has {1} keys.'
                     .format(rule, len(keys)))
+
+    @staticmethod
+    def _validate_reader_parameters(reader_parameters):
+        for name, value in reader_parameters.items():
+            if isinstance(value, bool) or \
+                    not isinstance(value, (int, long, float)) or value < 0:
+                raise DefaultResolverValidationException(
+                    'Invalid parameters supplied for the default resolver: '
+                    'The `{0}` parameter must be a non negative number but '
+                    'it is {1}.'.format(name, value))
+
+
+class _PrefixTrie(object):
+    """Maps prefixes to values, finds the prefixes of a string at once."""
+
+    _VALUES = None
+
+    def __init__(self):
+        self._root = {}
+        self._size = 0
+
+    def add(self, prefix, value):
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        # the insertion index keeps matches in insertion order
+        node.setdefault(self._VALUES, []).append((self._size, prefix, value))
+        self._size += 1
+
+    def matches(self, string):
+        """Returns the (prefix, value) pairs whose prefix is a prefix of
+        string, in insertion order."""
+        node = self._root
+        found = list(node.get(self._VALUES, ()))
+        for char in string:
+            node = node.get(char)
+            if node is None:
+                break
+            found.extend(node.get(self._VALUES, ()))
+        found.sort()
+        return [(prefix, value) for _, prefix, value in found]
+
+
+def _is_connection_error(url, ex):
+    # read errors of http(s) urls carry the status code when the server
+    # responded, anything else is a connection error or a timeout
+    return not url.startswith('file:') and \
+        getattr(ex, 'status_code', None) is None
+
+
+class FailedMirrorsCache(object):
+    """Remembers mirrors that could not be connected to, and when, across
+    parses."""
+
+    def __init__(self, max_size=MAX_FAILED_MIRRORS):
+        self.max_size = max_size
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    def get(self, mirror, ttl):
+        """Returns the error of mirror if it failed in the last ttl
+        seconds."""
+        with self._lock:
+            failure = self._failed.get(mirror)
+        if failure is None or time.time() - failure[0] >= ttl:
+            return None
+        return failure[1]
+
+    def add(self, mirror, error):
+        with self._lock:
+            self._failed[mirror] = (time.time(), error)
+            if len(self._failed) > self.max_size:
+                # forget the oldest failures
+                by_time = sorted(self._failed.items(),
+                                 key=lambda item: item[1][0])
+                for mirror, _ in by_time[:len(by_time) - self.max_size]:
+                    del self._failed[mirror]
+
+    def clear(self):
+        with self._lock:
+            self._failed.clear()
+
+
+failed_mirrors_cache = FailedMirrorsCache()
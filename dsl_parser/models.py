@@ -36,6 +36,10 @@ class Plan(dict):
 
     def __init__(self, plan):
         self.update(plan)
+        # (nodes list, its length, nodes by id, nodes by name)
+        self._node_templates_index = None
+        # intrinsic function sites (see functions.function_sites)
+        self.function_sites = None
 
     @property
     def version(self):
@@ -52,3 +56,43 @@ class Plan(dict):
     @property
     def node_templates(self):
         return self['nodes']
+
+    def get_node_template(self, node_id):
+        """Returns the node template with the given id, None if missing."""
+        try:
+            return self._get_node_templates_index()[2].get(node_id)
+        except TypeError:
+            # unhashable (e.g. a function) references never match
+            return None
+
+    def get_node_template_by_name(self, node_name):
+        """Returns the node template with the given name, None if
+        missing."""
+        try:
+            return self._get_node_templates_index()[3].get(node_name)
+        except TypeError:
+            return None
+
+    def invalidate_node_templates_index(self):
+        """Drops the node templates index.
+
+        The index is rebuilt when the nodes list is replaced or nodes are
+        added or removed, this is only needed after replacing a node
+        template in place or changing its id or name.
+        """
+        self._node_templates_index = None
+
+    def _get_node_templates_index(self):
+        nodes = self['nodes']
+        index = getattr(self, '_node_templates_index', None)
+        if index is None or index[0] is not nodes or \
+                index[1] != len(nodes):
+            by_id = {}
+            by_name = {}
+            for node in nodes:
+                # the first node wins, like a scan over the nodes would
+                by_id.setdefault(node['id'], node)
+                by_name.setdefault(node['name'], node)
+            index = self._node_templates_index = (nodes, len(nodes),
+                                                  by_id, by_name)
+        return index
@@ -14,16 +14,31 @@
 #    * limitations under the License.
 
 import contextlib
+import functools
+import threading
 import urllib2
+from multiprocessing.pool import ThreadPool
 
-from dsl_parser import (functions,
+from dsl_parser import (bundle,
+                        functions,
                         utils)
 from dsl_parser.framework import parser
-from dsl_parser.elements import blueprint
+from dsl_parser.elements import (blueprint,
+                                 imports)
+from dsl_parser.import_resolver.abstract_import_resolver import run_async
 from dsl_parser.import_resolver.default_import_resolver import \
     DefaultImportResolver
 
 
+# number of threads running parses from urls (synchronous ones wait for
+# them), which bounds the number of those parses running at once
+ASYNC_PARSES = 10
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+_local = threading.local()
+
+
 def parse_from_path(dsl_file_path,
                     resources_base_url=None,
                     resolver=None,
@@ -31,6 +46,17 @@ def parse_from_path(dsl_file_path,
                     additional_resource_sources=()):
     with open(dsl_file_path, 'r') as f:
         dsl_string = f.read()
+    if bundle.is_bundle(dsl_string):
+        # a pre-resolved blueprint bundle, parsed without any I/O
+        dsl_string, _, dsl_url, bundled_imports = bundle.load_bundle(
+            dsl_string)
+        return _parse(dsl_string,
+                      resources_base_url=resources_base_url,
+                      dsl_location=dsl_url,
+                      resolver=resolver,
+                      validate_version=validate_version,
+                      additional_resource_sources=additional_resource_sources,
+                      bundled_imports=bundled_imports)
     return _parse(dsl_string,
                   resources_base_url=resources_base_url,
                   dsl_location=dsl_file_path,
@@ -44,6 +70,62 @@ def parse_from_url(dsl_url,
                    resolver=None,
                    validate_version=True,
                    additional_resource_sources=()):
+    """Parses the blueprint at dsl_url, waiting for parse_from_url_async."""
+    kwargs = dict(resources_base_url=resources_base_url,
+                  resolver=resolver,
+                  validate_version=validate_version,
+                  additional_resource_sources=additional_resource_sources)
+    if getattr(_local, 'parsing', False):
+        # called from a parse thread (e.g. by a callback), waiting for the
+        # pool from one of its own threads could deadlock
+        return _parse_from_url(dsl_url, **kwargs)
+    return parse_from_url_async(dsl_url, **kwargs).get()
+
+
+def parse_from_url_async(dsl_url,
+                         resources_base_url=None,
+                         resolver=None,
+                         validate_version=True,
+                         additional_resource_sources=(),
+                         callback=None):
+    """Starts parsing the blueprint at dsl_url, returns an AsyncResult
+    of the plan.
+
+    The parse runs on a thread pool shared by parses from urls (of
+    ASYNC_PARSES threads), its imports are fetched with the resolver's
+    fetch_import_async, several at a time (see imports.resolve_imports).
+    callback, if given, is called with the plan once parsed, errors it
+    raises are logged and do not affect the result.
+    """
+    parse = functools.partial(
+        _parse_from_url,
+        resources_base_url=resources_base_url,
+        resolver=resolver,
+        validate_version=validate_version,
+        additional_resource_sources=additional_resource_sources)
+    return run_async(parse, dsl_url, callback=callback,
+                     pool=_async_parse_pool())
+
+
+def _async_parse_pool():
+    global _parse_pool
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ThreadPool(ASYNC_PARSES,
+                                         initializer=_mark_parse_thread)
+    return _parse_pool
+
+
+def _mark_parse_thread():
+    _local.parsing = True
+
+
+def _parse_from_url(dsl_url,
+                    resources_base_url=None,
+                    resolver=None,
+                    validate_version=True,
+                    additional_resource_sources=()):
     try:
         with contextlib.closing(urllib2.urlopen(dsl_url)) as f:
             dsl_string = f.read()
@@ -78,7 +160,8 @@ def _parse(dsl_string,
            dsl_location=None,
            resolver=None,
            validate_version=True,
-           additional_resource_sources=()):
+           additional_resource_sources=(),
+           bundled_imports=None):
     parsed_dsl_holder = utils.load_yaml(raw_yaml=dsl_string,
                                         error_message='Failed to parse DSL',
                                         filename=dsl_location)
@@ -87,34 +170,23 @@ def _parse(dsl_string,
         resolver = DefaultImportResolver()
 
     # validate version schema and extract actual version used
-    result = parser.parse(
+    version = blueprint.extract_version(
         parsed_dsl_holder,
-        element_cls=blueprint.BlueprintVersionExtractor,
-        inputs={
-            'validate_version': validate_version
-        },
-        strict=False)
-    version = result['plan_version']
+        validate_version=validate_version)
 
     # handle imports
-    result = parser.parse(
-        value=parsed_dsl_holder,
-        inputs={
-            'main_blueprint_holder': parsed_dsl_holder,
-            'resources_base_url': resources_base_url,
-            'blueprint_location': dsl_location,
-            'version': version,
-            'resolver': resolver,
-            'validate_version': validate_version
-        },
-        element_cls=blueprint.BlueprintImporter,
-        strict=False)
-    resource_base = [result['resource_base']]
+    merged_blueprint_holder, resource_base = imports.resolve_imports(
+        parsed_dsl_holder,
+        blueprint_location=dsl_location,
+        resources_base_url=resources_base_url,
+        version=version,
+        resolver=resolver,
+        validate_version=validate_version,
+        bundled_imports=bundled_imports)
+    resource_base = [resource_base]
     if additional_resource_sources:
         resource_base.extend(additional_resource_sources)
 
-    merged_blueprint_holder = result['merged_blueprint']
-
     # parse blueprint
     plan = parser.parse(
         value=merged_blueprint_holder,
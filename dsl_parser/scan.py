@@ -20,6 +20,27 @@ OUTPUTS_SCOPE = 'outputs'
 POLICIES_SCOPE = 'policies'
 SCALING_GROUPS_SCOPE = 'scaling_groups'
 
+# Property paths are only rendered (e.g. 'node.properties.a[0]') for error
+# messages. Scanned properties get a (parent path, key, key format) tuple
+# as their path instead, which is much cheaper to create. The root path
+# is usually a string.
+_KEY_FORMAT = '.{0}'
+_INDEX_FORMAT = '[{0}]'
+
+
+def render_path(path):
+    """Returns the string form of a property path passed to scan handlers,
+    other values are returned as is."""
+    if not isinstance(path, tuple):
+        return path
+    parts = []
+    # rendered iteratively, paths may be deeper than the recursion limit
+    while isinstance(path, tuple):
+        path, key, key_format = path
+        parts.append(key_format.format(key))
+    parts.append('{0}'.format(path))
+    return ''.join(reversed(parts))
+
 
 def scan_properties(value,
                     handler,
@@ -37,7 +58,7 @@ def scan_properties(value,
     * value - the value of the property.
     * scope - scope of the operation (string).
     * context - scanner context (i.e. actual node template).
-    * path - current property path.
+    * path - current property path (see render_path).
     * replace - replace current dict/list values of scanned properties.
 
     :param value: The properties container (dict/list).
@@ -46,7 +67,7 @@ def scan_properties(value,
     """
     if isinstance(value, dict):
         for k, v in value.iteritems():
-            current_path = '{0}.{1}'.format(path, k)
+            current_path = (path, k, _KEY_FORMAT)
             result = handler(v, scope, context, current_path)
             if replace and result != v:
                 value[k] = result
@@ -57,7 +78,7 @@ def scan_properties(value,
                             replace=replace)
     elif isinstance(value, list):
         for index, item in enumerate(value):
-            current_path = '{0}[{1}]'.format(path, index)
+            current_path = (path, index, _INDEX_FORMAT)
             result = handler(item, scope, context, current_path)
             if replace and result != item:
                 value[index] = result
@@ -69,87 +90,137 @@ def scan_properties(value,
                             replace=replace)
 
 
+def find_properties(value,
+                    predicate,
+                    sites,
+                    scope=None,
+                    context=None,
+                    path=''):
+    """
+    Finds the properties for which predicate(property value) is true.
+
+    A (container, key, path, scope, context) site is appended to sites for
+    each such property, in the order scan_properties would have applied a
+    handler to it (and with the same path), container[key] being the
+    property value.
+    """
+    if isinstance(value, dict):
+        for k, v in value.iteritems():
+            current_path = (path, k, _KEY_FORMAT)
+            if predicate(v):
+                sites.append((value, k, current_path, scope, context))
+            find_properties(v, predicate, sites,
+                            scope=scope,
+                            context=context,
+                            path=current_path)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            if predicate(item):
+                sites.append((value, index, (path, index, _INDEX_FORMAT),
+                              scope, context))
+            find_properties(item, predicate, sites,
+                            scope=scope,
+                            context=context,
+                            path=path)
+
+
+def _properties_scanner(handler, replace):
+    def scan(value, scope, context, path):
+        scan_properties(value, handler,
+                        scope=scope,
+                        context=context,
+                        path=path,
+                        replace=replace)
+    return scan
+
+
 def _scan_operations(operations,
-                     handler,
+                     scan,
                      scope=None,
                      context=None,
-                     path='',
-                     replace=False):
+                     path=''):
     for name, definition in operations.iteritems():
         if isinstance(definition, dict) and 'inputs' in definition:
             context = context.copy() if context else {}
             context['operation'] = definition
-            scan_properties(definition['inputs'],
-                            handler,
-                            scope=scope,
-                            context=context,
-                            path='{0}.{1}.inputs'.format(path, name),
-                            replace=replace)
+            scan(definition['inputs'],
+                 scope,
+                 context,
+                 '{0}.{1}.inputs'.format(path, name))
 
 
 def scan_node_operation_properties(node_template, handler, replace=False):
+    _scan_node_operations(node_template,
+                          _properties_scanner(handler, replace))
+
+
+def _scan_node_operations(node_template, scan):
     _scan_operations(node_template['operations'],
-                     handler,
+                     scan,
                      scope=NODE_TEMPLATE_SCOPE,
                      context=node_template,
-                     path='{0}.operations'.format(node_template['name']),
-                     replace=replace)
+                     path='{0}.operations'.format(node_template['name']))
     for r in node_template.get('relationships', []):
         context = {'node_template': node_template, 'relationship': r}
         _scan_operations(r.get('source_operations', {}),
-                         handler,
+                         scan,
                          scope=NODE_TEMPLATE_RELATIONSHIP_SCOPE,
                          context=context,
                          path='{0}.{1}'.format(node_template['name'],
-                                               r['type']),
-                         replace=replace)
+                                               r['type']))
         _scan_operations(r.get('target_operations', {}),
-                         handler,
+                         scan,
                          scope=NODE_TEMPLATE_RELATIONSHIP_SCOPE,
                          context=context,
                          path='{0}.{1}'.format(node_template['name'],
-                                               r['type']),
-                         replace=replace)
+                                               r['type']))
 
 
 def scan_service_template(plan, handler, replace=False):
+    _scan_service_template(plan, _properties_scanner(handler, replace))
+
+
+def find_service_template_properties(plan, predicate):
+    """
+    Returns the sites (see find_properties) of the service template
+    properties for which predicate(property value) is true, in the order
+    scan_service_template would have applied a handler to them.
+    """
+    sites = []
+
+    def scan(value, scope, context, path):
+        find_properties(value, predicate, sites,
+                        scope=scope,
+                        context=context,
+                        path=path)
+    _scan_service_template(plan, scan)
+    return sites
+
+
+def _scan_service_template(plan, scan):
     for node_template in plan.node_templates:
-        scan_properties(node_template['properties'],
-                        handler,
-                        scope=NODE_TEMPLATE_SCOPE,
-                        context=node_template,
-                        path='{0}.properties'.format(
-                            node_template['name']),
-                        replace=replace)
+        scan(node_template['properties'],
+             NODE_TEMPLATE_SCOPE,
+             node_template,
+             '{0}.properties'.format(node_template['name']))
         for name, capability in node_template.get('capabilities', {}).items():
-            scan_properties(capability.get('properties', {}),
-                            handler,
-                            scope=NODE_TEMPLATE_SCOPE,
-                            context=node_template,
-                            path='{0}.capabilities.{1}'.format(
-                                node_template['name'],
-                                name),
-                            replace=replace)
-        scan_node_operation_properties(node_template, handler, replace=replace)
+            scan(capability.get('properties', {}),
+                 NODE_TEMPLATE_SCOPE,
+                 node_template,
+                 '{0}.capabilities.{1}'.format(node_template['name'], name))
+        _scan_node_operations(node_template, scan)
     for output_name, output in plan.outputs.iteritems():
-        scan_properties(output,
-                        handler,
-                        scope=OUTPUTS_SCOPE,
-                        context=plan.outputs,
-                        path='outputs.{0}'.format(output_name),
-                        replace=replace)
+        scan(output,
+             OUTPUTS_SCOPE,
+             plan.outputs,
+             'outputs.{0}'.format(output_name))
     for policy_name, policy in plan.get('policies', {}).items():
-        scan_properties(policy.get('properties', {}),
-                        handler,
-                        scope=POLICIES_SCOPE,
-                        context=policy,
-                        path='policies.{0}.properties'.format(policy_name),
-                        replace=replace)
+        scan(policy.get('properties', {}),
+             POLICIES_SCOPE,
+             policy,
+             'policies.{0}.properties'.format(policy_name))
     for group_name, scaling_group in plan.get('scaling_groups', {}).items():
-        scan_properties(scaling_group.get('properties', {}),
-                        handler,
-                        scope=SCALING_GROUPS_SCOPE,
-                        context=scaling_group,
-                        path='scaling_groups.{0}.properties'.format(
-                            group_name),
-                        replace=replace)
+        scan(scaling_group.get('properties', {}),
+             SCALING_GROUPS_SCOPE,
+             scaling_group,
+             'scaling_groups.{0}.properties'.format(group_name))
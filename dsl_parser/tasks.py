@@ -17,7 +17,6 @@ import copy
 
 from dsl_parser import (functions,
                         exceptions,
-                        scan,
                         models,
                         parser,
                         multi_instance)
@@ -72,14 +71,20 @@ def _set_plan_inputs(plan, inputs=None):
 
 def _process_functions(plan):
     handler = functions.plan_evaluation_handler(plan)
-    scan.scan_service_template(plan, handler, replace=True)
+    functions.scan_function_sites(plan, handler)
+
+
+def _copy_plan(plan):
+    # the plan may have been edited since it was parsed, so the function
+    # sites it keeps are not copied, they are found again in the copy
+    return models.Plan(copy.deepcopy(dict(plan)))
 
 
 def prepare_deployment_plan(plan, inputs=None, **kwargs):
     """
     Prepare a plan for deployment
     """
-    plan = models.Plan(copy.deepcopy(plan))
+    plan = _copy_plan(plan)
     _set_plan_inputs(plan, inputs)
     _process_functions(plan)
     return multi_instance.create_deployment_plan(plan)
@@ -0,0 +1,116 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import json
+import os
+import shutil
+
+import mock
+
+from dsl_parser import (bundle,
+                        exceptions)
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestBundle(AbstractTestParser):
+
+    def _write_blueprint(self):
+        self.make_file_with_name(self.BASIC_VERSION_SECTION_DSL_1_3 + """
+node_types:
+    nested_type: {}
+""", 'nested.yaml', 'imports')
+        types_path = self.make_file_with_name(
+            self.BASIC_VERSION_SECTION_DSL_1_3 + """
+imports:
+    -   nested.yaml
+node_types:
+    test_type:
+        derived_from: nested_type
+        properties:
+            key:
+                default: value
+""", 'types.yaml', 'imports')
+        return self.make_file_with_name(
+            self.BASIC_VERSION_SECTION_DSL_1_3 + """
+imports:
+    -   {0}
+node_templates:
+    node:
+        type: test_type
+""".format(types_path), 'blueprint.yaml', 'blueprint')
+
+    def _write_bundle(self):
+        blueprint_path = self._write_blueprint()
+        bundle_path = os.path.join(self._temp_dir, 'blueprint.bundle')
+        bundle.write_bundle(bundle_path, blueprint_path)
+        return blueprint_path, bundle_path
+
+    def test_bundle_content(self):
+        blueprint_path, bundle_path = self._write_bundle()
+        with open(bundle_path) as f:
+            written = json.load(f)
+        self.assertEqual(bundle.BUNDLE_FORMAT_VERSION,
+                         written[bundle.BUNDLE_VERSION_KEY])
+        self.assertEqual(blueprint_path, written['blueprint']['location'])
+        self.assertEqual(1, len(written['blueprint']['imports']))
+        self.assertEqual(['types.yaml', 'nested.yaml'],
+                         [entry['url'].rsplit('/', 1)[-1]
+                          for entry in written['imports']])
+        self.assertEqual([['nested.yaml', written['imports'][1]['url']]],
+                         written['imports'][0]['imports'])
+
+    def test_parse_bundle_without_io(self):
+        blueprint_path, bundle_path = self._write_bundle()
+        expected = self.parse_from_path(blueprint_path)
+        shutil.rmtree(os.path.join(self._temp_dir, 'imports'))
+        with mock.patch('dsl_parser.import_resolver.abstract_import_resolver'
+                        '.AbstractImportResolver.fetch_import',
+                        side_effect=AssertionError('fetched an import')):
+            with mock.patch('dsl_parser.elements.imports.'
+                            '_get_resource_location',
+                            side_effect=AssertionError('located a url')):
+                plan = self.parse_from_path(bundle_path)
+        self.assertEqual(expected['nodes'], plan['nodes'])
+        self.assertEqual(['test_type', 'nested_type'],
+                         plan['nodes'][0]['type_hierarchy'][::-1])
+
+    def test_modified_bundle(self):
+        _, bundle_path = self._write_bundle()
+        with open(bundle_path) as f:
+            written = json.load(f)
+        written['imports'][0]['content'] += '\n# modified\n'
+        with open(bundle_path, 'w') as f:
+            json.dump(written, f)
+        ex = self.assertRaises(exceptions.DSLParsingFormatException,
+                               self.parse_from_path, bundle_path)
+        self.assertEqual(exceptions.ERROR_INVALID_BUNDLE, ex.err_code)
+        self.assertIn('types.yaml', str(ex))
+
+    def test_unsupported_bundle_version(self):
+        _, bundle_path = self._write_bundle()
+        with open(bundle_path) as f:
+            written = json.load(f)
+        written[bundle.BUNDLE_VERSION_KEY] = 2
+        with open(bundle_path, 'w') as f:
+            json.dump(written, f)
+        ex = self.assertRaises(exceptions.DSLParsingFormatException,
+                               self.parse_from_path, bundle_path)
+        self.assertEqual(exceptions.ERROR_INVALID_BUNDLE, ex.err_code)
+
+    def test_is_bundle(self):
+        self.assertFalse(bundle.is_bundle(self.MINIMAL_BLUEPRINT))
+        self.assertFalse(bundle.is_bundle('{"node_types": {}}'))
+        self.assertTrue(bundle.is_bundle(
+            '{"dsl_bundle_version": 1, "blueprint": {}}'))
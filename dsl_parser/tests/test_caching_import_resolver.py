@@ -0,0 +1,184 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import BaseHTTPServer
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import testtools
+
+from dsl_parser import utils
+from dsl_parser.exceptions import DSLParsingLogicException
+from dsl_parser.import_resolver.caching_import_resolver import (
+    CachingImportResolver,
+    ImportsDiskCache)
+from dsl_parser.import_resolver.default_import_resolver import \
+    DefaultResolverValidationException
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        name = self.path.lstrip('/')
+        self.server.requests.append(
+            (name, self.headers.getheader('If-None-Match')))
+        if self.server.failing:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if name not in self.server.files:
+            self.send_response(404)
+            self.end_headers()
+            return
+        content, etag = self.server.files[name]
+        if self.headers.getheader('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCachingImportResolver(testtools.TestCase):
+
+    def setUp(self):
+        super(TestCachingImportResolver, self).setUp()
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.files = {}
+        self.server.requests = []
+        self.server.failing = False
+        thread = threading.Thread(target=self.server.serve_forever,
+                                  kwargs={'poll_interval': 0.01})
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = 'http://127.0.0.1:{0}/'.format(
+            self.server.server_address[1])
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def _resolver(self, **kwargs):
+        return CachingImportResolver(cache_dir=self.cache_dir,
+                                     max_retries=0,
+                                     **kwargs)
+
+    def test_revalidation(self):
+        self.server.files['types.yaml'] = ('node_types: {}', '"v1"')
+        url = self.base_url + 'types.yaml'
+        self.assertEqual('node_types: {}', self._resolver().resolve(url))
+        self.assertEqual('node_types: {}', self._resolver().resolve(url))
+        self.assertEqual([('types.yaml', None), ('types.yaml', '"v1"')],
+                         self.server.requests)
+
+        self.server.files['types.yaml'] = ('node_types: {a: {}}', '"v2"')
+        self.assertEqual('node_types: {a: {}}', self._resolver().resolve(url))
+        self.assertEqual('node_types: {a: {}}', self._resolver().resolve(url))
+        self.assertEqual(('types.yaml', '"v2"'), self.server.requests[-1])
+
+    def test_stale_when_server_fails(self):
+        self.server.files['types.yaml'] = ('node_types: {}', '"v1"')
+        url = self.base_url + 'types.yaml'
+        self._resolver().resolve(url)
+        self.server.failing = True
+        self.assertEqual('node_types: {}', self._resolver().resolve(url))
+
+    def test_stale_when_server_down(self):
+        self.server.files['types.yaml'] = ('node_types: {}', '"v1"')
+        url = self.base_url + 'types.yaml'
+        self._resolver().resolve(url)
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertEqual('node_types: {}',
+                         self._resolver(timeout=1).resolve(url))
+
+    def test_not_found_is_not_served_stale(self):
+        self.server.files['types.yaml'] = ('node_types: {}', '"v1"')
+        url = self.base_url + 'types.yaml'
+        self._resolver().resolve(url)
+        del self.server.files['types.yaml']
+        ex = self.assertRaises(DSLParsingLogicException,
+                               self._resolver().resolve, url)
+        self.assertIn('status code: 404', str(ex))
+
+    def test_not_cached_failure(self):
+        self.server.failing = True
+        self.assertRaises(DSLParsingLogicException,
+                          self._resolver().resolve,
+                          self.base_url + 'types.yaml')
+
+    def test_create_import_resolver(self):
+        resolver = utils.create_import_resolver({
+            'implementation': 'dsl_parser.import_resolver.'
+                              'caching_import_resolver:CachingImportResolver',
+            'parameters': {
+                'cache_dir': self.cache_dir,
+                'max_cache_size': 1024,
+                'timeout': 3
+            }
+        })
+        self.assertEqual(1024, resolver.reader.cache.max_size)
+        self.assertEqual(3, resolver.reader.timeout)
+
+    def test_missing_cache_dir(self):
+        self.assertRaises(DefaultResolverValidationException,
+                          CachingImportResolver)
+
+
+class TestImportsDiskCache(testtools.TestCase):
+
+    def setUp(self):
+        super(TestImportsDiskCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def _age(self, cache, url, seconds):
+        mtime = time.time() - seconds
+        os.utime(cache._path(url), (mtime, mtime))
+
+    def test_get_put(self):
+        cache = ImportsDiskCache(os.path.join(self.cache_dir, 'cache'))
+        self.assertIsNone(cache.get('http://a'))
+        cache.put('http://a', u'content', etag='"e"', last_modified='date')
+        entry = ImportsDiskCache(cache.directory).get('http://a')
+        self.assertEqual(u'content', entry['content'])
+        self.assertEqual('"e"', entry['etag'])
+        self.assertEqual('date', entry['last_modified'])
+
+    def test_lru_eviction(self):
+        cache = ImportsDiskCache(self.cache_dir, max_size=1000000)
+        cache.put('http://a', 'a' * 100)
+        cache.put('http://b', 'b' * 100)
+        cache.put('http://c', 'c' * 100)
+        self._age(cache, 'http://a', 30)
+        self._age(cache, 'http://b', 20)
+        self._age(cache, 'http://c', 10)
+        cache.touch('http://a')
+        entry_size = os.path.getsize(cache._path('http://a'))
+        cache.max_size = 3 * entry_size
+        cache.put('http://d', 'd' * 100)
+        self.assertIsNotNone(cache.get('http://a'))
+        self.assertIsNone(cache.get('http://b'))
+        self.assertIsNotNone(cache.get('http://c'))
+        self.assertIsNotNone(cache.get('http://d'))
@@ -0,0 +1,212 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import BaseHTTPServer
+import SocketServer
+import threading
+import time
+
+import testtools
+
+from dsl_parser import (exceptions,
+                        parser,
+                        utils)
+from dsl_parser.elements import imports
+from dsl_parser.import_resolver.abstract_import_resolver import \
+    AbstractImportResolver
+from dsl_parser.import_resolver.default_import_resolver import \
+    DefaultImportResolver
+
+LATENCY = 0.1
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        self.server.requests.append(self.path)
+        content = self.server.files.get(self.path.lstrip('/'))
+        if content is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class _CountingResolver(DefaultImportResolver):
+    """Counts the peak number of fetches in flight at once."""
+
+    def __init__(self):
+        super(_CountingResolver, self).__init__()
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def fetch_import(self, import_url):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            return super(_CountingResolver, self).fetch_import(import_url)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestConcurrentImports(testtools.TestCase):
+
+    def setUp(self):
+        super(TestConcurrentImports, self).setUp()
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.files = {}
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = 'http://127.0.0.1:{0}/'.format(
+            self.server.server_address[1])
+
+    def _add_file(self, name, content):
+        self.server.files[name] = content
+        return self.base_url + name
+
+    def _blueprint(self):
+        shared = self._add_file('shared.yaml', """
+node_types:
+    shared_type: {}
+""")
+        urls = []
+        for i in range(6):
+            nested = self._add_file('nested_{0}.yaml'.format(i), """
+imports:
+    - {0}
+node_types:
+    nested_type_{1}: {{}}
+""".format(shared, i))
+            urls.append(self._add_file('import_{0}.yaml'.format(i), """
+imports:
+    - {0}
+node_types:
+    type_{1}:
+        derived_from: shared_type
+""".format(nested, i)))
+        return """
+tosca_definitions_version: cloudify_dsl_1_3
+imports:
+{0}
+node_templates:
+    node:
+        type: type_0
+""".format('\n'.join('    - {0}'.format(url) for url in urls))
+
+    def _ordered_imports(self, blueprint, max_concurrent_fetches):
+        holder = utils.load_yaml(blueprint, 'Failed to parse DSL')
+        resolver = _CountingResolver()
+        loader = imports._ImportsLoader(resolver,
+                                        resources_base_url=None,
+                                        max_workers=max_concurrent_fetches)
+        ordered_imports = imports._build_ordered_imports(
+            holder,
+            dsl_location=None,
+            loader=loader)
+        return [i['import'] for i in ordered_imports], resolver.peak
+
+    def test_same_order_as_sequential_fetching(self):
+        blueprint = self._blueprint()
+        sequential, sequential_peak = self._ordered_imports(
+            blueprint, max_concurrent_fetches=1)
+        concurrent, concurrent_peak = self._ordered_imports(
+            blueprint, max_concurrent_fetches=10)
+        self.assertEqual(sequential, concurrent)
+        self.assertEqual(14, len(concurrent))
+        self.assertEqual(1, sequential_peak)
+        self.assertGreater(concurrent_peak, 1)
+
+    def test_concurrent_fetches_are_bounded(self):
+        ordered_imports, peak = self._ordered_imports(
+            self._blueprint(), max_concurrent_fetches=3)
+        self.assertEqual(14, len(ordered_imports))
+        self.assertLessEqual(peak, 3)
+
+    def test_parse(self):
+        plan = parser.parse(self._blueprint())
+        self.assertEqual('type_0', plan.node_templates[0]['type'])
+        self.assertEqual(['type_0', 'shared_type'],
+                         plan.node_templates[0]['type_hierarchy'][::-1][:2])
+
+    def test_fetch_error(self):
+        blueprint = """
+tosca_definitions_version: cloudify_dsl_1_3
+imports:
+    - {0}
+    - {1}
+""".format(self._add_file('exists.yaml', 'node_types: {}'),
+           self.base_url + 'missing.yaml')
+        ex = self.assertRaises(exceptions.DSLParsingLogicException,
+                               parser.parse, blueprint)
+        self.assertEqual(13, ex.err_code)
+        self.assertIn('missing.yaml', str(ex))
+
+    def test_relative_imports_are_fetched_once(self):
+        self._add_file('relative.yaml', """
+node_types:
+    relative_type: {}
+""")
+        importing = """
+imports:
+    - relative.yaml
+"""
+        blueprint = """
+tosca_definitions_version: cloudify_dsl_1_3
+imports:
+    - {0}
+    - {1}
+node_templates:
+    node:
+        type: relative_type
+""".format(self._add_file('first.yaml', importing),
+           self._add_file('second.yaml', importing))
+        parser.parse(blueprint)
+        self.assertEqual(1, self.server.requests.count('/relative.yaml'))
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_relative_import_candidate_errors(self):
+        class Resolver(AbstractImportResolver):
+            def resolve(self, import_url):
+                raise IOError('connection reset')
+
+        holder = utils.load_yaml("""
+imports:
+    - relative.yaml
+""", 'Failed to parse DSL')
+        loader = imports._ImportsLoader(Resolver(),
+                                        resources_base_url=self.base_url,
+                                        max_workers=1)
+        self.assertEqual(
+            [('relative.yaml', self.base_url + 'relative.yaml')],
+            loader.locate_imports(holder, 'http://example.org/a.yaml'))
@@ -13,16 +13,22 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
+import time
+
 import mock
 import requests
 
 import testtools
 
 from dsl_parser.exceptions import DSLParsingLogicException
-from dsl_parser.import_resolver.default_import_resolver import \
-    DefaultImportResolver, DefaultResolverValidationException
+from dsl_parser.import_resolver.default_import_resolver import (
+    DEFAULT_FAILED_MIRRORS_TTL,
+    DefaultImportResolver,
+    DefaultResolverValidationException,
+    failed_mirrors_cache)
 from dsl_parser.import_resolver.abstract_import_resolver import \
-    MAX_NUMBER_RETRIES
+    MAX_NUMBER_RETRIES, ImportReader, default_import_reader
+from dsl_parser import utils
 
 ORIGINAL_V1_URL = 'http://www.original_v1.org/cloudify/types.yaml'
 ORIGINAL_V1_PREFIX = 'http://www.original_v1.org'
@@ -44,10 +50,16 @@ BAD_RESPONSE_CODE_URL = 'bad_response_code'
 RETRY_URL = 'retry_url'
 
 RETRY_DELAY = 0
+FAILED_MIRRORS_TTL = 60
 
 
 class TestDefaultResolver(testtools.TestCase):
 
+    def setUp(self):
+        super(TestDefaultResolver, self).setUp()
+        failed_mirrors_cache.clear()
+        self.addCleanup(failed_mirrors_cache.clear)
+
     def test_several_matching_rules(self):
         rules = [
             {'some_other_prefix': VALID_V2_PREFIX},
@@ -175,10 +187,89 @@ class TestDefaultResolver(testtools.TestCase):
             partial_err_msg="Unable to open import url {0}"
             .format(ILLEGAL_URL))
 
+    def test_matching_rules_order(self):
+        resolver = DefaultImportResolver(rules=[
+            {ORIGINAL_V1_URL: 'a'},
+            {'http://': 'b'},
+            {ORIGINAL_V2_PREFIX: 'c'},
+            {ORIGINAL_V1_PREFIX: 'd'},
+            {'': 'e'},
+            {ORIGINAL_V1_PREFIX: 'f'}
+        ])
+        self.assertEqual(
+            [(ORIGINAL_V1_URL, 'a'), ('http://', 'b'),
+             (ORIGINAL_V1_PREFIX, 'd'), ('', 'e'), (ORIGINAL_V1_PREFIX, 'f')],
+            resolver._rules_trie.matches(ORIGINAL_V1_URL))
+
+    def test_failed_mirrors_are_remembered(self):
+        rules = [
+            {ORIGINAL_V1_PREFIX: INVALID_URL_PREFIX},
+            {ORIGINAL_V1_PREFIX: VALID_V1_PREFIX},
+        ]
+        self._test_default_resolver(
+            import_url=ORIGINAL_V1_URL, rules=rules,
+            expected_urls_to_resolve=[INVALID_V1_URL, VALID_V1_URL],
+            failed_mirrors_ttl=FAILED_MIRRORS_TTL)
+        # another import (e.g. of another parse) skips the failed mirror
+        self._test_default_resolver(
+            import_url=ORIGINAL_V1_PREFIX + '/other.yaml', rules=rules,
+            expected_urls_to_resolve=[VALID_V1_PREFIX + '/other.yaml'],
+            failed_mirrors_ttl=FAILED_MIRRORS_TTL)
+
+    def test_failed_mirrors_expire(self):
+        rules = [
+            {ORIGINAL_V1_PREFIX: ORIGINAL_V2_PREFIX}
+        ]
+        self._test_default_resolver(
+            import_url=ORIGINAL_V1_URL, rules=rules,
+            expected_urls_to_resolve=[ORIGINAL_V2_URL, ORIGINAL_V1_URL],
+            expected_failure=True,
+            failed_mirrors_ttl=FAILED_MIRRORS_TTL)
+        # the remembered failure is still reported
+        self._test_default_resolver(
+            import_url=ORIGINAL_V1_URL, rules=rules,
+            expected_urls_to_resolve=[ORIGINAL_V1_URL],
+            expected_failure=True,
+            partial_err_msg='Failed to resolve the following urls: ',
+            failed_mirrors_ttl=FAILED_MIRRORS_TTL,
+            expected_skipped_urls=[ORIGINAL_V2_URL])
+        with mock.patch('time.time', return_value=time.time() +
+                        FAILED_MIRRORS_TTL):
+            self._test_default_resolver(
+                import_url=ORIGINAL_V1_URL, rules=rules,
+                expected_urls_to_resolve=[ORIGINAL_V2_URL, ORIGINAL_V1_URL],
+                expected_failure=True,
+                failed_mirrors_ttl=FAILED_MIRRORS_TTL)
+
+    def test_responding_mirrors_are_not_remembered(self):
+        rules = [
+            {ORIGINAL_V1_URL: BAD_RESPONSE_CODE_URL},
+            {ORIGINAL_V1_PREFIX: VALID_V1_PREFIX},
+        ]
+        # a missing import (404) may be added to the mirror at any time
+        for _ in range(2):
+            self._test_default_resolver(
+                import_url=ORIGINAL_V1_URL, rules=rules,
+                expected_urls_to_resolve=[BAD_RESPONSE_CODE_URL,
+                                          VALID_V1_URL],
+                failed_mirrors_ttl=FAILED_MIRRORS_TTL)
+
+    def test_failed_mirrors_not_remembered_by_default(self):
+        rules = [
+            {ORIGINAL_V1_PREFIX: INVALID_URL_PREFIX},
+            {ORIGINAL_V1_PREFIX: VALID_V1_PREFIX},
+        ]
+        for _ in range(2):
+            self._test_default_resolver(
+                import_url=ORIGINAL_V1_URL, rules=rules,
+                expected_urls_to_resolve=[INVALID_V1_URL, VALID_V1_URL])
+
     def _test_default_resolver(self, import_url, rules,
                                expected_urls_to_resolve=[],
                                expected_failure=False,
-                               partial_err_msg=None):
+                               partial_err_msg=None,
+                               failed_mirrors_ttl=DEFAULT_FAILED_MIRRORS_TTL,
+                               expected_skipped_urls=()):
 
         urls_to_resolve = []
         number_of_attempts = []
@@ -213,8 +304,9 @@ class TestDefaultResolver(testtools.TestCase):
                     else:
                         return None
 
-        resolver = DefaultImportResolver(rules=rules)
-        with mock.patch('requests.get', new=mock_requests_get,
+        resolver = DefaultImportResolver(
+            rules=rules, failed_mirrors_ttl=failed_mirrors_ttl)
+        with mock.patch('requests.Session.get', new=mock_requests_get,
                         create=True):
             with mock.patch(
                     'dsl_parser.import_resolver.abstract_import_resolver.'
@@ -233,6 +325,8 @@ class TestDefaultResolver(testtools.TestCase):
                         raise ex
                     if partial_err_msg:
                         self.assertIn(partial_err_msg, str(ex))
+                    for skipped_url in expected_skipped_urls:
+                        self.assertIn(skipped_url, str(ex))
 
         self.assertEqual(len(expected_urls_to_resolve), len(urls_to_resolve))
         for resolved_url in expected_urls_to_resolve:
@@ -244,8 +338,64 @@ class TestDefaultResolver(testtools.TestCase):
             self.assertEqual(MAX_NUMBER_RETRIES + 1, len(number_of_attempts))
 
 
+class TestDefaultResolverReader(testtools.TestCase):
+
+    def test_shared_reader_by_default(self):
+        resolver = DefaultImportResolver()
+        self.assertIsNone(resolver.reader)
+        self.assertIs(default_import_reader(), default_import_reader())
+
+    def test_configured_reader(self):
+        resolver = utils.create_import_resolver({
+            'parameters': {
+                'timeout': 3,
+                'max_retries': 2,
+                'pool_connections': 4,
+                'pool_maxsize': 20
+            }
+        })
+        reader = resolver.reader
+        self.assertEqual(3, reader.timeout)
+        self.assertEqual(2, reader.max_retries)
+        adapter = reader.session.get_adapter(VALID_V1_URL)
+        self.assertEqual(4, adapter._pool_connections)
+        self.assertEqual(20, adapter._pool_maxsize)
+
+    def test_injected_session(self):
+        session = mock.Mock()
+        session.get.return_value = mock.Mock(status_code=200, text='content')
+        resolver = DefaultImportResolver(session=session, timeout=7)
+        self.assertEqual('content', resolver.resolve(VALID_V1_URL))
+        session.get.assert_called_once_with(VALID_V1_URL, timeout=7)
+
+    def test_retry_backoff(self):
+        reader = ImportReader(retry_delay=100,
+                              retry_backoff=2,
+                              max_retry_delay=300)
+        self.assertEqual([100, 200, 300, 300],
+                         [reader._retry_wait(attempt, 0)
+                          for attempt in range(1, 5)])
+
+    def test_retries_with_session(self):
+        session = mock.Mock()
+        session.get.side_effect = requests.ConnectionError('refused')
+        resolver = DefaultImportResolver(session=session,
+                                         max_retries=2,
+                                         retry_delay=0)
+        self.assertRaises(DSLParsingLogicException,
+                          resolver.resolve, VALID_V1_URL)
+        self.assertEqual(3, session.get.call_count)
+
+
 class TestDefaultResolverValidations(testtools.TestCase):
 
+    def test_illegal_default_resolver_reader_parameter(self):
+        ex = self.assertRaises(DefaultResolverValidationException,
+                               DefaultImportResolver,
+                               timeout='10')
+        self.assertIn('The `timeout` parameter must be a non negative number',
+                      str(ex))
+
     def test_illegal_default_resolver_rules_type(self):
         # wrong rules configuration - string instead of list
         params = {
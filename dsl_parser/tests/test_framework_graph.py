@@ -0,0 +1,75 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import random
+
+import testtools
+
+from dsl_parser.framework import graph
+
+
+class TestDependencyGraph(testtools.TestCase):
+
+    def assert_sorted(self, dependency_graph, edges):
+        order = dependency_graph.topological_sort()
+        self.assertEqual(sorted(order), sorted(dependency_graph.nodes()))
+        positions = dict((node, index) for index, node in enumerate(order))
+        for u, v in edges:
+            self.assertLess(positions[u], positions[v])
+        return order
+
+    def test_topological_sort(self):
+        edges = [(1, 3), (2, 3), (3, 4), (0, 4), (2, 4)]
+        dependency_graph = graph.DependencyGraph()
+        dependency_graph.add_node(5)
+        for u, v in edges:
+            dependency_graph.add_edge(u, v)
+        order = self.assert_sorted(dependency_graph, edges)
+        self.assertEqual(order, dependency_graph.topological_sort())
+
+    def test_topological_sort_random_dags(self):
+        rand = random.Random(0)
+        for _ in range(20):
+            dependency_graph = graph.DependencyGraph()
+            edges = []
+            for v in range(50):
+                dependency_graph.add_node(v)
+                for u in rand.sample(range(v), min(v, 3)):
+                    edges.append((u, v))
+            rand.shuffle(edges)
+            for u, v in edges:
+                dependency_graph.add_edge(u, v)
+            self.assert_sorted(dependency_graph, edges)
+
+    def test_duplicate_edges(self):
+        dependency_graph = graph.DependencyGraph()
+        dependency_graph.add_edge('a', 'b')
+        dependency_graph.add_edge('a', 'b')
+        self.assertEqual(['b'], dependency_graph.successors('a'))
+        self.assertEqual(['a', 'b'], dependency_graph.topological_sort())
+
+    def test_cycle(self):
+        dependency_graph = graph.DependencyGraph()
+        dependency_graph.add_edge('x', 'a')
+        dependency_graph.add_edge('a', 'b')
+        dependency_graph.add_edge('b', 'c')
+        dependency_graph.add_edge('c', 'a')
+        ex = self.assertRaises(graph.CycleDetected,
+                               dependency_graph.topological_sort)
+        self.assertEqual(3, len(ex.cycle))
+        self.assertEqual(set(['a', 'b', 'c']), set(ex.cycle))
+        for index, node in enumerate(ex.cycle):
+            self.assertIn(ex.cycle[(index + 1) % len(ex.cycle)],
+                          dependency_graph.successors(node))
@@ -112,6 +112,18 @@ class TestSchemaSchemaValidation(testtools.TestCase):
             ]
         self.assert_invalid(TestList)
 
+    def test_schema_api_validation_cache(self):
+        class TestLeaf(elements.Element):
+            schema = elements.Leaf(type=str)
+
+        class TestElement(elements.Element):
+            schema = {'key': TestLeaf}
+
+        parser.validate_schema_api(TestElement)
+        parser.validate_schema_api(TestElement)
+        TestElement.schema = {'key': 'str'}
+        self.assert_invalid(TestElement)
+
     def test_invalid_list_schema3(self):
         class TestList(elements.Element):
             schema = [1]
@@ -254,6 +266,16 @@ class TestSchemaValidation(testtools.TestCase):
         self.assert_invalid(123, TestElement)
         self.assert_invalid({'test': 'value'}, TestElement)
 
+    def test_compiled_schema_validator_cache(self):
+        class TestElement(elements.Element):
+            schema = elements.Leaf(type=str)
+
+        self.assert_valid('1', TestElement)
+        self.assert_invalid(1, TestElement)
+        TestElement.schema = elements.Leaf(type=int)
+        self.assert_valid(1, TestElement)
+        self.assert_invalid('1', TestElement)
+
     def test_required_value(self):
         class TestElement(elements.Element):
             required = True
@@ -313,3 +335,37 @@ class TestSchemaValidation(testtools.TestCase):
             {'child': 'value'},
             TestElement,
             error_code=exceptions.ERROR_CODE_ILLEGAL_VALUE_ACCESS)
+
+    def test_key_predicate(self):
+        class TestType(elements.Element):
+            schema = elements.Leaf(type=str)
+
+        class TestTypes(elements.DictElement):
+            schema = elements.Dict(type=TestType)
+
+        class TestRef(elements.Element):
+            schema = elements.Leaf(type=list)
+            requires = {
+                TestType: [requirements.Value(
+                    'types',
+                    multiple_results=True,
+                    predicate=requirements.KeyPredicate(
+                        source_keys=lambda source: source.initial_value))]
+            }
+
+            def parse(self, types):
+                return types
+
+        class TestElement(elements.Element):
+            schema = {
+                'types': TestTypes,
+                'ref': TestRef
+            }
+
+            def parse(self):
+                return self.build_dict_result()
+
+        parsed = parser.parse(value={'types': {'a': '1', 'b': '2', 'c': '3'},
+                                     'ref': ['c', 'a', 'missing']},
+                              element_cls=TestElement)
+        self.assertEqual(['1', '3'], sorted(parsed['ref']))
@@ -0,0 +1,67 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import copy
+
+import testtools
+
+from dsl_parser import models
+from dsl_parser.frozen import (FrozenDict,
+                               FrozenList,
+                               freeze,
+                               thaw)
+
+
+class TestFrozen(testtools.TestCase):
+
+    def test_freeze(self):
+        value = freeze({'a': [1, {'b': 2}]})
+        self.assertIsInstance(value, FrozenDict)
+        self.assertIsInstance(value['a'], FrozenList)
+        self.assertIsInstance(value['a'][1], FrozenDict)
+        self.assertEqual({'a': [1, {'b': 2}]}, value)
+        self.assertRaises(TypeError, value.__setitem__, 'c', 3)
+        self.assertRaises(TypeError, value.update, {'c': 3})
+        self.assertRaises(TypeError, value.pop, 'a')
+        self.assertRaises(TypeError, value['a'].append, 3)
+        self.assertRaises(TypeError, value['a'].__setitem__, 0, 3)
+
+    def test_freeze_reuses_frozen_values(self):
+        frozen_value = freeze({'a': 1})
+        value = freeze({'b': frozen_value})
+        self.assertIs(frozen_value, value['b'])
+        self.assertIs(value, freeze(value))
+
+    def test_freeze_dict_subclass(self):
+        plan = models.Plan({'nodes': [{'id': 'node'}]})
+        self.assertIs(plan, freeze(plan))
+        self.assertIsInstance(plan['nodes'], FrozenList)
+
+    def test_copy_is_mutable(self):
+        value = freeze({'a': [1, {'b': 2}]})
+        for copied in [copy.deepcopy(value), thaw(value)]:
+            self.assertIs(dict, type(copied))
+            self.assertIs(list, type(copied['a']))
+            self.assertIs(dict, type(copied['a'][1]))
+            copied['a'][1]['b'] = 3
+        self.assertEqual(2, value['a'][1]['b'])
+        self.assertIs(dict, type(copy.copy(value)))
+
+    def test_thaw_dict_subclass(self):
+        plan = freeze(models.Plan({'nodes': [{'id': 'node'}]}))
+        thawed = thaw(plan)
+        self.assertIsInstance(thawed, models.Plan)
+        self.assertIs(list, type(thawed.node_templates))
+        self.assertIs(dict, type(thawed.node_templates[0]))
@@ -13,9 +13,13 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
+import mock
 from testtools import ExpectedException
 
-from dsl_parser import exceptions
+from dsl_parser import (exceptions,
+                        functions,
+                        models,
+                        scan)
 from dsl_parser.tasks import prepare_deployment_plan
 from dsl_parser.tests.abstract_test_parser import AbstractTestParser
 from dsl_parser.tests.abstract_test_parser import timeout
@@ -692,6 +696,54 @@ node_templates:
             self.assertIn('index is out of range. Got 10 but list size is 3',
                           str(e))
 
+    def test_long_get_property_chain(self):
+        nodes = 1500
+        yaml = """
+node_types:
+    vm_type:
+        properties:
+            a: { type: string }
+node_templates:
+"""
+        for i in range(nodes - 1):
+            yaml += """
+    vm{0}:
+        type: vm_type
+        properties:
+            a: {{ get_property: [vm{1}, a] }}
+""".format(i, i + 1)
+        yaml += """
+    vm{0}:
+        type: vm_type
+        properties:
+            a: end
+""".format(nodes - 1)
+        plan = prepare_deployment_plan(self.parse(yaml))
+        self.assertEqual('end', self.get_node_by_name(plan, 'vm0')[
+            'properties']['a'])
+
+    def test_shared_get_property_reference(self):
+        yaml = """
+node_types:
+    vm_type:
+        properties:
+            a: { type: string }
+            b: { type: string }
+            c: { type: string }
+node_templates:
+    vm:
+        type: vm_type
+        properties:
+            a: 1
+            b:
+                x: { get_property: [SELF, a] }
+                y: [{ get_property: [SELF, a] }]
+            c: { get_property: [SELF, b] }
+"""
+        plan = prepare_deployment_plan(self.parse(yaml))
+        self.assertEqual({'x': 1, 'y': [1]},
+                         plan.node_templates[0]['properties']['c'])
+
     @timeout(seconds=10)
     def test_circular_nested_property_path(self):
         yaml = """
@@ -718,6 +770,111 @@ node_templates:
                           str(e))
 
 
+class TestPlanNodeTemplatesIndex(AbstractTestParser):
+
+    def test_lookup(self):
+        plan = models.Plan({'nodes': [{'id': 'a', 'name': 'a'},
+                                      {'id': 'b', 'name': 'b'}]})
+        self.assertIs(plan.node_templates[1], plan.get_node_template('b'))
+        self.assertIs(plan.node_templates[0],
+                      plan.get_node_template_by_name('a'))
+        self.assertIsNone(plan.get_node_template('c'))
+        self.assertIsNone(plan.get_node_template({'get_input': 'a'}))
+
+    def test_invalidation(self):
+        plan = models.Plan({'nodes': [{'id': 'a', 'name': 'a'}]})
+        self.assertIsNone(plan.get_node_template('b'))
+        plan.node_templates.append({'id': 'b', 'name': 'b'})
+        self.assertEqual('b', plan.get_node_template('b')['id'])
+        plan['nodes'] = [{'id': 'c', 'name': 'c'}]
+        self.assertIsNone(plan.get_node_template('b'))
+        self.assertEqual('c', plan.get_node_template('c')['id'])
+        plan.node_templates[0] = {'id': 'd', 'name': 'd'}
+        plan.invalidate_node_templates_index()
+        self.assertEqual('d', plan.get_node_template('d')['id'])
+
+
+class TestFunctionSites(AbstractTestParser):
+
+    yaml = """
+inputs:
+    port: {}
+node_types:
+    type:
+        properties:
+            port: {}
+            endpoint: {}
+            plain: {}
+node_templates:
+    node:
+        type: type
+        properties:
+            port: { get_input: port }
+            endpoint:
+                -   { concat: [host, ':', { get_property: [SELF, port] }] }
+            plain: value
+        interfaces:
+            test:
+                op:
+                    implementation: plugin.op
+                    inputs:
+                        port: { get_property: [SELF, port] }
+plugins:
+    plugin:
+        executor: central_deployment_agent
+        install: false
+outputs:
+    port:
+        value: { get_attribute: [node, port] }
+"""
+
+    def test_sites(self):
+        plan = self.parse_1_1(self.yaml)
+        sites = plan.function_sites
+        self.assertEqual(
+            ['node.operations.op.inputs.port',
+             'node.operations.test.op.inputs.port',
+             'node.properties.endpoint.concat[2]',
+             'node.properties.endpoint[0]',
+             'node.properties.port',
+             'outputs.port.value'],
+            sorted(scan.render_path(path) for _, _, path, _, _ in sites))
+        for container, key, _, _, _ in sites:
+            self.assertTrue(functions.is_function(container[key]))
+
+    def test_sites_are_found_once_per_plan(self):
+        with mock.patch('dsl_parser.scan.find_service_template_properties',
+                        wraps=scan.find_service_template_properties) as find:
+            plan = self.parse_1_1(self.yaml)
+            self.assertEqual(1, find.call_count)
+            prepared = prepare_deployment_plan(plan, inputs={'port': 8080})
+            self.assertEqual(2, find.call_count)
+        self.assertIsNotNone(plan.function_sites)
+        node = prepared['nodes'][0]
+        self.assertEqual(8080, node['properties']['port'])
+        self.assertEqual(['host:8080'], node['properties']['endpoint'])
+        self.assertEqual(8080, node['operations']['op']['inputs']['port'])
+        self.assertEqual({'get_input': 'port'},
+                         plan['nodes'][0]['properties']['port'])
+
+    def test_edited_plan(self):
+        plan = self.parse_1_1(self.yaml)
+        node = plan['nodes'][0]
+        node['properties']['extra'] = {'get_input': 'port'}
+        for operation in ('op', 'test.op'):
+            del node['operations'][operation]['inputs']['port']
+        prepared = prepare_deployment_plan(plan, inputs={'port': 8080})
+        node = prepared['nodes'][0]
+        self.assertEqual(8080, node['properties']['extra'])
+        self.assertEqual(['host:8080'], node['properties']['endpoint'])
+        self.assertEqual({}, node['operations']['op']['inputs'])
+
+    def test_sites_of_plain_dict_plan(self):
+        plan = dict(self.parse_1_1(self.yaml))
+        prepared = prepare_deployment_plan(plan, inputs={'port': 8080})
+        self.assertEqual(8080, prepared['nodes'][0]['properties']['port'])
+
+
 class TestGetAttribute(AbstractTestParser):
 
     def test_unknown_ref(self):
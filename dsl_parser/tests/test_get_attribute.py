@@ -15,11 +15,13 @@
 
 import collections
 
+import mock
 import testtools.testcase
 
 from dsl_parser import constants
 from dsl_parser import exceptions
 from dsl_parser import functions
+from dsl_parser import scan
 from dsl_parser.tasks import prepare_deployment_plan
 from dsl_parser.tests.abstract_test_parser import AbstractTestParser
 
@@ -154,6 +156,99 @@ class TestEvaluateFunctions(AbstractTestParser):
         self.assertEqual(payload['d'], 'd_val')
         self.assertEqual(payload['f'], 'a_valb_valc_vald_val')
 
+    def test_evaluate_functions_bulk(self):
+        bulk_calls = []
+
+        def get_node_instances_bulk(node_instance_ids):
+            bulk_calls.append(sorted(node_instance_ids))
+            return [NodeInstance({'id': node_instance_id,
+                                  'node_id': 'webserver',
+                                  'runtime_properties': {
+                                      'a': node_instance_id}})
+                    for node_instance_id in node_instance_ids]
+
+        def get_node_instance(node_instance_id):
+            self.fail('{0} was not fetched in bulk'.format(node_instance_id))
+
+        payload = {
+            'a': {'get_attribute': ['SELF', 'a']},
+            'b': {'concat': [{'get_attribute': ['SOURCE', 'a']},
+                             {'get_attribute': ['TARGET', 'a']}]}
+        }
+        context = {'self': 'node1', 'source': 'node2', 'target': 'node3'}
+        functions.evaluate_functions(
+            payload, context, None, get_node_instance, None,
+            get_node_instances_bulk_method=get_node_instances_bulk)
+        self.assertEqual({'a': 'node1', 'b': 'node2node3'}, payload)
+        self.assertEqual([['node1', 'node2', 'node3']], bulk_calls)
+
+    def test_evaluate_outputs_by_nodes(self):
+        by_nodes_calls = []
+
+        def get_node_instances_by_nodes(node_ids):
+            by_nodes_calls.append(sorted(node_ids))
+            return [NodeInstance({'id': '{0}_1'.format(node_id),
+                                  'node_id': node_id,
+                                  'runtime_properties': {'a': node_id}})
+                    for node_id in node_ids]
+
+        def get_node_instances(node_id):
+            self.fail('{0} was not fetched in bulk'.format(node_id))
+
+        outputs_def = {
+            'a': {'value': {'get_attribute': ['node1', 'a']}},
+            'b': {'value': {'concat': [
+                {'get_attribute': ['node2', 'a']},
+                {'get_attribute': ['node1', 'a']}]}}
+        }
+        outputs = functions.evaluate_outputs(
+            outputs_def, get_node_instances, None, None,
+            get_node_instances_by_nodes_method=get_node_instances_by_nodes)
+        self.assertEqual({'a': 'node1', 'b': 'node2node1'}, outputs)
+        self.assertEqual([['node1', 'node2']], by_nodes_calls)
+
+    def test_evaluate_functions_by_nodes_no_instances(self):
+        def get_node_instances_by_nodes(node_ids):
+            return []
+
+        def get_node_instances(node_id):
+            self.fail('{0} was not fetched in bulk'.format(node_id))
+
+        payload = {'a': {'get_attribute': ['node', 'a']}}
+        with testtools.testcase.ExpectedException(
+                exceptions.FunctionEvaluationError,
+                '.*does not exist.*'):
+            functions.evaluate_functions(
+                payload, {}, get_node_instances, None, None,
+                get_node_instances_by_nodes_method=get_node_instances_by_nodes)
+
+    def test_runtime_evaluation_handler_by_nodes(self):
+        by_nodes_calls = []
+
+        def get_node_instances_by_nodes(node_ids):
+            by_nodes_calls.append(sorted(node_ids))
+            return [NodeInstance({'id': '{0}_1'.format(node_id),
+                                  'node_id': node_id,
+                                  'runtime_properties': {'a': node_id}})
+                    for node_id in node_ids]
+
+        def get_node_instances(node_id):
+            self.fail('{0} was not fetched in bulk'.format(node_id))
+
+        payload = {'a': {'concat': [{'get_attribute': ['node1', 'a']},
+                                    {'get_attribute': ['node2', 'a']},
+                                    {'get_attribute': ['node1', 'a']}]}}
+        handler = functions.runtime_evaluation_handler(
+            get_node_instances, None, None,
+            get_node_instances_by_nodes_method=get_node_instances_by_nodes)
+        scan.scan_properties(payload, handler,
+                             scope=None,
+                             context={},
+                             path='payload',
+                             replace=True)
+        self.assertEqual({'a': 'node1node2node1'}, payload)
+        self.assertEqual([['node1', 'node2']], by_nodes_calls)
+
     def test_process_attribute_relationship_ambiguity_resolution(self):
 
         node_instances = {
@@ -236,8 +331,37 @@ class TestEvaluateFunctions(AbstractTestParser):
             self._test_process_attribute_scaling_group_ambiguity_resolution(
                 context, index)
 
+    def test_process_attribute_scaling_group_ambiguity_resolution_bulk(self):
+        contexts = [{'self': 'node3_1'},
+                    {'source': 'node3_2', 'target': 'stub'},
+                    {'target': 'node3_1', 'source': 'stub'}]
+        resolve = \
+            self._test_process_attribute_scaling_group_ambiguity_resolution
+        for index, context in zip([1, 2, 1], contexts):
+            bulk_calls = resolve(context, index, bulk=True)
+            # one call per containment level
+            self.assertEqual(3, len(bulk_calls))
+            self.assertEqual(len(sum(bulk_calls, [])),
+                             len(set(sum(bulk_calls, []))))
+
+    def test_process_attribute_scaling_group_chains_prefetched_once(self):
+        prefetch = functions.RuntimeEvaluationStorage.get_node_instances_bulk
+        resolve = \
+            self._test_process_attribute_scaling_group_ambiguity_resolution
+        call_counts = []
+        for attributes in [1, 3]:
+            with mock.patch.object(functions.RuntimeEvaluationStorage,
+                                   'get_node_instances_bulk',
+                                   autospec=True,
+                                   side_effect=prefetch) as bulk:
+                resolve({'self': 'node3_1'}, 1, bulk=True,
+                        attributes=attributes)
+            call_counts.append(bulk.call_count)
+        # the containment chains are only walked by the first evaluation
+        self.assertEqual(call_counts[0], call_counts[1])
+
     def _test_process_attribute_scaling_group_ambiguity_resolution(
-            self, context, index):
+            self, context, index, bulk=False, attributes=1):
 
         node_instances = {
             'node1_1': {
@@ -354,19 +478,35 @@ class TestEvaluateFunctions(AbstractTestParser):
             return node_to_node_instances[node_id]
 
         def get_node_instance(node_instance_id):
+            if bulk:
+                self.fail('{0} was not fetched in bulk'.format(
+                    node_instance_id))
             return node_instances[node_instance_id]
 
         def get_node(node_id):
             return nodes[node_id]
 
-        payload = {'a': {'get_attribute': ['node6', 'key']}}
-        functions.evaluate_functions(payload,
-                                     context,
-                                     get_node_instances,
-                                     get_node_instance,
-                                     get_node)
-
-        self.assertEqual(payload['a'], 'value6_{0}'.format(index))
+        bulk_calls = []
+
+        def get_node_instances_bulk(node_instance_ids):
+            bulk_calls.append(sorted(node_instance_ids))
+            return [node_instances[node_instance_id]
+                    for node_instance_id in node_instance_ids]
+
+        payload = dict((str(i), {'get_attribute': ['node6', 'key']})
+                       for i in range(attributes))
+        functions.evaluate_functions(
+            payload,
+            context,
+            get_node_instances,
+            get_node_instance,
+            get_node,
+            get_node_instances_bulk_method=(get_node_instances_bulk
+                                            if bulk else None))
+
+        for value in payload.values():
+            self.assertEqual(value, 'value6_{0}'.format(index))
+        return bulk_calls
 
     def test_process_attributes_properties_fallback(self):
 
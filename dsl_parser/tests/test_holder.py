@@ -0,0 +1,102 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import sys
+
+import testtools
+
+from dsl_parser.holder import Holder, HolderDict
+
+
+class TestHolder(testtools.TestCase):
+
+    def test_get_item(self):
+        dict_holder = Holder.of({'a': 1, 'b': {'c': 2}})
+        self.assertIsInstance(dict_holder.value, HolderDict)
+        key_holder, value_holder = dict_holder.get_item('b')
+        self.assertEqual('b', key_holder.value)
+        self.assertEqual({'c': 2}, value_holder.restore())
+        self.assertEqual((None, None), dict_holder.get_item('d'))
+        self.assertIn('a', dict_holder)
+        self.assertNotIn('d', dict_holder)
+
+    def test_get_item_non_dict(self):
+        self.assertRaises(ValueError, Holder.of([1]).get_item, 'a')
+
+    def test_set_item_updates_index(self):
+        dict_holder = Holder.of({'a': 1})
+        dict_holder.value[Holder('b')] = Holder(2)
+        self.assertEqual(2, dict_holder.get_item('b')[1].value)
+        replacing_key = Holder('a')
+        dict_holder.value[replacing_key] = Holder(3)
+        self.assertIs(replacing_key, dict_holder.get_item('a')[0])
+        self.assertEqual({'a': 3, 'b': 2}, dict_holder.restore())
+        del dict_holder.value[replacing_key]
+        self.assertNotIn('a', dict_holder)
+        self.assertEqual({'b': 2}, dict_holder.restore())
+
+    def test_value_replaced_with_plain_dict(self):
+        dict_holder = Holder.of({'a': 1})
+        dict_holder.value = {Holder('b'): Holder(2)}
+        self.assertEqual(2, dict_holder.get_item('b')[1].value)
+        self.assertNotIn('a', dict_holder)
+
+    def test_unhashable_key(self):
+        dict_holder = Holder({Holder([Holder(1)]): Holder(2)})
+        self.assertNotIn('a', dict_holder)
+
+    def test_marks(self):
+        value_holder = Holder('value',
+                              start_line=0,
+                              start_column=5,
+                              end_line=70000,
+                              end_column=2,
+                              filename='file.yaml')
+        self.assertEqual(0, value_holder.start_line)
+        self.assertEqual(5, value_holder.start_column)
+        self.assertEqual(70000, value_holder.end_line)
+        self.assertEqual(2, value_holder.end_column)
+        self.assertEqual('file.yaml', value_holder.filename)
+        copied = value_holder.copy()
+        self.assertEqual('value', copied.value)
+        self.assertEqual(70000, copied.end_line)
+        self.assertEqual('file.yaml', copied.filename)
+        self.assertFalse(hasattr(value_holder, '__dict__'))
+
+    def test_filenames_are_not_kept(self):
+        filename = ''.join(['uploaded-', 'blueprint.yaml'])
+        refcount = sys.getrefcount(filename)
+        value_holder = Holder.of({'a': [1]}, filename=filename)
+        self.assertIs(filename, value_holder.filename)
+        del value_holder
+        self.assertEqual(refcount, sys.getrefcount(filename))
+
+    def test_no_marks(self):
+        value_holder = Holder.of({'a': 1})
+        self.assertIsNone(value_holder.start_line)
+        self.assertIsNone(value_holder.start_column)
+        self.assertIsNone(value_holder.end_line)
+        self.assertIsNone(value_holder.end_column)
+        self.assertIsNone(value_holder.filename)
+
+    def test_restore_with_memo(self):
+        dict_holder = Holder.of({'a': {'b': [1, 2]}, 'c': 3})
+        memo = {}
+        restored = dict_holder.restore(memo=memo)
+        self.assertEqual({'a': {'b': [1, 2]}, 'c': 3}, restored)
+        _, a_holder = dict_holder.get_item('a')
+        self.assertIs(restored['a'], a_holder.restore(memo=memo))
+        self.assertIs(restored, dict_holder.restore(memo=memo))
+        self.assertIsNot(restored['a'], a_holder.restore())
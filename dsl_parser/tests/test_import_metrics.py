@@ -0,0 +1,142 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import mock
+
+from dsl_parser import (exceptions,
+                        import_metrics,
+                        parser)
+from dsl_parser.elements import imports
+from dsl_parser.import_resolver.default_import_resolver import (
+    DefaultImportResolver,
+    failed_mirrors_cache)
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+TYPES = """
+node_types:
+    test_type: {}
+"""
+
+
+class TestImportMetrics(AbstractTestParser):
+
+    def setUp(self):
+        super(TestImportMetrics, self).setUp()
+        imports.parsed_imports_cache.clear()
+        self.addCleanup(imports.parsed_imports_cache.clear)
+
+    def _blueprint(self, types_import):
+        return """
+imports:
+    -   {0}
+node_templates:
+    node:
+        type: test_type
+""".format(types_import)
+
+    def test_file_import_metrics(self):
+        types_path = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + TYPES)
+        with import_metrics.collect() as metrics:
+            self.parse(self._blueprint(types_path))
+            self.parse(self._blueprint(types_path))
+        report = metrics.report()
+        self.assertEqual(2, len(report['imports']))
+        first, second = report['imports']
+        self.assertEqual(types_path, first['import'])
+        self.assertTrue(first['url'].startswith('file:'))
+        self.assertEqual(first['url'], first['resolved_url'])
+        self.assertEqual(1, first['attempts'])
+        self.assertEqual(
+            len(self.BASIC_VERSION_SECTION_DSL_1_0 + TYPES), first['bytes'])
+        self.assertFalse(first['parse_cache_hit'])
+        self.assertTrue(second['parse_cache_hit'])
+        self.assertIsNone(first['disk_cache'])
+        for record in report['imports']:
+            self.assertGreater(record['fetch_time'], 0)
+            self.assertGreater(record['load_time'], 0)
+            self.assertGreater(record['merge_time'], 0)
+        self.assertEqual(sum(r['fetch_time'] for r in report['imports']),
+                         report['fetch_time'])
+
+    def test_resolver_rules_metrics(self):
+        failed_mirrors_cache.clear()
+        self.addCleanup(failed_mirrors_cache.clear)
+
+        def get(url, timeout):
+            if url.startswith('http://mirror'):
+                return mock.Mock(status_code=404, text='')
+            return mock.Mock(status_code=200,
+                             text=self.BASIC_VERSION_SECTION_DSL_1_0 + TYPES)
+        resolver = DefaultImportResolver(
+            rules=[{'http://origin': 'http://mirror'}])
+        with mock.patch('requests.Session.get', side_effect=get):
+            with import_metrics.collect() as metrics:
+                self.parse(self._blueprint('http://origin/types.yaml'),
+                           resolver=resolver)
+        record, = metrics.report()['imports']
+        self.assertEqual('http://origin/types.yaml', record['url'])
+        self.assertEqual('http://origin/types.yaml', record['resolved_url'])
+        self.assertEqual(2, record['attempts'])
+
+    def test_sink(self):
+        types_path = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + TYPES)
+        reports = []
+        import_metrics.add_sink(reports.append)
+        try:
+            self.parse(self._blueprint(types_path))
+        finally:
+            import_metrics.remove_sink(reports.append)
+        self.parse(self._blueprint(types_path))
+        self.assertEqual(1, len(reports))
+        self.assertEqual(types_path, reports[0]['imports'][0]['import'])
+
+    def test_failing_sink(self):
+        types_path = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + TYPES)
+        reports = []
+
+        def failing_sink(report):
+            raise RuntimeError('sink failed')
+        import_metrics.add_sink(failing_sink)
+        import_metrics.add_sink(reports.append)
+        try:
+            plan = self.parse(self._blueprint(types_path))
+            self.assertEqual('node', plan['nodes'][0]['id'])
+            # the error of a failing parse is not replaced either
+            self.assertRaises(exceptions.DSLParsingLogicException,
+                              self.parse,
+                              self._blueprint(types_path + '.missing'))
+        finally:
+            import_metrics.remove_sink(failing_sink)
+            import_metrics.remove_sink(reports.append)
+        self.assertEqual(2, len(reports))
+
+    def test_parse_from_url_metrics(self):
+        types_path = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + TYPES)
+        blueprint_url = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + self._blueprint(types_path),
+            as_uri=True)
+        with import_metrics.collect() as metrics:
+            # the parse runs on a thread pool, the metrics are still
+            # collected in this thread
+            parser.parse_from_url(blueprint_url)
+        record, = metrics.report()['imports']
+        self.assertEqual(types_path, record['import'])
+
+    def test_nothing_recorded_by_default(self):
+        self.assertIsNone(import_metrics.parse_metrics())
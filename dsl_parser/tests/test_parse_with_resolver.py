@@ -13,6 +13,7 @@
 #    * See the License for the specific language governing permissions and
 #    * limitations under the License.
 
+from dsl_parser import parser
 from dsl_parser.tests.abstract_test_parser import AbstractTestParser
 from dsl_parser.import_resolver.abstract_import_resolver import \
     AbstractImportResolver
@@ -61,3 +62,93 @@ imports:
         self.assertEqual(len(urls), 2)
         self.assertIn('http://url1', urls)
         self.assertIn('http://url2', urls)
+
+    def test_resolve_async(self):
+
+        class CustomResolver(AbstractImportResolver):
+            def resolve(self, url):
+                if url == 'http://url1':
+                    return BLUEPRINT_1
+                raise RuntimeError('unknown url {0}'.format(url))
+        custom_resolver = CustomResolver()
+        resolved = []
+        result = custom_resolver.resolve_async('http://url1',
+                                               callback=resolved.append)
+        self.assertEqual(BLUEPRINT_1, result.get(10))
+        self.assertEqual(BLUEPRINT_1,
+                         custom_resolver.fetch_import_async(
+                             'http://url1').get(10))
+        failed = custom_resolver.fetch_import_async('http://url2')
+        self.assertRaises(RuntimeError, failed.get, 10)
+        self.assertEqual([BLUEPRINT_1], resolved)
+
+    def test_failing_async_callback(self):
+
+        class CustomResolver(AbstractImportResolver):
+            def resolve(self, url):
+                return BLUEPRINT_1
+
+        def callback(data):
+            raise RuntimeError('callback failed')
+        custom_resolver = CustomResolver()
+        result = custom_resolver.resolve_async('http://url1',
+                                               callback=callback)
+        self.assertEqual(BLUEPRINT_1, result.get(10))
+        # the shared pool still hands out results
+        self.assertEqual(BLUEPRINT_1,
+                         custom_resolver.resolve_async('http://url1').get(10))
+
+    def test_imports_are_fetched_async(self):
+
+        class Result(object):
+            def __init__(self, data):
+                self.data = data
+
+            def get(self):
+                return self.data
+
+        fetched = []
+
+        class CustomResolver(AbstractImportResolver):
+            def resolve(self, url):
+                raise AssertionError('resolve was called')
+
+            def fetch_import_async(self, url, callback=None):
+                fetched.append(url)
+                return Result(BLUEPRINT_2)
+        yaml_to_parse = BLUEPRINT_1 + """
+imports:
+    -   http://url2"""
+        self.parse(yaml_to_parse, resolver=CustomResolver())
+        self.assertEqual(['http://url2'], fetched)
+
+    def test_parse_from_url_async(self):
+
+        class CustomResolver(AbstractImportResolver):
+            def resolve(self, url):
+                return BLUEPRINT_2
+        blueprint_url = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + BLUEPRINT_1 + """
+imports:
+    -   http://url2""", as_uri=True)
+        parsed = []
+        result = parser.parse_from_url_async(blueprint_url,
+                                             resolver=CustomResolver(),
+                                             callback=parsed.append)
+        plan = result.get(10)
+        self.assertEqual('resolver_1', plan['nodes'][0]['id'])
+        self.assertEqual([plan], parsed)
+
+    def test_parse_from_url_async_failing_callback(self):
+        blueprint_url = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + BLUEPRINT_1, as_uri=True)
+
+        def callback(plan):
+            # parsing from a parse thread does not wait for the pool
+            parser.parse_from_url(blueprint_url)
+            raise RuntimeError('callback failed')
+        result = parser.parse_from_url_async(blueprint_url,
+                                             callback=callback)
+        self.assertEqual('resolver_1', result.get(10)['nodes'][0]['id'])
+        plan = parser.parse_from_url(blueprint_url)
+        self.assertEqual('resolver_1', plan['nodes'][0]['id'])
@@ -0,0 +1,89 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from dsl_parser import exceptions
+from dsl_parser.elements import imports
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestParsedImportsCache(AbstractTestParser):
+
+    def setUp(self):
+        super(TestParsedImportsCache, self).setUp()
+        self.cache = imports.ParsedImportsCache(max_size=2)
+
+    def test_hits_and_misses(self):
+        raw = 'node_types:\n    type: {}\n'
+        self.cache.load('types.yaml', 'http://host/types.yaml', raw)
+        self.cache.load('types.yaml', 'http://host/types.yaml', raw)
+        self.cache.load('types.yaml', 'http://host/types.yaml',
+                        'node_types:\n    other_type: {}\n')
+        self.assertEqual({'hits': 1, 'misses': 2, 'size': 2, 'max_size': 2},
+                         self.cache.stats())
+
+    def test_lru_eviction(self):
+        raw = 'node_types: {}\n'
+        self.cache.load('a.yaml', 'http://host/a.yaml', raw)
+        self.cache.load('b.yaml', 'http://host/b.yaml', raw)
+        self.cache.load('a.yaml', 'http://host/a.yaml', raw)
+        self.cache.load('c.yaml', 'http://host/c.yaml', raw)
+        self.cache.load('a.yaml', 'http://host/a.yaml', raw)
+        self.cache.load('b.yaml', 'http://host/b.yaml', raw)
+        stats = self.cache.stats()
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(4, stats['misses'])
+        self.assertEqual(2, stats['size'])
+
+    def test_loaded_holders_are_isolated(self):
+        raw = 'node_types:\n    type: {}\n'
+        first = self.cache.load('types.yaml', 'http://host/types.yaml', raw)
+        _, node_types = first.get_item('node_types')
+        node_types.value.clear()
+        first.value.clear()
+        second = self.cache.load('types.yaml', 'http://host/types.yaml', raw)
+        self.assertEqual({'node_types': {'type': {}}}, second.restore())
+        self.assertEqual('types.yaml', second.filename)
+
+    def test_parse_errors_are_not_cached(self):
+        for _ in range(2):
+            self.assertRaises(exceptions.DSLParsingFormatException,
+                              self.cache.load,
+                              'bad.yaml', 'http://host/bad.yaml', 'a: [')
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_shared_import_is_loaded_once(self):
+        imports.parsed_imports_cache.clear()
+        self.addCleanup(imports.parsed_imports_cache.clear)
+        shared = self.make_yaml_file(self.BASIC_VERSION_SECTION_DSL_1_0 + """
+node_types:
+    shared_type: {}
+""")
+        for name in ('first', 'second'):
+            other = self.make_yaml_file(self.BASIC_VERSION_SECTION_DSL_1_0 + """
+node_types:
+    {0}_type: {{}}
+""".format(name))
+            plan = self.parse("""
+imports:
+    -   {0}
+    -   {1}
+node_templates:
+    node:
+        type: shared_type
+""".format(shared, other))
+            self.assertEqual('shared_type', plan['nodes'][0]['type'])
+        stats = imports.parsed_imports_cache.stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(3, stats['misses'])
@@ -184,8 +184,9 @@ imports:
 imports:
     -   first_file: fake-file.yaml
         """
-        self._assert_dsl_parsing_exception_error_code(
+        ex = self._assert_dsl_parsing_exception_error_code(
             yaml, 1, DSLParsingFormatException)
+        self.assertIn('path: imports.0', str(ex))
 
     def test_duplicate_import_in_same_file(self):
         yaml = """
@@ -194,8 +195,9 @@ imports:
     -   fake-file2.yaml
     -   fake-file.yaml
         """
-        self._assert_dsl_parsing_exception_error_code(
+        ex = self._assert_dsl_parsing_exception_error_code(
             yaml, 2, DSLParsingFormatException)
+        self.assertIn('path: imports', str(ex))
 
     def test_type_multiple_derivation(self):
         yaml = self.BASIC_NODE_TEMPLATES_SECTION + """
@@ -0,0 +1,151 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+
+from dsl_parser.elements import imports
+from dsl_parser.exceptions import DSLParsingLogicException
+from dsl_parser.import_resolver.abstract_import_resolver import \
+    AbstractImportResolver
+from dsl_parser.import_resolver.default_import_resolver import \
+    DefaultImportResolver
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+TYPES_URL = 'http://www.example.org/types.yaml'
+MISSING_URL = 'http://www.example.org/missing.yaml'
+
+BLUEPRINT = """
+imports:
+    -   {0}
+node_templates:
+    node:
+        type: test_type
+""".format(TYPES_URL)
+
+
+class _Resolver(AbstractImportResolver):
+
+    def __init__(self):
+        self.resolved = []
+        self.contents = {TYPES_URL: """
+node_types:
+    test_type:
+        properties:
+            key:
+                default: first
+"""}
+
+    def resolve(self, import_url):
+        self.resolved.append(import_url)
+        if import_url not in self.contents:
+            raise DSLParsingLogicException(13, 'missing')
+        return self.contents[import_url]
+
+
+class TestPreloadImports(AbstractTestParser):
+
+    def setUp(self):
+        super(TestPreloadImports, self).setUp()
+        imports.parsed_imports_cache.clear()
+        imports.preloaded_imports.clear()
+        self.addCleanup(imports.parsed_imports_cache.clear)
+        self.addCleanup(imports.preloaded_imports.clear)
+        self.resolver = _Resolver()
+
+    def test_preloaded_imports_are_not_fetched(self):
+        preloader = imports.preload_imports([TYPES_URL, MISSING_URL],
+                                            resolver=self.resolver)
+        self.assertEqual([MISSING_URL], preloader.errors.keys())
+        self.assertEqual(2, len(self.resolver.resolved))
+        self.assertEqual(1, imports.parsed_imports_cache.stats()['misses'])
+        plan = self.parse(BLUEPRINT, resolver=self.resolver)
+        self.assertEqual('first', plan['nodes'][0]['properties']['key'])
+        self.assertEqual(2, len(self.resolver.resolved))
+        self.assertEqual(1, imports.parsed_imports_cache.stats()['hits'])
+
+    def test_other_resolvers_fetch_preloaded_imports(self):
+        imports.preload_imports([TYPES_URL], resolver=self.resolver)
+        other_resolver = _Resolver()
+        other_resolver.contents[TYPES_URL] = \
+            other_resolver.contents[TYPES_URL].replace('first', 'other')
+        plan = self.parse(BLUEPRINT, resolver=other_resolver)
+        self.assertEqual('other', plan['nodes'][0]['properties']['key'])
+        self.assertEqual([TYPES_URL], other_resolver.resolved)
+        self.assertEqual(1, len(self.resolver.resolved))
+
+    def test_preloaded_imports_expire(self):
+        imports.preload_imports([TYPES_URL], resolver=self.resolver, ttl=0)
+        self.assertIsNone(
+            imports.preloaded_imports.get(self.resolver, TYPES_URL))
+        self.parse(BLUEPRINT, resolver=self.resolver)
+        self.assertEqual([TYPES_URL, TYPES_URL], self.resolver.resolved)
+
+    def test_default_ttl(self):
+        imports.preload_imports([TYPES_URL], resolver=self.resolver)
+        now = time.time()
+        self.patch(imports.time, 'time', lambda: now + 10 ** 6)
+        self.assertIsNotNone(
+            imports.preloaded_imports.get(self.resolver, TYPES_URL))
+        self.assertEqual(
+            imports.DEFAULT_PRELOADED_IMPORTS_TTL,
+            imports.ImportsPreloader([], refresh_interval=60).ttl)
+        self.assertEqual(
+            7200, imports.ImportsPreloader([], refresh_interval=3600).ttl)
+
+    def test_default_resolver(self):
+        types_path = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + """
+node_types:
+    test_type:
+        properties:
+            key:
+                default: first
+""")
+        types_url = self._path2url(types_path)
+        blueprint = BLUEPRINT.replace(TYPES_URL, types_url)
+        imports.preload_imports([types_url])
+        with open(types_path, 'w') as f:
+            f.write(self.BASIC_VERSION_SECTION_DSL_1_0 + """
+node_types:
+    test_type:
+        properties:
+            key:
+                default: second
+""")
+        # parses without a resolver create a default one with the same
+        # (default) rules
+        plan = self.parse(blueprint)
+        self.assertEqual('first', plan['nodes'][0]['properties']['key'])
+        plan = self.parse(blueprint, resolver=DefaultImportResolver())
+        self.assertEqual('first', plan['nodes'][0]['properties']['key'])
+        plan = self.parse(blueprint, resolver=DefaultImportResolver(
+            rules=[{'http://www.example.org': 'http://mirror'}]))
+        self.assertEqual('second', plan['nodes'][0]['properties']['key'])
+
+    def test_refresh(self):
+        preloader = imports.preload_imports([TYPES_URL],
+                                            resolver=self.resolver,
+                                            refresh_interval=0.01)
+        self.addCleanup(preloader.stop)
+        self.resolver.contents[TYPES_URL] = \
+            self.resolver.contents[TYPES_URL].replace('first', 'second')
+        deadline = time.time() + 5
+        while imports.preloaded_imports.get(self.resolver, TYPES_URL) != \
+                self.resolver.contents[TYPES_URL]:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+        preloader.stop()
+        plan = self.parse(BLUEPRINT, resolver=self.resolver)
+        self.assertEqual('second', plan['nodes'][0]['properties']['key'])
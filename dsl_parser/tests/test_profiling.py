@@ -0,0 +1,90 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import copy
+
+import testtools
+
+from dsl_parser.framework import (parser,
+                                  elements,
+                                  profiling)
+
+
+class TestChild(elements.Element):
+
+    schema = elements.Leaf(type=dict)
+
+    def parse(self):
+        return profiling.deepcopy(self.initial_value)
+
+
+class TestElement(elements.Element):
+
+    schema = elements.List(type=TestChild)
+
+
+class TestProfiling(testtools.TestCase):
+
+    def _entries(self, report):
+        return dict(((entry['element_type'], entry['phase']), entry)
+                    for entry in report['elements'])
+
+    def test_profile(self):
+        original_deepcopy = copy.deepcopy
+        with profiling.profile() as parse_profile:
+            self.assertIs(parse_profile, profiling.current_profile())
+            self.assertIs(original_deepcopy, copy.deepcopy)
+            parser.parse([{'a': [1]}, {'b': {}}, {}], TestElement)
+            # deep copies made outside of the parser are not counted
+            copy.deepcopy({'a': [1]})
+        self.assertIs(original_deepcopy, copy.deepcopy)
+        self.assertIsNone(profiling.current_profile())
+
+        report = parse_profile.report()
+        entries = self._entries(report)
+        child_type = '{0}.TestChild'.format(__name__)
+        parent_type = '{0}.TestElement'.format(__name__)
+        self.assertEqual(len(profiling.PHASES) * 2, len(entries))
+        for phase in profiling.PHASES:
+            self.assertEqual(3, entries[(child_type, phase)]['calls'])
+            self.assertEqual(1, entries[(parent_type, phase)]['calls'])
+        self.assertEqual(
+            3, entries[(child_type, profiling.PARSE)]['deepcopy_count'])
+        self.assertEqual(
+            0, entries[(child_type, profiling.VALIDATE)]['deepcopy_count'])
+        self.assertEqual(3, report['deepcopy_count'])
+        self.assertEqual(
+            sum(entry['total_time'] for entry in report['elements']),
+            report['total_time'])
+
+    def test_nested_profiles(self):
+        with profiling.profile() as outer:
+            with profiling.profile() as inner:
+                parser.parse([{}], TestElement)
+            self.assertIs(outer, profiling.current_profile())
+            parser.parse([{}, {}], TestElement)
+        child_type = '{0}.TestChild'.format(__name__)
+        self.assertEqual(
+            1, self._entries(inner.report())[
+                (child_type, profiling.PARSE)]['calls'])
+        self.assertEqual(
+            2, self._entries(outer.report())[
+                (child_type, profiling.PARSE)]['calls'])
+
+    def test_not_profiled_after_exit(self):
+        with profiling.profile() as parse_profile:
+            pass
+        parser.parse([{}], TestElement)
+        self.assertEqual([], parse_profile.report()['elements'])
@@ -0,0 +1,47 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import testtools
+
+from dsl_parser import scan
+
+
+class TestScan(testtools.TestCase):
+
+    def test_paths(self):
+        paths = {}
+
+        def handler(value, scope, context, path):
+            paths[scan.render_path(path)] = value
+            return value
+        scan.scan_properties({'a': [1, {'b': 2}], 'c': {'d': 3}},
+                             handler,
+                             path='node.properties')
+        self.assertEqual({'node.properties.a': [1, {'b': 2}],
+                          'node.properties.a[0]': 1,
+                          'node.properties.a[1]': {'b': 2},
+                          'node.properties.a.b': 2,
+                          'node.properties.c': {'d': 3},
+                          'node.properties.c.d': 3}, paths)
+
+    def test_render_path(self):
+        self.assertEqual('payload', scan.render_path('payload'))
+        self.assertIsNone(scan.render_path(None))
+        path = 'root'
+        for i in range(5000):
+            path = (path, i, '.{0}')
+        rendered = scan.render_path(path)
+        self.assertTrue(rendered.startswith('root.0.1.'))
+        self.assertTrue(rendered.endswith('.4998.4999'))
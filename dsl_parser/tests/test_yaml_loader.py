@@ -0,0 +1,84 @@
+########
+# Copyright (c) 2016 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import testtools
+import yaml.parser
+
+from dsl_parser import yaml_loader
+
+
+YAML = """
+node_types:
+    type: {}
+node_templates:
+    node:
+        type: type
+        properties:
+            int: 1
+            float: 1.5
+            bool: true
+            null_value: ~
+            list: [1, 'two', {three: 3}]
+            text: |
+                line1
+                line2
+"""
+
+
+def _marks(value_holder):
+    value = value_holder.value
+    if isinstance(value, dict):
+        value = sorted((_marks(k), _marks(v)) for k, v in value.iteritems())
+    elif isinstance(value, list):
+        value = [_marks(v) for v in value]
+    return (value,
+            value_holder.start_line,
+            value_holder.start_column,
+            value_holder.end_line,
+            value_holder.end_column,
+            value_holder.filename)
+
+
+class TestYamlLoader(testtools.TestCase):
+
+    def setUp(self):
+        super(TestYamlLoader, self).setUp()
+        if not yaml_loader.HAS_LIBYAML:
+            self.skipTest('libyaml is not available')
+
+    def test_libyaml_loader_keeps_marks(self):
+        python_result = yaml_loader.load(
+            YAML, 'file.yaml', loader_cls=yaml_loader.MarkedLoader)
+        c_result = yaml_loader.load(
+            YAML, 'file.yaml', loader_cls=yaml_loader.CMarkedLoader)
+        self.assertEqual(_marks(python_result), _marks(c_result))
+        self.assertEqual(python_result.restore(), c_result.restore())
+
+    def test_libyaml_loader_empty_stream(self):
+        result = yaml_loader.load('', 'file.yaml',
+                                  loader_cls=yaml_loader.CMarkedLoader)
+        self.assertEqual({}, result.value)
+        self.assertEqual('file.yaml', result.filename)
+
+    def test_libyaml_loader_parser_error(self):
+        for loader_cls in [yaml_loader.MarkedLoader,
+                           yaml_loader.CMarkedLoader]:
+            self.assertRaises(yaml.parser.ParserError,
+                              yaml_loader.load,
+                              'a: [1, 2', 'file.yaml',
+                              loader_cls=loader_cls)
+
+    def test_default_loader(self):
+        self.assertIs(yaml_loader.CMarkedLoader, yaml_loader.DefaultLoader)
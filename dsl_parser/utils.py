@@ -69,7 +69,8 @@ def merge_schemas(overridden_schema,
                     path=[],
                     raise_on_missing_property=False)
                 if default_value:
-                    merged[key]['default'] = default_value
+                    merged[key] = dict(overriding_property,
+                                       default=default_value)
     return merged
 
 
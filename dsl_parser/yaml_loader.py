@@ -19,6 +19,10 @@ from yaml.composer import Composer
 from yaml.resolver import Resolver
 from yaml.parser import Parser
 from yaml.constructor import SafeConstructor
+try:
+    from yaml.cyaml import CParser
+except ImportError:
+    CParser = None
 
 from dsl_parser import holder
 
@@ -145,8 +149,30 @@ class MarkedLoader(Reader, Scanner, Parser, Composer, HolderConstructor,
         Resolver.__init__(self)
 
 
-def load(stream, filename):
-    result = MarkedLoader(stream, filename).get_single_data()
+if CParser is not None:
+    class CMarkedLoader(CParser, HolderConstructor, Resolver):
+        """MarkedLoader variant backed by libyaml.
+
+        libyaml only replaces the scanning/parsing/composing stages, the
+        composed nodes still carry start/end marks so the holders built
+        by HolderConstructor are identical to the ones built by
+        MarkedLoader.
+        """
+
+        def __init__(self, stream, filename=None):
+            CParser.__init__(self, stream)
+            HolderConstructor.__init__(self, filename)
+            Resolver.__init__(self)
+else:
+    CMarkedLoader = None
+
+HAS_LIBYAML = CMarkedLoader is not None
+DefaultLoader = CMarkedLoader if HAS_LIBYAML else MarkedLoader
+
+
+def load(stream, filename, loader_cls=None):
+    loader_cls = loader_cls or DefaultLoader
+    result = loader_cls(stream, filename).get_single_data()
     if result is None:
         # load of empty string returns None so we convert it to an empty
         # dict